@@ -0,0 +1,114 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Stand-in for the OAuth2 server of the access tokens, to exercise the protected routes offline.
+
+The service validates the access tokens against ``BDC_AUTH_ACCESS_TOKEN_URL``, see
+:func:`lccs_ws.auth.oauth2`. This server answers that validation for a fixed set of tokens, each one
+with its roles, and rejects the others.
+
+Usage::
+
+    python benchmarks/auth_server.py --port 5060 --token loadtest=admin --token reader=
+
+    BDC_AUTH_ACCESS_TOKEN_URL=http://127.0.0.1:5060/token BDC_AUTH_CLIENT_ID=loadtest \\
+    BDC_AUTH_CLIENT_SECRET=loadtest FLASK_APP=lccs_ws flask run
+
+Any path and method of the server validate the token, found in the ``token`` or ``access_token``
+field of the form, of the JSON body or of the query string, or in the ``x-api-key`` or
+``Authorization: Bearer`` headers.
+"""
+import argparse
+import time
+
+from flask import Flask, jsonify, request
+
+
+def token_info(token: str, roles: list, ttl: int) -> dict:
+    """Return the validation result of a token, in the layout read by the authorization client."""
+    now = int(time.time())
+
+    return dict(active=True, sub=dict(id=token, username=token, roles=roles), client_id='lccs-ws',
+                iat=now, exp=now + ttl)
+
+
+def request_token():
+    """Return the token of a validation request."""
+    body = request.get_json(silent=True) or dict()
+
+    for source in (request.form, body, request.args):
+        for field in ('token', 'access_token'):
+            if source.get(field):
+                return source[field]
+
+    authorization = request.headers.get('Authorization', '')
+
+    if authorization.lower().startswith('bearer '):
+        return authorization[7:]
+
+    return request.headers.get('x-api-key')
+
+
+def create_server(tokens: dict, ttl: int = 3600) -> Flask:
+    """Create the stand-in server.
+
+    :param tokens: The roles of each valid token.
+    :type tokens: dict
+    :param ttl: The lifetime, in seconds, announced for the tokens.
+    :type ttl: int
+    """
+    app = Flask(__name__)
+    app.config['validations'] = 0
+
+    @app.route('/', defaults={'path': ''}, methods=['GET', 'POST'])
+    @app.route('/<path:path>', methods=['GET', 'POST'])
+    def validate(path):
+        app.config['validations'] += 1
+        token = request_token()
+
+        if token not in tokens:
+            return jsonify(active=False, message='Invalid token'), 401
+
+        return jsonify(token_info(token, tokens[token], ttl))
+
+    return app
+
+
+def parse_token(value: str) -> tuple:
+    """Parse a ``token=role,role`` option."""
+    token, _, roles = value.partition('=')
+
+    return token, [role for role in roles.split(',') if role]
+
+
+def main():
+    """Run the server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5060)
+    parser.add_argument('--token', type=parse_token, action='append', metavar='TOKEN=ROLES',
+                        help='A valid token and its comma-separated roles. Defaults to loadtest=admin.')
+    parser.add_argument('--ttl', type=int, default=3600, help='Lifetime, in seconds, announced for the tokens.')
+    args = parser.parse_args()
+
+    tokens = dict(args.token or [('loadtest', ['admin'])])
+
+    create_server(tokens, args.ttl).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Benchmark suite of Land Cover Classification System Web Service.
+
+The suite seeds the database of ``SQLALCHEMY_DATABASE_URI`` with a synthetic data set, see
+:mod:`lccs_ws.synthetic`, times the read endpoints of :mod:`lccs_ws.views` and the functions of
+:mod:`lccs_ws.data` with `pytest-benchmark <https://pytest-benchmark.readthedocs.io>`_ and removes
+the data set at the end. Use a database prepared with the LCCS-DB schema, not a production one.
+
+Save the results of a commit and compare them with the saved results of another::
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+
+or write them to a JSON file with ``--benchmark-json=results.json``. The size of the data set is
+set with the ``--synthetic-*`` options, see ``pytest benchmarks --help``.
+
+The protected endpoints are requested with the token of ``--access-token``, validated by the
+authorization server of ``BDC_AUTH_ACCESS_TOKEN_URL``, e.g. ``benchmarks/auth_server.py``::
+
+    python benchmarks/auth_server.py --token benchmark=admin &
+    BDC_AUTH_ACCESS_TOKEN_URL=http://127.0.0.1:5060/token pytest benchmarks --access-token benchmark
+
+The cache of responses, see :mod:`lccs_ws.response_cache`, is disabled so that the views render each
+request. The benchmarks of the ``views-cached`` group enable it with the ``response_cache`` fixture.
+"""
+import pytest
+
+from lccs_ws import create_app
+from lccs_ws.config import Config
+from lccs_ws.response_cache import init_response_cache, responses
+from lccs_ws.synthetic import generate, remove
+
+SYNTHETIC_NAME = 'benchmark'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('synthetic', 'Synthetic data set of the benchmarks')
+    group.addoption('--synthetic-classes', type=int, default=10000, help='Classes of each classification system.')
+    group.addoption('--synthetic-depth', type=int, default=5, help='Levels of the class hierarchies.')
+    group.addoption('--synthetic-fanout', type=int, default=4, help='Average children of a class.')
+    group.addoption('--synthetic-mappings', type=int, default=100000, help='Mappings between the systems.')
+    group.addoption('--synthetic-style-size', type=int, default=4 * 1024 * 1024,
+                    help='Size, in bytes, of the style of each system.')
+    parser.addoption('--access-token', help='Access token of the protected endpoints, which are skipped without it.')
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['LCCS_RESPONSE_CACHE_SIZE'] = 0
+    init_response_cache(app)
+    return app
+
+
+@pytest.fixture(scope='session')
+def access_token(request):
+    token = request.config.option.access_token
+
+    if token is None:
+        pytest.skip('The protected endpoints require --access-token.')
+
+    return token
+
+
+@pytest.fixture
+def response_cache():
+    responses.configure(Config.LCCS_RESPONSE_CACHE_SIZE, Config.LCCS_RESPONSE_CACHE_TTL)
+
+    yield responses
+
+    responses.configure(0, 0)
+
+
+@pytest.fixture(scope='session')
+def dataset(app, request):
+    options = request.config.option
+
+    with app.app_context():
+        remove(SYNTHETIC_NAME)
+
+        dataset = generate(SYNTHETIC_NAME, systems=2, classes=options.synthetic_classes,
+                           depth=options.synthetic_depth, fanout=options.synthetic_fanout,
+                           mappings=options.synthetic_mappings, style_size=options.synthetic_style_size)
+
+    yield dataset
+
+    with app.app_context():
+        remove(SYNTHETIC_NAME)
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    with app.test_client() as client:
+        yield client
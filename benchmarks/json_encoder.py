@@ -0,0 +1,68 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Compare the encode time of the JSON encoders on big payloads.
+
+Usage::
+
+    python benchmarks/json_encoder.py --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import timeit
+from decimal import Decimal
+
+from lccs_ws.encoder import JSONEncoder, ORJSONEncoder
+
+URL = 'http://localhost:5000/classification_systems/1'
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    classes = [
+        dict(id=i, name=f'class-{i}', title=f'Classe {i}', code=str(i), description=f'Descrição da classe {i}',
+             links=[dict(href=f'{URL}/classes/{i}', rel='child', type='application/json',
+                         title='Classification System Class')])
+        for i in range(1, args.rows + 1)
+    ]
+    mappings = [
+        dict(source_class_id=str(i), target_class_id=str(i + args.rows), description=f'Mapping {i}',
+             degree_of_similarity=Decimal('0.5'),
+             links=[dict(href=f'{URL}/classes/{i}', rel='item'), dict(href=f'{URL}/classes/{i}', rel='item')])
+        for i in range(1, args.rows + 1)
+    ]
+
+    print(f'{"payload":<10} {"indent":>6} {"json (ms)":>10} {"orjson (ms)":>12} {"speedup":>8}')
+
+    for name, payload in (('classes', classes), ('mappings', mappings)):
+        for indent in (None, 2):
+            times = [
+                min(timeit.repeat(lambda: json.dumps(payload, cls=encoder, sort_keys=True, indent=indent),
+                                  number=1, repeat=args.repeat)) * 1000
+                for encoder in (JSONEncoder, ORJSONEncoder)
+            ]
+
+            print(f'{name:<10} {str(indent):>6} {times[0]:>10.1f} {times[1]:>12.1f} {times[0] / times[1]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
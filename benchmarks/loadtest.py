@@ -0,0 +1,265 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Load test of a running instance of the service.
+
+Concurrent clients replay a weighted mix of the routes of :mod:`lccs_ws.views` for a fixed duration
+and the latency percentiles and the throughput are reported per route. The mix is given as
+``scenario=weight`` pairs, the scenarios are:
+
+==================  =================================================================================
+``systems``         ``GET /classification_systems``
+``system``          ``GET /classification_systems/<system>``
+``classes``         ``GET /classification_systems/<system>/classes``, a page of ``--page-size`` classes
+``class``           ``GET /classification_systems/<system>/classes/<class>``, a random class
+``mappings``        ``GET /mappings/<system>``
+``mapping``         ``GET /mappings/<system>/<target>``, a page of ``--page-size`` mappings
+``style_formats``   ``GET /classification_systems/<system>/style_formats``
+``style``           ``GET /classification_systems/<system>/styles/<style_format>``
+``write``           ``POST /style_formats`` followed by ``DELETE /style_formats/<name>``
+==================  =================================================================================
+
+The ``style_formats``, ``style`` and ``write`` routes require ``--token``, the ``write`` one with the
+``admin`` or ``creator`` role. Use the stand-in of ``benchmarks/auth_server.py`` to run them without
+the OAuth2 server. The scenarios whose arguments are missing are left out of the mix.
+
+Usage::
+
+    python benchmarks/auth_server.py --token loadtest=admin &
+    BDC_AUTH_ACCESS_TOKEN_URL=http://127.0.0.1:5060/token gunicorn --workers 4 'lccs_ws:create_app()' &
+
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --duration 60 --concurrency 32 \\
+        --system synthetic-0-1 --target synthetic-1-1 --style-format synthetic --token loadtest
+
+Requires ``httpx``. The ``lccs-ws generate`` command loads a catalog to test with.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+DEFAULT_MIX = 'systems=15,system=10,classes=20,class=20,mappings=5,mapping=15,style_formats=5,style=8,write=2'
+"""Default weights of the scenarios."""
+
+
+class Session:
+    """The requests of a load test and their latencies, by route."""
+
+    def __init__(self, client: httpx.AsyncClient, args, classes: list):
+        """Build the session."""
+        self.client = client
+        self.args = args
+        self.classes = classes
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.headers = {'x-api-key': args.token} if args.token else dict()
+
+    async def request(self, route: str, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request and record its latency under ``route``."""
+        start = time.perf_counter()
+
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+        except httpx.TransportError:
+            self.errors[route] += 1
+            return None
+
+        self.latencies[route].append(time.perf_counter() - start)
+
+        if response.status_code >= 400:
+            self.errors[route] += 1
+
+        return response
+
+
+async def systems(session: Session):
+    """Browse the classification systems."""
+    await session.request('systems', 'GET', '/classification_systems')
+
+
+async def system(session: Session):
+    """Read the classification system."""
+    await session.request('system', 'GET', f'/classification_systems/{session.args.system}')
+
+
+async def classes(session: Session):
+    """List a page of classes."""
+    await session.request('classes', 'GET', f'/classification_systems/{session.args.system}/classes',
+                          params=dict(limit=session.args.page_size))
+
+
+async def class_(session: Session):
+    """Read a random class."""
+    await session.request('class', 'GET',
+                          f'/classification_systems/{session.args.system}/classes/{random.choice(session.classes)}')
+
+
+async def mappings(session: Session):
+    """List the mapped systems."""
+    await session.request('mappings', 'GET', f'/mappings/{session.args.system}')
+
+
+async def mapping(session: Session):
+    """Fetch a page of mappings."""
+    await session.request('mapping', 'GET', f'/mappings/{session.args.system}/{session.args.target}',
+                          params=dict(limit=session.args.page_size))
+
+
+async def style_formats(session: Session):
+    """List the style formats of the system."""
+    await session.request('style_formats', 'GET', f'/classification_systems/{session.args.system}/style_formats')
+
+
+async def style(session: Session):
+    """Download the style file."""
+    await session.request('style', 'GET',
+                          f'/classification_systems/{session.args.system}/styles/{session.args.style_format}')
+
+
+async def write(session: Session):
+    """Create and delete a style format."""
+    name = f'loadtest-{uuid.uuid4().hex[:12]}'
+    response = await session.request('write (create)', 'POST', '/style_formats', json=dict(name=name))
+
+    if response is not None and response.status_code == 201:
+        await session.request('write (delete)', 'DELETE', f'/style_formats/{name}')
+
+
+SCENARIOS = {
+    'systems': (systems, ()),
+    'system': (system, ()),
+    'classes': (classes, ()),
+    'class': (class_, ()),
+    'mappings': (mappings, ()),
+    'mapping': (mapping, ('target',)),
+    'style_formats': (style_formats, ('token',)),
+    'style': (style, ('token', 'style_format')),
+    'write': (write, ('token',)),
+}
+"""The scenarios and the arguments they require."""
+
+
+def parse_mix(value: str) -> dict:
+    """Parse the ``scenario=weight`` pairs of the mix."""
+    mix = dict()
+
+    for pair in value.split(','):
+        name, _, weight = pair.partition('=')
+        name = name.strip()
+
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario {name}, use one of {", ".join(SCENARIOS)}.')
+
+        mix[name] = float(weight or 1)
+
+    return mix
+
+
+async def discover(client: httpx.AsyncClient, args) -> list:
+    """Resolve the classification system, if not given, and return the ids of some of its classes."""
+    if args.system is None:
+        response = await client.get('/classification_systems')
+        response.raise_for_status()
+        args.system = response.json()[0]['id']
+
+    response = await client.get(f'/classification_systems/{args.system}/classes', params=dict(limit=1000))
+    response.raise_for_status()
+
+    return [item['id'] for item in response.json()]
+
+
+async def run(args, mix: dict) -> tuple:
+    """Run the load test and return the session and the elapsed time."""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        session = Session(client, args, await discover(client, args))
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                name, = random.choices(names, weights)
+                await SCENARIOS[name][0](session)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+        return session, time.perf_counter() - start
+
+
+def report(session: Session, elapsed: float):
+    """Print the statistics of each route."""
+    print(f'{"route":<16} {"requests":>9} {"errors":>7} {"req/s":>9} {"p50 (ms)":>9} {"p95 (ms)":>9} {"p99 (ms)":>9}')
+
+    total = 0
+
+    for route, latencies in sorted(session.latencies.items()):
+        total += len(latencies)
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+
+        print(f'{route:<16} {len(latencies):>9} {session.errors[route]:>7} {len(latencies) / elapsed:>9.1f} '
+              f'{quantiles[49] * 1000:>9.2f} {quantiles[94] * 1000:>9.2f} {quantiles[98] * 1000:>9.2f}')
+
+    print(f'{"total":<16} {total:>9} {sum(session.errors.values()):>7} {total / elapsed:>9.1f}')
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Base URL of the service.')
+    parser.add_argument('--duration', type=float, default=30, help='Duration, in seconds.')
+    parser.add_argument('--concurrency', type=int, default=32, help='Number of concurrent clients.')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout of the requests, in seconds.')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='Weights of the scenarios.')
+    parser.add_argument('--system', help='Id or identifier of the classification system. Defaults to the first one.')
+    parser.add_argument('--target', help='Id or identifier of a target system of the mappings.')
+    parser.add_argument('--style-format', help='Id or name of a style format of the system.')
+    parser.add_argument('--page-size', type=int, default=100, help='Page size of the listings.')
+    parser.add_argument('--token', help='Access token of the protected routes.')
+    parser.add_argument('--seed', type=int, help='Seed of the choice of the scenarios.')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    mix = args.mix
+
+    for name in list(mix):
+        missing = [argument for argument in SCENARIOS[name][1] if getattr(args, argument) is None]
+
+        if missing:
+            print(f'Skipping {name}: requires --{", --".join(arg.replace("_", "-") for arg in missing)}',
+                  file=sys.stderr)
+            del mix[name]
+
+    if not mix:
+        parser.error('No scenario to run.')
+
+    session, elapsed = asyncio.run(run(args, mix))
+
+    report(session, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Compare the marshmallow schemas with the row serializers of the read endpoints.
+
+Usage::
+
+    python benchmarks/serializers.py --rows 10000 --repeat 5
+"""
+import argparse
+import timeit
+from collections import namedtuple
+from decimal import Decimal
+
+from lccs_ws.forms import ClassesMappingSchema, ClassesSchema
+from lccs_ws.serializers import class_mapping_serializer, class_serializer
+
+ClassRow = namedtuple('ClassRow', ['id', 'name', 'title', 'code', 'description', 'class_parent_id'])
+MappingRow = namedtuple('MappingRow', ['source_class_id', 'target_class_id', 'description', 'degree_of_similarity'])
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    classes = [
+        ClassRow(i, f'class-{i}', f'Class {i}', str(i), f'Description of class {i}', (i // 10) or None)
+        for i in range(1, args.rows + 1)
+    ]
+    mappings = [
+        MappingRow(i, i + args.rows, f'Mapping {i}', Decimal('0.5'))
+        for i in range(1, args.rows + 1)
+    ]
+
+    cases = [
+        ('classes', lambda: ClassesSchema().dump(classes, many=True),
+         lambda: class_serializer.dump(classes, many=True)),
+        ('mappings', lambda: ClassesMappingSchema().dump(mappings, many=True),
+         lambda: class_mapping_serializer.dump(mappings, many=True)),
+    ]
+
+    print(f'{"case":<10} {"marshmallow (ms)":>18} {"serializer (ms)":>16} {"speedup":>8}')
+
+    for name, schema, serializer in cases:
+        assert schema() == serializer()
+
+        schema_time = min(timeit.repeat(schema, number=1, repeat=args.repeat)) * 1000
+        serializer_time = min(timeit.repeat(serializer, number=1, repeat=args.repeat)) * 1000
+
+        print(f'{name:<10} {schema_time:>18.1f} {serializer_time:>16.1f} {schema_time / serializer_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
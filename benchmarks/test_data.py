@@ -0,0 +1,120 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Benchmarks of the functions of :mod:`lccs_ws.data`."""
+import pytest
+from lccs_db.models import db
+
+from lccs_ws import data
+from lccs_ws.synthetic import SYNTHETIC_AUTHORITY, SYNTHETIC_VERSION
+
+WRITE_CLASSES = 1000
+"""Number of classes of the classification system created by the write benchmarks."""
+
+READS = {
+    'get_classification_systems': lambda ds: data.get_classification_systems(),
+    'get_classification_system': lambda ds: data.get_classification_system(ds.source_id),
+    'get_systems_version': lambda ds: data.get_systems_version(),
+    'get_system_version': lambda ds: data.get_system_version(ds.source_id, ds.target_id),
+    'get_classification_system_classes': lambda ds: data.get_classification_system_classes(ds.source_id),
+    'get_classification_system_classes_page':
+        lambda ds: data.get_classification_system_classes(ds.source_id, limit=1000),
+    'iter_classification_system_classes': lambda ds: list(data.iter_classification_system_classes(ds.source_id)[1]),
+    'get_classification_system_class':
+        lambda ds: data.get_classification_system_class(ds.source_id, f'benchmark-0-{ds.classes - 1}'),
+    'get_mappings': lambda ds: data.get_mappings(ds.source_id),
+    'get_mapping': lambda ds: data.get_mapping(ds.source_id, ds.target_id),
+    'get_mapping_page': lambda ds: data.get_mapping(ds.source_id, ds.target_id, limit=1000),
+    'iter_mapping': lambda ds: list(data.iter_mapping(ds.source_id, ds.target_id)[2]),
+    'get_style_formats': lambda ds: data.get_style_formats(),
+    'get_style_format': lambda ds: data.get_style_format(ds.style_format_id),
+    'get_system_style_format': lambda ds: data.get_system_style_format(ds.source_id),
+    'get_classification_system_style':
+        lambda ds: data.get_classification_system_style(ds.source_id, ds.style_format_id),
+    'get_identifier_system': lambda ds: data.get_identifier_system('benchmark-0', SYNTHETIC_VERSION),
+    'get_identifier_style_format': lambda ds: data.get_identifier_style_format('benchmark'),
+}
+
+
+@pytest.fixture
+def context(app, dataset):
+    with app.test_request_context():
+        yield dataset
+        db.session.remove()
+
+
+@pytest.mark.parametrize('name', list(READS))
+def test_read(benchmark, context, name):
+    benchmark.group = 'data'
+    benchmark(READS[name], context)
+
+
+def _class_hierarchy(classes: int, children: int = 10) -> list:
+    """Return a class hierarchy in the format of the classes file of ``insert_classes``."""
+    nodes = [dict(name=f'write-{index}', code=str(index), title={'en': f'Class {index}'},
+                  description={'en': f'Class {index}'}, children=[]) for index in range(classes)]
+
+    for index, node in enumerate(nodes[1:], start=1):
+        nodes[(index - 1) // children]['children'].append(node)
+
+    return nodes[:1]
+
+
+@pytest.fixture
+def write_system(context):
+    system = data.create_classification_system('benchmark-write', SYNTHETIC_AUTHORITY, SYNTHETIC_VERSION,
+                                               {'en': 'Write benchmark'}, {'en': 'Write benchmark'})
+
+    yield system['id']
+
+    data.delete_classification_system(system['id'])
+
+
+def test_insert_classes(benchmark, context, write_system):
+    benchmark.group = 'data-write'
+    classes = _class_hierarchy(WRITE_CLASSES)
+
+    def setup():
+        data.delete_classes(write_system)
+
+    benchmark.pedantic(data.insert_classes, args=(write_system, classes), setup=setup, rounds=5)
+
+
+def test_insert_mappings(benchmark, context, write_system):
+    benchmark.group = 'data-write'
+    data.insert_classes(write_system, _class_hierarchy(WRITE_CLASSES))
+    mappings = [dict(source_class=f'write-{index}', target_class=f'benchmark-1-{index}',
+                     description='Write benchmark', degree_of_similarity=0.5) for index in range(WRITE_CLASSES)]
+
+    def setup():
+        data.delete_mappings(write_system, context.target_id)
+
+    benchmark.pedantic(data.insert_mappings, args=(write_system, context.target_id, mappings), setup=setup,
+                       rounds=5)
+
+
+def test_delete_classification_system(benchmark, context):
+    benchmark.group = 'data-write'
+
+    def setup():
+        system = data.create_classification_system('benchmark-delete', SYNTHETIC_AUTHORITY, SYNTHETIC_VERSION,
+                                                   {'en': 'Delete benchmark'}, {'en': 'Delete benchmark'})
+        data.insert_classes(system['id'], _class_hierarchy(WRITE_CLASSES))
+
+        return (system['id'],), dict()
+
+    benchmark.pedantic(data.delete_classification_system, setup=setup, rounds=5)
@@ -0,0 +1,115 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Benchmarks of the read endpoints, through the Flask test client.
+
+The ``views`` group times the anonymous requests. The style formats and the styles require an
+access token: they are timed in the ``views-protected`` group, with the token of ``--access-token``.
+The write endpoints also require a token, their work is measured in ``test_data.py``. The
+``views-cached`` group times the anonymous endpoints answered from the cache of responses.
+"""
+import pytest
+
+from lccs_ws.response_cache import CACHE_HEADER
+
+ENDPOINTS = [
+    ('root', '/'),
+    ('classification_systems', '/classification_systems'),
+    ('classification_system', '/classification_systems/{source}'),
+    ('classes_page', '/classification_systems/{source}/classes?limit=1000'),
+    ('classes_all', '/classification_systems/{source}/classes'),
+    ('classes_stream', '/classification_systems/{source}/classes?stream=true'),
+    ('class', '/classification_systems/{source}/classes/{source_name}-{last_class}'),
+    ('mappings', '/mappings/{source}'),
+    ('mapping_page', '/mappings/{source}/{target}?limit=1000'),
+    ('mapping_all', '/mappings/{source}/{target}'),
+    ('mapping_stream', '/mappings/{source}/{target}?stream=true'),
+    ('search_system', '/classification_systems/search/benchmark-0/1'),
+    ('search_style_format', '/style_formats/search/benchmark'),
+]
+
+PROTECTED_ENDPOINTS = [
+    ('style_formats', '/style_formats'),
+    ('style_format', '/style_formats/{style_format}'),
+    ('system_style_formats', '/classification_systems/{source}/style_formats'),
+    ('style_file', '/classification_systems/{source}/styles/{style_format}'),
+]
+
+CACHED_ENDPOINTS = [(name, path) for name, path in ENDPOINTS if 'stream=' not in path]
+
+
+def _url(path, dataset):
+    return path.format(source=dataset.source_id, target=dataset.target_id, style_format=dataset.style_format_id,
+                       source_name='benchmark-0', last_class=dataset.classes - 1)
+
+
+def _benchmark_get(benchmark, client, url, headers=None):
+    """Time the requests of an URL, including the read of the response body, and return the last response."""
+    def get():
+        response = client.get(url, headers=headers)
+        response.get_data()
+        return response
+
+    response = benchmark(get)
+
+    benchmark.extra_info['bytes'] = len(response.get_data())
+
+    return response
+
+
+@pytest.mark.parametrize('name, path', ENDPOINTS, ids=[name for name, _ in ENDPOINTS])
+def test_endpoint(benchmark, client, dataset, name, path):
+    benchmark.group = 'views'
+
+    response = _benchmark_get(benchmark, client, _url(path, dataset))
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('name, path', PROTECTED_ENDPOINTS, ids=[name for name, _ in PROTECTED_ENDPOINTS])
+def test_protected_endpoint(benchmark, client, dataset, access_token, name, path):
+    benchmark.group = 'views-protected'
+    url = _url(path, dataset)
+    headers = {'x-api-key': access_token}
+    # The first request validates the token, the next ones find it in the token cache.
+    client.get(url, headers=headers).get_data()
+
+    response = _benchmark_get(benchmark, client, url, headers)
+
+    assert response.status_code == 200
+
+
+def test_not_modified(benchmark, client, dataset):
+    benchmark.group = 'views'
+    url = f'/mappings/{dataset.source_id}/{dataset.target_id}'
+    etag = client.get(url).headers['ETag']
+
+    response = benchmark(client.get, url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize('name, path', CACHED_ENDPOINTS, ids=[name for name, _ in CACHED_ENDPOINTS])
+def test_cached_endpoint(benchmark, client, dataset, response_cache, name, path):
+    benchmark.group = 'views-cached'
+    url = _url(path, dataset)
+    client.get(url).get_data()
+
+    response = _benchmark_get(benchmark, client, url)
+
+    assert response.status_code == 200
+    assert response.headers[CACHE_HEADER] == 'hit'
@@ -20,11 +20,22 @@ import os
 
 from flask import Flask
 from lccs_db.ext import LCCSDatabase
+from lccs_db.models import db
 from lccs_db.models.base import translation_hybrid
-from werkzeug.exceptions import HTTPException, InternalServerError
+from werkzeug.exceptions import (HTTPException, InternalServerError,
+                                 ServiceUnavailable)
 
 from lccs_ws.config import get_settings
 
+from .auth import init_auth
+from .encoder import get_json_encoder
+from .instrumentation import init_instrumentation
+from .invalidation import init_invalidation
+from .pool import PoolTimeoutError, init_pool
+from .profiling import init_profiling
+from .response_cache import init_response_cache
+from .routing import init_replicas
+from .tracing import init_tracing
 from .version import __version__
 
 
@@ -42,10 +53,17 @@ def create_app():
 
     conf = get_settings(os.environ.get('LCCSWS_ENVIRONMENT', 'DevelopmentConfig'))
     app.config.from_object(conf)
+    app.json_encoder = get_json_encoder(app.config['LCCS_JSON_ENCODER'])
+
+    init_pool(app)
+    init_auth(app)
+    init_response_cache(app)
 
     with app.app_context():
         # Initialize Flask SQLAlchemy
         LCCSDatabase(app)
+        init_replicas(app, db)
+        init_invalidation(app, db)
         translation_hybrid.current_locale = 'pt-br'
 
         setup_app(app)
@@ -56,6 +74,14 @@ def create_app():
 def setup_error_handlers(app: Flask):
     """Configure LCCS Error Handlers on Flask Application."""
 
+    @app.errorhandler(PoolTimeoutError)
+    def handle_pool_timeout(e):
+        """Shed the request when no database connection is available."""
+        app.logger.warning(f'Request shed: {e}')
+
+        return ({'code': ServiceUnavailable.code, 'description': ServiceUnavailable.description},
+                ServiceUnavailable.code, {'Retry-After': str(app.config['LCCS_POOL_RETRY_AFTER'])})
+
     @app.errorhandler(Exception)
     def handle_exception(e):
         """Handle exceptions."""
@@ -81,6 +107,9 @@ def setup_app(app):
         return response
 
     setup_error_handlers(app)
+    init_instrumentation(app)
+    init_profiling(app)
+    init_tracing(app)
 
     from . import views
 
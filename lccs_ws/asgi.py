@@ -0,0 +1,336 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""ASGI entry point of Land Cover Classification System Web Service.
+
+The anonymous ``GET`` requests of the catalog routes are served in the event loop, with the
+asynchronous data access of :mod:`lccs_ws.async_data`, so a single process handles many
+concurrent requests. Every other request, e.g. the writes, the authenticated requests and the
+streaming listings, is served by the Flask application in a thread, through
+:class:`asgiref.wsgi.WsgiToAsgi`.
+
+Run it with an ASGI server, e.g.::
+
+    uvicorn --factory lccs_ws.asgi:create_asgi_app --workers 2
+
+The ``asgi`` extra installs the dependencies. Without asyncpg, or with a database other than
+PostgreSQL, the whole Flask application is served through :class:`asgiref.wsgi.WsgiToAsgi`.
+"""
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask, g, request
+from lccs_db.models.base import translation_hybrid
+from lccs_db.utils import language
+from werkzeug.datastructures import ETags
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.test import EnvironBuilder
+
+from . import create_app
+from .instrumentation import bind_statistics
+from .utils import make_etag
+
+try:
+    from .async_data import AsyncDatabase
+except ImportError:  # pragma: no cover
+    AsyncDatabase = None
+
+TOKEN_HEADERS = (b'x-api-key', b'authorization')
+"""Request headers which carry an access token."""
+
+
+class RequestState(NamedTuple):
+    """Attributes of a request resolved by the Flask application before the database access."""
+
+    links: object
+    locale: Optional[str]
+    full_path: str
+    if_none_match: ETags
+    pagination: dict
+
+
+class ASGIApplication:
+    """ASGI application that serves the catalog reads asynchronously.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param database: The asynchronous data access.
+    :type database: lccs_ws.async_data.AsyncDatabase
+    """
+
+    def __init__(self, app: Flask, database: AsyncDatabase):
+        """Build the ASGI application."""
+        from . import views
+
+        self.app = app
+        self.database = database
+        self.views = views
+        self.wsgi = WsgiToAsgi(app)
+        self.adapter = app.url_map.bind('')
+
+        self.handlers: Dict[str, Callable[..., Awaitable[Callable]]] = {
+            'get_classification_systems': self.classification_systems,
+            'get_classification_system': self.classification_system,
+            'classification_systems_classes': self.classification_system_classes,
+            'classification_systems_class': self.classification_system_class,
+            'get_mappings': self.mappings,
+            'get_mapping': self.mapping,
+        }
+        # The routes whose translated columns depend on the ``language`` argument.
+        self.translated = {'get_classification_systems', 'get_classification_system', 'classification_systems_class'}
+
+    async def __call__(self, scope, receive, send):
+        """Handle an ASGI connection."""
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        handler = self._match(scope) if scope['type'] == 'http' else None
+
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        endpoint, view_args = handler
+
+        await self.respond(scope, send, endpoint, view_args)
+
+    async def lifespan(self, receive, send):
+        """Open and close the database connections with the server."""
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await self.database.connect()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.database.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _match(self, scope) -> Optional[tuple]:
+        """Return the endpoint and the arguments of the requests served asynchronously."""
+        if scope['method'] != 'GET' or any(name in TOKEN_HEADERS for name, _ in scope['headers']):
+            return None
+
+        # The traced requests go through the views, see lccs_ws.tracing.
+        if self.app.config['LCCS_TRACING']:
+            return None
+
+        args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+
+        if 'access_token' in args or 'profile' in args or args.get('stream', 'false').lower() in ('true', '1'):
+            return None
+
+        try:
+            endpoint, view_args = self.adapter.match(scope['path'], method='GET')
+        except (NotFound, MethodNotAllowed):
+            return None
+
+        return (endpoint, view_args) if endpoint in self.handlers else None
+
+    @staticmethod
+    def _environ(scope) -> dict:
+        """Build the WSGI environment of an ASGI request."""
+        host, port = scope.get('server') or ('localhost', 80)
+
+        builder = EnvironBuilder(
+            path=scope['path'],
+            base_url=f"{scope.get('scheme', 'http')}://{host}:{port}{scope.get('root_path', '')}",
+            query_string=scope['query_string'].decode('latin-1'),
+            method=scope['method'],
+            headers=[(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']],
+        )
+
+        return builder.get_environ()
+
+    def _prepare(self, endpoint: str) -> RequestState:
+        """Run the request preprocessing of the Flask application and return the request attributes."""
+        self.app.preprocess_request()
+
+        locale = None
+
+        if endpoint in self.translated:
+            locale = language()(lambda *args, **kwargs: translation_hybrid.current_locale)()
+
+        pagination = self.views._pagination_args() if endpoint in ('classification_systems_classes',
+                                                                   'get_mapping') else dict()
+
+        return RequestState(request.links, locale, request.full_path, request.if_none_match, pagination)
+
+    async def respond(self, scope, send, endpoint: str, view_args: dict):
+        """Serve a request asynchronously.
+
+        The request is handled in three steps: the preprocessing of the Flask application, in a request
+        context, the database access, out of any context, and the rendering of the response by the views,
+        in a new request context. The request statistics, see :mod:`lccs_ws.instrumentation`, are carried
+        through the three steps and include the asyncpg statements.
+        """
+        environ = self._environ(scope)
+        statistics = None
+
+        try:
+            with self.app.request_context(environ):
+                state = self._prepare(endpoint)
+                statistics = g.get('lccs_ws_statistics')
+
+            with bind_statistics(statistics):
+                render = await self.handlers[endpoint](state, **view_args)
+
+            error = None
+        except Exception as e:
+            error = e
+
+        with self.app.request_context(environ):
+            # The statistics of the first context are reported by process_response, see lccs_ws.instrumentation.
+            if statistics is not None:
+                g.lccs_ws_statistics = statistics
+
+            try:
+                if error is not None:
+                    raise error
+
+                request.links = state.links
+                response = self.app.make_response(render())
+            except Exception as e:
+                response = self._handle_exception(e)
+
+            response = self.app.process_response(response)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    def _handle_exception(self, error: Exception):
+        """Return the response of an error, as the error handlers of the Flask application would."""
+        try:
+            return self.app.make_response(self.app.handle_user_exception(error))
+        except Exception as e:
+            return self.app.handle_exception(e)
+
+    def _conditional(self, state: RequestState, version: str, render: Callable) -> Callable:
+        """Return a renderer that answers as :func:`lccs_ws.utils.conditional`."""
+        etag = make_etag(version, state.full_path)
+
+        def _render():
+            if state.if_none_match.contains(etag):
+                response = self.app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = self.app.make_response(render())
+
+            if response.status_code == 200:
+                response.set_etag(etag)
+
+            return response
+
+        return _render
+
+    async def classification_systems(self, state: RequestState):
+        """Serve ``GET /classification_systems``."""
+        version = await self.database.get_systems_version()
+
+        if state.if_none_match.contains(make_etag(version, state.full_path)):
+            return self._conditional(state, version, None)
+
+        systems = await self.database.get_classification_systems(locale=state.locale)
+
+        return self._conditional(state, version, lambda: self.views.render_classification_systems(systems))
+
+    async def classification_system(self, state: RequestState, system_id_or_identifier: str):
+        """Serve ``GET /classification_systems/<system_id_or_identifier>``."""
+        version = await self.database.get_system_version(system_id_or_identifier)
+
+        if state.if_none_match.contains(make_etag(version, state.full_path)):
+            return self._conditional(state, version, None)
+
+        system = await self.database.get_classification_system(system_id_or_identifier, locale=state.locale)
+
+        return self._conditional(state, version, lambda: self.views.render_classification_system(system))
+
+    async def classification_system_classes(self, state: RequestState, system_id_or_identifier: str):
+        """Serve ``GET /classification_systems/<system_id_or_identifier>/classes``."""
+        version = await self.database.get_system_version(system_id_or_identifier)
+
+        if state.if_none_match.contains(make_etag(version, state.full_path)):
+            return self._conditional(state, version, None)
+
+        system_id, page = await self.database.get_classification_system_classes(system_id_or_identifier,
+                                                                                **state.pagination)
+
+        return self._conditional(state, version,
+                                 lambda: self.views.render_classification_system_classes(system_id, page))
+
+    async def classification_system_class(self, state: RequestState, system_id_or_identifier: str,
+                                          class_id_or_name: str):
+        """Serve ``GET /classification_systems/<system_id_or_identifier>/classes/<class_id_or_name>``."""
+        version = await self.database.get_system_version(system_id_or_identifier)
+
+        if state.if_none_match.contains(make_etag(version, state.full_path)):
+            return self._conditional(state, version, None)
+
+        system_id, class_info = await self.database.get_classification_system_class(
+            system_id_or_identifier, class_id_or_name, locale=state.locale
+        )
+
+        return self._conditional(state, version,
+                                 lambda: self.views.render_classification_system_class(system_id, class_info))
+
+    async def mappings(self, state: RequestState, system_id_or_identifier: str):
+        """Serve ``GET /mappings/<system_id_or_identifier>``."""
+        version = await self.database.get_system_version(system_id_or_identifier)
+
+        if state.if_none_match.contains(make_etag(version, state.full_path)):
+            return self._conditional(state, version, None)
+
+        system, systems_id_target = await self.database.get_mappings(system_id_or_identifier)
+
+        return self._conditional(state, version, lambda: self.views.render_mappings(system.id, systems_id_target))
+
+    async def mapping(self, state: RequestState, system_id_or_identifier_source: str,
+                      system_id_or_identifier_target: str):
+        """Serve ``GET /mappings/<system_id_or_identifier_source>/<system_id_or_identifier_target>``."""
+        version = await self.database.get_system_version(system_id_or_identifier_source,
+                                                         system_id_or_identifier_target)
+
+        if state.if_none_match.contains(make_etag(version, state.full_path)):
+            return self._conditional(state, version, None)
+
+        system_id_source, system_id_target, page = await self.database.get_mapping(
+            system_id_or_identifier_source, system_id_or_identifier_target, **state.pagination
+        )
+
+        return self._conditional(state, version,
+                                 lambda: self.views.render_mapping(system_id_source, system_id_target, page))
+
+
+def create_asgi_app(app: Flask = None):
+    """Create the ASGI application of the Land Cover Classification System Web Service.
+
+    :param app: The Flask application. Defaults to a new application, see :func:`lccs_ws.create_app`.
+    :type app: flask.Flask
+    """
+    app = app or create_app()
+
+    if AsyncDatabase is None or not app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres'):
+        return WsgiToAsgi(app)
+
+    return ASGIApplication(app, AsyncDatabase(app))
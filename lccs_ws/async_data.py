@@ -0,0 +1,264 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Asynchronous data module of Land Cover Classification System Web Service.
+
+The methods of :class:`AsyncDatabase` are the asynchronous versions of the read functions of
+:mod:`lccs_ws.data`. The statements are built by the same queries of :mod:`lccs_ws.data`,
+compiled for PostgreSQL and executed with `asyncpg <https://github.com/MagicStack/asyncpg>`_.
+
+The queries are built in the application context, with the locale of the request set in the
+translated columns, and compiled right away. Since no ``await`` happens meanwhile, the requests
+served concurrently by the event loop do not interfere with each other.
+"""
+import asyncio
+import itertools
+import re
+import time
+from contextlib import contextmanager
+from operator import getitem
+from typing import List, Optional, Tuple
+
+import asyncpg
+from flask import Flask
+from lccs_db.models import ClassMapping, LucClass, LucClassificationSystem
+from lccs_db.models.base import translation_hybrid
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from werkzeug.exceptions import NotFound
+
+from . import data
+from .instrumentation import record_statement
+from .serializers import (class_mapping_serializer, class_serializer,
+                          classification_system_serializer)
+
+_DIALECT = postgresql.dialect(paramstyle='numeric')
+
+_NUMERIC_PARAMETER = re.compile(r'(?<![:\w]):(\d+)')
+
+
+def compile_query(query) -> Tuple[str, list]:
+    """Compile a query to the SQL and the positional parameters of asyncpg.
+
+    :param query: A :class:`sqlalchemy.orm.Query` or a SQL expression.
+    """
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=_DIALECT)
+
+    sql = _NUMERIC_PARAMETER.sub(r'$\1', compiled.string)
+
+    return sql, [compiled.params[name] for name in compiled.positiontup]
+
+
+def _dsn(uri: str) -> str:
+    """Return the asyncpg DSN of a SQLAlchemy database URI."""
+    return re.sub(r'^postgres(ql)?(\+\w+)?://', 'postgresql://', uri)
+
+
+class AsyncDatabase:
+    """Asynchronous access to the classification systems.
+
+    The connections are kept in one asyncpg pool per database. When read replicas are configured,
+    see ``LCCS_REPLICA_URIS``, the queries are sent to the replicas in round-robin, otherwise to
+    the primary database.
+
+    :param app: The Flask application, used to build the queries.
+    :type app: flask.Flask
+    """
+
+    def __init__(self, app: Flask):
+        """Build the database access. The pools are created by :meth:`connect`."""
+        self.app = app
+        self.uris = app.config['LCCS_REPLICA_URIS'] or [app.config['SQLALCHEMY_DATABASE_URI']]
+        self.min_size = app.config['LCCS_ASYNC_POOL_MIN_SIZE']
+        self.max_size = app.config['LCCS_ASYNC_POOL_MAX_SIZE']
+        self._pools: List[asyncpg.pool.Pool] = []
+        self._counter = itertools.count()
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        """Create the connection pools, if not created yet."""
+        async with self._lock:
+            if self._pools:
+                return
+
+            self._pools = [
+                await asyncpg.create_pool(dsn=_dsn(uri), min_size=self.min_size, max_size=self.max_size)
+                for uri in self.uris
+            ]
+
+    async def close(self):
+        """Close the connection pools."""
+        pools, self._pools = self._pools, []
+
+        await asyncio.gather(*(pool.close() for pool in pools))
+
+    @contextmanager
+    def _building(self, locale: Optional[str] = None):
+        """Set the context to build queries: the application context and the locale of the translated columns."""
+        with self.app.app_context():
+            previous = translation_hybrid.current_locale
+
+            if locale is not None:
+                translation_hybrid.current_locale = locale
+
+            try:
+                yield
+            finally:
+                translation_hybrid.current_locale = previous
+
+    def compile(self, build, locale: Optional[str] = None) -> Tuple[str, list]:
+        """Build and compile a query.
+
+        :param build: Function that returns the query.
+        :param locale: The locale of the translated columns. Use ``None`` to keep the current locale.
+        :type locale: string
+        """
+        with self._building(locale):
+            return compile_query(build())
+
+    async def fetch(self, statement: Tuple[str, list]) -> List[asyncpg.Record]:
+        """Execute a compiled statement and return all rows."""
+        if not self._pools:
+            await self.connect()
+
+        pool = self._pools[next(self._counter) % len(self._pools)]
+
+        sql, params = statement
+
+        async with pool.acquire() as connection:
+            started_at = time.perf_counter()
+            rows = await connection.fetch(sql, *params)
+
+        record_statement(sql, params, time.perf_counter() - started_at)
+
+        return rows
+
+    async def fetchrow(self, statement: Tuple[str, list]) -> Optional[asyncpg.Record]:
+        """Execute a compiled statement and return the first row."""
+        rows = await self.fetch(statement)
+
+        return rows[0] if rows else None
+
+    async def get_classification_system_key(self, system_id_or_identifier: str) -> data.SystemKey:
+        """Return the key of a classification system, see :func:`lccs_ws.data._get_classification_system`."""
+        system = data._identifiers_cache.get(data._lookup_key('system', system_id_or_identifier))
+
+        if system is None:
+            row = await self.fetchrow(self.compile(lambda: data._system_key_query(system_id_or_identifier)))
+
+            if row is None:
+                raise NotFound()
+
+            system = data._cache_system_key(data.SystemKey(*row))
+
+        return system
+
+    async def _version(self, queries) -> str:
+        """Return the content version of the given queries."""
+        rows = await self.fetch(self.compile(lambda: data._content_version_query(*queries())))
+
+        return data._format_version([tuple(row) for row in rows])
+
+    async def get_systems_version(self) -> str:
+        """Return the content version of the classification systems list."""
+        return await self._version(lambda: [data._systems_version_query()])
+
+    async def get_system_version(self, *systems_id_or_identifier: str) -> str:
+        """Return the content version of classification systems, see :func:`lccs_ws.data.get_system_version`."""
+        systems_id = [(await self.get_classification_system_key(system)).id for system in systems_id_or_identifier]
+
+        return await self._version(lambda: data._system_version_queries(systems_id))
+
+    async def get_classification_systems(self, locale: Optional[str] = None) -> List[dict]:
+        """Retrieve all classification systems available in service."""
+        rows = await self.fetch(self.compile(data._classification_systems_query, locale))
+
+        return classification_system_serializer.dump_records(rows)
+
+    async def get_classification_system(self, system_id_or_identifier: str, locale: Optional[str] = None) -> dict:
+        """Retrieve information for a given classification system."""
+        system = await self.get_classification_system_key(system_id_or_identifier)
+
+        row = await self.fetchrow(self.compile(
+            lambda: data._classification_systems_query().filter(LucClassificationSystem.id == system.id), locale
+        ))
+
+        if row is None:
+            raise NotFound()
+
+        return classification_system_serializer.dump_records([row])[0]
+
+    async def _page(self, build, keys: list, limit: Optional[int], cursor: Optional[str], count: bool,
+                    locale: Optional[str] = None) -> Tuple[list, Optional[str], Optional[int]]:
+        """Read a page of a query, see :func:`lccs_ws.data._paginate`."""
+        total = None
+
+        if count:
+            total = (await self.fetchrow(self.compile(
+                lambda: select([func.count()]).select_from(build().order_by(None).subquery()), locale
+            )))[0]
+
+        rows = await self.fetch(self.compile(lambda: data._page_query(build(), keys, limit, cursor), locale))
+
+        return data._page_rows(rows, keys, limit, getter=getitem) + (total,)
+
+    async def get_classification_system_classes(self, system_id_or_identifier: str, limit: int = None,
+                                                cursor: str = None, count: bool = False,
+                                                locale: Optional[str] = None) -> Tuple[int, data.Page]:
+        """Retrieve a page of classes of a classification system."""
+        system = await self.get_classification_system_key(system_id_or_identifier)
+
+        classes, next_cursor, total = await self._page(lambda: data._classes_query(system.id),
+                                                       [LucClass.id], limit, cursor, count, locale)
+
+        return system.id, data.Page(class_serializer.dump_records(classes), next_cursor, total)
+
+    async def get_classification_system_class(self, system_id_or_identifier: str, class_id_or_name: str,
+                                              locale: Optional[str] = None) -> Tuple[int, dict]:
+        """Retrieve information for a given class."""
+        system = await self.get_classification_system_key(system_id_or_identifier)
+
+        row = await self.fetchrow(self.compile(lambda: data._class_query(system.id, class_id_or_name), locale))
+
+        if row is None:
+            raise NotFound()
+
+        return system.id, class_serializer.dump_records([row])[0]
+
+    async def get_mappings(self, system_id_or_identifier: str) -> Tuple[data.SystemKey, List[int]]:
+        """Return the source classification system and the ids of the systems mapped from it."""
+        system = await self.get_classification_system_key(system_id_or_identifier)
+
+        rows = await self.fetch(self.compile(lambda: data._mapping_targets_query(system.id)))
+
+        return system, [row['id'] for row in rows]
+
+    async def get_mapping(self, system_id_or_identifier_source: str, system_id_or_identifier_target: str,
+                          limit: int = None, cursor: str = None, count: bool = False) -> Tuple[int, int, data.Page]:
+        """Return a page of the classes mapping between the classification systems."""
+        system_source = await self.get_classification_system_key(system_id_or_identifier_source)
+        system_target = await self.get_classification_system_key(system_id_or_identifier_target)
+
+        keys = [ClassMapping.source_class_id, ClassMapping.target_class_id]
+
+        mappings, next_cursor, total = await self._page(
+            lambda: data._mappings_query(system_source.id, system_target.id), keys, limit, cursor, count
+        )
+
+        return system_source.id, system_target.id, data.Page(class_mapping_serializer.dump_records(mappings),
+                                                             next_cursor, total)
@@ -0,0 +1,303 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Authentication layer of Land Cover Classification System Web Service.
+
+The access tokens are validated by :func:`bdc_auth_client.decorators.oauth2`, which keeps the
+validated tokens in ``bdc_auth_client.decorators.token_cache``. That cache lives in the memory of
+each process, so every worker of a server validates the same token against the authorization
+server. :func:`init_auth` replaces it with a :class:`TokenCache`, a SQLite file shared by all the
+workers of the host.
+
+The :func:`oauth2` decorator of this module must be used by the views. It skips the token
+validation when the authentication is optional and the request has no token.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections.abc import MutableMapping
+from functools import wraps
+from typing import Iterator, List, Optional
+
+import bdc_auth_client.decorators
+from bdc_auth_client.decorators import oauth2 as _client_oauth2
+from flask import Flask, g, request
+
+from . import tracing
+
+TOKEN_HEADERS = ('x-api-key', 'authorization')
+"""Request headers which carry an access token."""
+
+DEFAULT_CACHE_NAME = 'lccs-ws-tokens.sqlite3'
+"""Name of the token cache in the instance folder of the application, its default location."""
+
+
+class TokenCache(MutableMapping):
+    """Cache of the validated access tokens, shared by the processes of a host through a SQLite file.
+
+    The cache is a mapping from the access token to the validation result returned by the
+    authorization server. The tokens are stored as their SHA-256 digest, never in clear text. An
+    entry expires after ``ttl`` seconds or at the expiration time of the token (``exp``), if sooner.
+
+    The hits and misses are counted per process. The SQLite file must belong to the user of the
+    service and must not be accessible by the other users, see :meth:`check`.
+
+    :param path: The location of the SQLite file.
+    :type path: string
+    :param ttl: The time, in seconds, an entry is kept.
+    :type ttl: float
+    :param max_size: The maximum number of entries. The entries closest to expire are dropped first.
+    :type max_size: int
+    """
+
+    def __init__(self, path: str, ttl: float, max_size: int):
+        """Build the cache. The SQLite file is created on the first access."""
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        """Return the digest of a token."""
+        return hashlib.sha256(str(token).encode()).hexdigest()
+
+    def check(self):
+        """Create the SQLite file, private to the current user, or check that the existing file is private.
+
+        The entries have the roles of the users: a file written by another user could grant any role
+        to any token.
+
+        :raises PermissionError: When the file, or its journal, is not a regular file of the current
+            user or may be read or written by the group or the other users.
+        """
+        try:
+            os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_NOFOLLOW', 0), 0o600))
+        except FileExistsError:
+            pass
+
+        for path in (self.path, f'{self.path}-wal', f'{self.path}-shm'):
+            try:
+                info = os.lstat(path)
+            except FileNotFoundError:
+                continue
+
+            if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+                raise PermissionError(f'Token cache {path} must be a regular file of the current user, '
+                                      f'without access for the group and the other users.')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread, opened after any fork of the process."""
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None or self._local.pid != os.getpid():
+            self.check()
+
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS tokens '
+                               '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def __getitem__(self, token: str):
+        """Return the validation result of a token or raise :class:`KeyError`."""
+        row = self._connection().execute('SELECT value FROM tokens WHERE key = ? AND expires_at > ?',
+                                         (self._key(token), time.time())).fetchone()
+
+        self._count(row is not None)
+
+        if row is None:
+            raise KeyError(token)
+
+        return json.loads(row[0])
+
+    def __setitem__(self, token: str, value):
+        """Store the validation result of a token."""
+        expires_at = time.time() + self.ttl
+
+        if isinstance(value, dict) and isinstance(value.get('exp'), (int, float)):
+            expires_at = min(expires_at, value['exp'])
+
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO tokens (key, value, expires_at) VALUES (?, ?, ?)',
+                           (self._key(token), json.dumps(value), expires_at))
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 100 == 0
+
+        if prune:
+            self.prune()
+
+    def __delitem__(self, token: str):
+        """Remove a token."""
+        cursor = self._connection().execute('DELETE FROM tokens WHERE key = ?', (self._key(token),))
+
+        if not cursor.rowcount:
+            raise KeyError(token)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the digests of the valid tokens."""
+        rows = self._connection().execute('SELECT key FROM tokens WHERE expires_at > ?', (time.time(),))
+
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        """Return the number of valid tokens."""
+        return self._connection().execute('SELECT count(*) FROM tokens WHERE expires_at > ?',
+                                          (time.time(),)).fetchone()[0]
+
+    def __contains__(self, token) -> bool:
+        """Tell if a token is cached, without counting a hit or a miss."""
+        return self._connection().execute('SELECT 1 FROM tokens WHERE key = ? AND expires_at > ?',
+                                          (self._key(token), time.time())).fetchone() is not None
+
+    def clear(self):
+        """Remove all tokens."""
+        self._connection().execute('DELETE FROM tokens')
+
+    def prune(self):
+        """Remove the expired tokens and the tokens beyond ``max_size``."""
+        connection = self._connection()
+        connection.execute('DELETE FROM tokens WHERE expires_at <= ?', (time.time(),))
+        connection.execute('DELETE FROM tokens WHERE key IN '
+                           '(SELECT key FROM tokens ORDER BY expires_at DESC LIMIT -1 OFFSET ?)', (self.max_size,))
+
+    def statistics(self) -> dict:
+        """Return the counters of the current process and the number of tokens cached."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+        return dict(
+            hits=hits,
+            misses=misses,
+            hit_ratio=hits / (hits + misses) if hits + misses else 0.0,
+            size=len(self),
+        )
+
+
+def has_token() -> bool:
+    """Tell if the current request carries an access token."""
+    return 'access_token' in request.args or any(header in request.headers for header in TOKEN_HEADERS)
+
+
+def oauth2(roles: Optional[List] = None, required: bool = True, throw_exception: bool = True):
+    """Protect a view, see :func:`bdc_auth_client.decorators.oauth2`.
+
+    When the authentication is optional, i.e. ``required=False``, the requests without a token are
+    served right away, without going through the authorization client. The validation of the
+    tokens is traced in an ``oauth2`` span, see :mod:`lccs_ws.tracing`.
+
+    :param roles: The roles required to access the view.
+    :type roles: list
+    :param required: The access token is required.
+    :type required: bool
+    :param throw_exception: Abort the request when the token is invalid.
+    :type throw_exception: bool
+    """
+    def _oauth2(func):
+        @wraps(func)
+        def authorized(*args, **kwargs):
+            # The token is valid: the validation span ends where the view starts.
+            tracing.end_span(g.pop('lccs_ws_auth_span', None))
+            return func(*args, **kwargs)
+
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            if not required and not has_token():
+                return func(*args, **kwargs)
+
+            # The authorization client is looked up on each request rather than when the views are
+            # declared, so that it may be replaced once the application is created, e.g. by the tests.
+            protected = _client_oauth2(roles=roles, required=required, throw_exception=throw_exception)(authorized)
+
+            if tracing.tracer is None:
+                return protected(*args, **kwargs)
+
+            g.lccs_ws_auth_span = tracing.start_span('oauth2', required=required)
+
+            try:
+                return protected(*args, **kwargs)
+            except Exception as e:
+                tracing.end_span(g.pop('lccs_ws_auth_span', None), e)
+                raise
+            finally:
+                tracing.end_span(g.pop('lccs_ws_auth_span', None))
+
+        return wrapped
+
+    return _oauth2
+
+
+def init_auth(app: Flask):
+    """Share the cache of the validated tokens among the processes, if ``LCCS_AUTH_CACHE`` is enabled.
+
+    The cache is stored in ``LCCS_AUTH_CACHE_PATH`` or, by default, in the instance folder of the
+    application, created readable by the current user only.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    if not app.config['LCCS_AUTH_CACHE']:
+        return
+
+    path = app.config['LCCS_AUTH_CACHE_PATH']
+
+    if not path:
+        os.makedirs(app.instance_path, mode=0o700, exist_ok=True)
+        path = os.path.join(app.instance_path, DEFAULT_CACHE_NAME)
+
+    cache = TokenCache(path,
+                       ttl=app.config['LCCS_AUTH_CACHE_TTL'],
+                       max_size=app.config['LCCS_AUTH_CACHE_MAX_SIZE'])
+    # Fail at the start of the service rather than at the first authenticated request.
+    cache.check()
+
+    app.extensions['lccs_ws_token_cache'] = cache
+
+    bdc_auth_client.decorators.token_cache = cache
+
+
+def auth_status(app: Flask) -> Optional[dict]:
+    """Return the statistics of the token cache or ``None`` when it is disabled.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    cache = app.extensions.get('lccs_ws_token_cache')
+
+    return cache.statistics() if cache is not None else None
@@ -0,0 +1,286 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Process-local caches of Land Cover Classification System Web Service."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+
+class LRUCache:
+    """Bounded cache with least recently used eviction and time to live expiration.
+
+    The cache is local to the process and safe to be shared between threads.
+
+    :param maxsize: The maximum number of entries. Use ``0`` to disable the cache.
+    :type maxsize: int
+    :param ttl: The time to live of an entry in seconds.
+    :type ttl: float
+    :param name: The cache name, used to report statistics.
+    :type name: string
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = None):
+        """Build an empty cache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including the expired ones not evicted yet."""
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value of a key or ``default`` when it is not cached or has expired."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries when the cache is full."""
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the value of a key, computing and storing it with ``factory`` on a miss."""
+        value = self.get(key)
+
+        if value is None:
+            value = factory()
+            self.set(key, value)
+
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        """Remove a key from cache."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+        return default if entry is None else entry[1]
+
+    def discard(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove the entries matching a predicate.
+
+        :param predicate: Function called with the key and the value of each entry.
+        :returns: The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+
+            for key in keys:
+                del self._entries[key]
+
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class TaggedCache:
+    """Cache bounded by the total size of its values, with expiration and invalidation by tag.
+
+    The least recently used entries are evicted first. Each entry is stored with its size, in
+    bytes, and a set of tags, e.g. the ids of the records used to build the value, so the entries
+    depending on a record are removed at once with :meth:`invalidate`. An entry larger than a
+    quarter of the cache is not stored.
+
+    Each invalidation increments the :meth:`generation` of the cache. A value computed while one of
+    its tags was invalidated may be stale, so :meth:`set` skips it when given the generation read
+    before the value was computed.
+
+    The cache is local to the process and safe to be shared between threads.
+
+    :param max_bytes: The maximum total size of the values. Use ``0`` to disable the cache.
+    :type max_bytes: int
+    :param ttl: The time to live of an entry in seconds.
+    :type ttl: float
+    :param name: The cache name, used to report statistics.
+    :type name: string
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, name: str = None):
+        """Build an empty cache."""
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._tags = dict()
+        self._generation = 0
+        self._invalidated = dict()
+        self._cleared = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including the expired ones not evicted yet."""
+        return len(self._entries)
+
+    def configure(self, max_bytes: int, ttl: float):
+        """Change the size and the time to live of the cache, removing all entries."""
+        self.clear()
+
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.ttl = ttl
+
+    def generation(self) -> int:
+        """Return the number of invalidations so far, to be given to :meth:`set`."""
+        with self._lock:
+            return self._generation
+
+    def _changed_since(self, generation: int, tags: frozenset) -> bool:
+        """Tell if the cache was cleared or any tag invalidated after a generation.
+
+        Must be called with the lock held.
+        """
+        return self._cleared > generation or any(self._invalidated.get(tag, 0) > generation for tag in tags)
+
+    def _remove(self, key: Hashable):
+        """Remove an entry and its tags. Must be called with the lock held."""
+        _, _, size, tags = self._entries.pop(key)
+        self.size -= size
+
+        for tag in tags:
+            keys = self._tags.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value of a key or ``default`` when it is not cached or has expired."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, size: int, tags: Iterable[Hashable] = (), generation: int = None):
+        """Store a value, evicting the least recently used entries until the values fit in the cache.
+
+        :param key: The entry key.
+        :param value: The entry value.
+        :param size: The size of the value, in bytes.
+        :type size: int
+        :param tags: The tags of the entry, see :meth:`invalidate`.
+        :param generation: The :meth:`generation` read before computing the value. The value is not
+            stored when the cache was cleared or one of its tags invalidated since then.
+        :type generation: int
+        """
+        if size > self.max_bytes // 4:
+            return
+
+        tags = frozenset(tags)
+
+        with self._lock:
+            if generation is not None and self._changed_since(generation, tags):
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl, value, size, tags)
+            self.size += size
+
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags: Hashable) -> int:
+        """Remove the entries with any of the given tags.
+
+        :returns: The number of removed entries.
+        """
+        with self._lock:
+            self._generation += 1
+            keys = set()
+
+            for tag in tags:
+                self._invalidated[tag] = self._generation
+                keys.update(self._tags.get(tag, ()))
+
+            for key in keys:
+                self._remove(key)
+
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.size = 0
+            self._generation += 1
+            self._cleared = self._generation
+            # The values computed before are skipped anyway.
+            self._invalidated.clear()
+
+    def statistics(self) -> dict:
+        """Return the counters of the cache, its number of entries and the size of its values."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+            return dict(
+                hits=hits,
+                misses=misses,
+                hit_ratio=hits / (hits + misses) if hits + misses else 0.0,
+                entries=len(self._entries),
+                size=self.size,
+                max_size=self.max_bytes,
+            )
@@ -18,8 +18,10 @@
 
 """CLI interface for the LCCS Web Service."""
 
+import time
+
 import click
-from flask.cli import FlaskGroup
+from flask.cli import FlaskGroup, with_appcontext
 
 from . import create_app as _create_app
 
@@ -28,3 +30,56 @@ from . import create_app as _create_app
 @click.version_option()
 def cli():
     """Create Flask application."""
+
+
+@cli.command()
+@click.option('--name', default='synthetic', show_default=True,
+              help='Prefix of the classification systems and name of the style format.')
+@click.option('--systems', type=click.IntRange(min=1), default=2, show_default=True,
+              help='Number of classification systems.')
+@click.option('--classes', type=click.IntRange(min=1), default=10000, show_default=True,
+              help='Number of classes of each classification system.')
+@click.option('--depth', type=click.IntRange(min=1), default=5, show_default=True,
+              help='Number of levels of the class hierarchies.')
+@click.option('--fanout', type=click.IntRange(min=1), default=4, show_default=True,
+              help='Average number of children of a class.')
+@click.option('--mappings', type=click.IntRange(min=0), default=100000, show_default=True,
+              help='Number of mappings of each pair of classification systems.')
+@click.option('--languages', default='en,pt-br', show_default=True,
+              help='Comma-separated languages of the titles and descriptions.')
+@click.option('--style-size', type=click.IntRange(min=0), default=4 * 1024 * 1024, show_default=True,
+              help='Size, in bytes, of the style of each classification system.')
+@click.option('--replace', is_flag=True, help='Remove an existing data set of the same name first.')
+@with_appcontext
+def generate(name, systems, classes, depth, fanout, mappings, languages, style_size, replace):
+    """Create a synthetic catalog of classification systems, mappings and styles."""
+    from .synthetic import generate as _generate
+    from .synthetic import remove as _remove
+
+    if replace:
+        _remove(name)
+
+    start = time.perf_counter()
+
+    dataset = _generate(name, systems=systems, classes=classes, depth=depth, fanout=fanout, mappings=mappings,
+                        languages=[language.strip() for language in languages.split(',') if language.strip()],
+                        style_size=style_size)
+
+    elapsed = time.perf_counter() - start
+
+    click.secho(f'Created {len(dataset.systems_id)} classification systems ({name}-0 to '
+                f'{name}-{len(dataset.systems_id) - 1}) with {dataset.classes} classes each, '
+                f'{dataset.mappings} mappings and style format {name} in {elapsed:.2f}s.', fg='green')
+
+
+@cli.command('remove-synthetic')
+@click.option('--name', default='synthetic', show_default=True, help='Name given to the generate command.')
+@with_appcontext
+def remove_synthetic(name):
+    """Remove a synthetic catalog created by the generate command."""
+    from .synthetic import remove as _remove
+
+    deleted = _remove(name)
+
+    click.secho(', '.join(f'{count} {table}' for table, count in sorted(deleted.items())) or 'Nothing to remove.',
+                fg='green')
@@ -18,23 +18,70 @@
 """Data module of Land Cover Classification System Web Service."""
 
 import json
+from collections import Counter
+from datetime import datetime, timezone
 from io import BytesIO
-from typing import Dict, List, Tuple, Union
+from typing import (Any, Dict, Iterator, List, NamedTuple, Optional, Tuple,
+                    Union)
 
 from flask import abort
 from lccs_db.models import (ClassMapping, LucClass, LucClassificationSystem,
                             StyleFormats, Styles, db)
 from lccs_db.utils import get_extension, get_mimetype
-from sqlalchemy import and_, distinct
+from sqlalchemy import and_, func, or_, select, tuple_
 from sqlalchemy.orm.util import aliased
 from werkzeug.datastructures import FileStorage
 
+from .cache import LRUCache
+from .config import Config
 from .forms import (ClassesMappingSchema, ClassesSchema,
                     ClassificationSystemSchema, StyleFormatsSchema)
+from .invalidation import publish
+from .response_cache import invalidate
+from .routing import pin_to_primary
+from .serializers import (class_mapping_serializer, class_serializer,
+                          classification_system_serializer)
 
 
-def _get_classification_system(system_id_or_identifier: str) -> LucClassificationSystem:
-    """Return the classification system matching search criteria.
+class SystemKey(NamedTuple):
+    """Primary key and immutable attributes of a classification system."""
+
+    id: int
+    identifier: str
+    name: str
+    version: str
+
+
+class StyleFormatKey(NamedTuple):
+    """Primary key and immutable attributes of a style format."""
+
+    id: int
+    name: str
+
+
+class Page(NamedTuple):
+    """A page of a keyset paginated listing."""
+
+    items: list
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+_identifiers_cache = LRUCache(maxsize=Config.LCCS_IDENTIFIER_CACHE_SIZE,
+                              ttl=Config.LCCS_IDENTIFIER_CACHE_TTL,
+                              name='identifiers')
+
+
+def _lookup_key(kind: str, id_or_name: str) -> Tuple[str, str, Union[int, str]]:
+    """Return the cache key of an id or a name/identifier."""
+    try:
+        return kind, 'id', int(id_or_name)
+    except ValueError:
+        return kind, 'name', id_or_name
+
+
+def _query_classification_system(system_id_or_identifier: str) -> LucClassificationSystem:
+    """Return the classification system model matching search criteria.
 
     :param system_id_or_identifier: The id or identifier of a classification system
     :type system_id_or_identifier: string
@@ -50,10 +97,44 @@ def _get_classification_system(system_id_or_identifier: str) -> LucClassificatio
     return system
 
 
-def _get_style_format(style_format_id_or_name: str) -> StyleFormats:
-    """Return the style format matching search criteria.
+def _get_classification_system(system_id_or_identifier: str) -> SystemKey:
+    """Return the key of the classification system matching search criteria.
+
+    The keys are kept in a process-local cache, see ``LCCS_IDENTIFIER_CACHE_SIZE``.
+
+    :param system_id_or_identifier: The id or identifier of a classification system
+    :type system_id_or_identifier: string
+    """
+    system = _identifiers_cache.get(_lookup_key('system', system_id_or_identifier))
+
+    if system is None:
+        system = _cache_system_key(SystemKey(*_system_key_query(system_id_or_identifier).first_or_404()))
+
+    return system
+
+
+def _system_key_query(system_id_or_identifier: str):
+    """Return the query of the key of a classification system."""
+    key = _lookup_key('system', system_id_or_identifier)
+    column = LucClassificationSystem.id if key[1] == 'id' else LucClassificationSystem.identifier
+
+    return db.session.query(LucClassificationSystem.id, LucClassificationSystem.identifier,
+                            LucClassificationSystem.name, LucClassificationSystem.version) \
+        .filter(column == key[2])
+
+
+def _cache_system_key(system: SystemKey) -> SystemKey:
+    """Store the key of a classification system by id and by identifier."""
+    _identifiers_cache.set(('system', 'id', system.id), system)
+    _identifiers_cache.set(('system', 'name', system.identifier), system)
+
+    return system
+
+
+def _query_style_format(style_format_id_or_name: str) -> StyleFormats:
+    """Return the style format model matching search criteria.
 
-    :param style_format_id_or_name: The id or identifier of a classification system
+    :param style_format_id_or_name: The id or name of a style format
     :type style_format_id_or_name: string
     """
     try:
@@ -67,19 +148,256 @@ def _get_style_format(style_format_id_or_name: str) -> StyleFormats:
     return style
 
 
+def _get_style_format(style_format_id_or_name: str) -> StyleFormatKey:
+    """Return the key of the style format matching search criteria.
+
+    The keys are kept in a process-local cache, see ``LCCS_IDENTIFIER_CACHE_SIZE``.
+
+    :param style_format_id_or_name: The id or name of a style format
+    :type style_format_id_or_name: string
+    """
+    key = _lookup_key('style_format', style_format_id_or_name)
+    style_format = _identifiers_cache.get(key)
+
+    if style_format is None:
+        model = _query_style_format(style_format_id_or_name)
+        style_format = StyleFormatKey(id=model.id, name=model.name)
+
+        _identifiers_cache.set(('style_format', 'id', style_format.id), style_format)
+        _identifiers_cache.set(('style_format', 'name', style_format.name), style_format)
+
+    return style_format
+
+
+def _forget(kind: str, entity_id: int):
+    """Remove the cached keys of a classification system or style format."""
+    _identifiers_cache.discard(lambda key, value: key[0] == kind and value.id == entity_id)
+
+
+def system_tags(*systems_id_or_identifier: str) -> List[tuple]:
+    """Return the tags of the cached responses of classification systems, see :mod:`lccs_ws.response_cache`.
+
+    :param systems_id_or_identifier: The id or identifier of the classification systems
+    :type systems_id_or_identifier: string
+    """
+    return [('system', _get_classification_system(system).id) for system in systems_id_or_identifier]
+
+
+def style_format_tags(style_format_id_or_name: str) -> List[tuple]:
+    """Return the tags of the cached responses of a style format, see :mod:`lccs_ws.response_cache`.
+
+    :param style_format_id_or_name: The id or name of a style format
+    :type style_format_id_or_name: string
+    """
+    return [('style_format', _get_style_format(style_format_id_or_name).id)]
+
+
+def _changed(*tags: tuple):
+    """Invalidate the cached responses built from the changed records, after a commit.
+
+    The tags are published to the other workers as well, see :mod:`lccs_ws.invalidation`, and
+    their reads go to the primary database until the replicas catch up, see :mod:`lccs_ws.routing`.
+    """
+    pin_to_primary(tags)
+    invalidate(*tags)
+    publish(tags)
+
+
+def _mapped_systems(classes) -> List[int]:
+    """Return the ids of the classification systems with mappings from or to some classes.
+
+    :param classes: The class ids or a subquery of the class ids.
+    """
+    targets = select([ClassMapping.target_class_id]).where(ClassMapping.source_class_id.in_(classes))
+    sources = select([ClassMapping.source_class_id]).where(ClassMapping.target_class_id.in_(classes))
+
+    rows = db.session.query(LucClass.classification_system_id) \
+        .filter(or_(LucClass.id.in_(targets), LucClass.id.in_(sources))) \
+        .distinct()
+
+    return [system_id for system_id, in rows]
+
+
+def _parse_cursor(cursor: str, size: int) -> Tuple[int, ...]:
+    """Decode a pagination cursor made of ``size`` integer keys separated by ``:``."""
+    try:
+        keys = tuple(int(key) for key in cursor.split(':'))
+    except ValueError:
+        keys = ()
+
+    if len(keys) != size:
+        abort(400, f'Invalid cursor {cursor}.')
+
+    return keys
+
+
+def _after_cursor(query, keys: List[Any], cursor: Optional[str] = None):
+    """Order a query by ``keys`` and skip the rows up to the row identified by ``cursor``."""
+    query = query.order_by(*keys)
+
+    if cursor is not None:
+        values = _parse_cursor(cursor, len(keys))
+        query = query.filter(tuple_(*keys) > tuple_(*values) if len(keys) > 1 else keys[0] > values[0])
+
+    return query
+
+
+def _stream(query, keys: List[Any], schema, cursor: Optional[str] = None) -> Iterator[dict]:
+    """Serialize the rows of a query one by one.
+
+    The rows are fetched in batches of ``LCCS_STREAM_BATCH_SIZE`` with a server-side cursor,
+    so the memory used does not depend on the number of rows. The cursor is checked right away,
+    so an invalid one is answered with ``400`` before the response starts.
+
+    :param schema: A :class:`lccs_ws.serializers.RowSerializer`, whose ``iter_dump`` is not traced.
+    """
+    query = _after_cursor(query, keys, cursor).yield_per(Config.LCCS_STREAM_BATCH_SIZE)
+
+    return schema.iter_dump(query)
+
+
+def _paginate(query, keys: List[Any], limit: Optional[int] = None, cursor: Optional[str] = None,
+              count: bool = False) -> Tuple[list, Optional[str], Optional[int]]:
+    """Apply keyset pagination to a query.
+
+    The rows are ordered by ``keys`` and a page starts right after the row identified by ``cursor``.
+    One extra row is fetched to detect if there is a next page.
+
+    :param query: The query to paginate.
+    :param keys: The columns that uniquely identify a row, usually the primary key.
+    :param limit: The maximum number of rows in the page. Use ``None`` to get all rows.
+    :param cursor: The cursor returned with the previous page.
+    :param count: Compute the total number of rows matching the query.
+    :returns: The rows, the cursor of the next page and the total number of rows.
+    """
+    total = query.order_by(None).count() if count else None
+
+    rows = _page_query(query, keys, limit, cursor).all()
+
+    return _page_rows(rows, keys, limit, getter=getattr) + (total,)
+
+
+def _page_query(query, keys: List[Any], limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Return the query of a page, with one extra row to detect if there is a next page."""
+    query = _after_cursor(query, keys, cursor)
+
+    return query if limit is None else query.limit(limit + 1)
+
+
+def _page_rows(rows: list, keys: List[Any], limit: Optional[int], getter=getattr) -> Tuple[list, Optional[str]]:
+    """Return the rows of a page and the cursor of the next page.
+
+    :param getter: Function that returns a value of a row by name, e.g. ``getattr`` or ``operator.getitem``.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+
+    return rows, ':'.join(str(getter(rows[-1], key.key)) for key in keys)
+
+
+def _content_version(*queries) -> str:
+    """Summarize the last update time and the row count of the given queries.
+
+    The queries are executed as a single ``UNION ALL`` statement.
+    Each query must select the maximum ``updated_at`` and the row count of a table.
+    """
+    return _format_version(_content_version_query(*queries).all())
+
+
+def _content_version_query(*queries):
+    """Return the ``UNION ALL`` of the content version queries."""
+    first, *others = queries
+
+    return first.union_all(*others) if others else first
+
+
+def _format_version(rows: List[Tuple[Optional[datetime], int]]) -> str:
+    """Format the rows of a content version query.
+
+    The times with a time zone are converted to UTC, so the version does not depend on the database driver.
+    """
+    def _format_time(value: Optional[datetime]) -> str:
+        if value is None:
+            return ''
+
+        return (value.astimezone(timezone.utc) if value.tzinfo else value).isoformat()
+
+    return ';'.join(f'{_format_time(updated_at)}:{count}' for updated_at, count in rows)
+
+
+def get_systems_version() -> str:
+    """Return the content version of the classification systems list."""
+    return _content_version(_systems_version_query())
+
+
+def _systems_version_query():
+    """Return the content version query of the classification systems list."""
+    return db.session.query(func.max(LucClassificationSystem.updated_at), func.count(LucClassificationSystem.id))
+
+
+def get_style_formats_version() -> str:
+    """Return the content version of the style formats list."""
+    return _content_version(
+        db.session.query(func.max(StyleFormats.updated_at), func.count(StyleFormats.id))
+    )
+
+
+def get_system_version(*systems_id_or_identifier: str, style_formats: bool = False) -> str:
+    """Return the content version of classification systems.
+
+    The version changes whenever the systems, their classes, their mappings or their styles
+    are created, updated or deleted. It is computed with a single query.
+
+    :param systems_id_or_identifier: The id or identifier of the classification systems
+    :type systems_id_or_identifier: string
+    :param style_formats: Include the version of the style formats
+    :type style_formats: bool
+    """
+    systems_id = [_get_classification_system(system).id for system in systems_id_or_identifier]
+
+    return _content_version(*_system_version_queries(systems_id, style_formats=style_formats))
+
+
+def _system_version_queries(systems_id: List[int], style_formats: bool = False) -> list:
+    """Return the content version queries of classification systems, see :func:`get_system_version`."""
+    classes = select([LucClass.id]).where(LucClass.classification_system_id.in_(systems_id))
+
+    queries = [
+        db.session.query(func.max(LucClassificationSystem.updated_at), func.count(LucClassificationSystem.id))
+            .filter(LucClassificationSystem.id.in_(systems_id)),
+        db.session.query(func.max(LucClass.updated_at), func.count(LucClass.id))
+            .filter(LucClass.classification_system_id.in_(systems_id)),
+        # Semi-joins instead of a join on ``source OR target``, which the planner runs as a nested loop.
+        db.session.query(func.max(ClassMapping.updated_at), func.count(ClassMapping.source_class_id))
+            .filter(or_(ClassMapping.source_class_id.in_(classes), ClassMapping.target_class_id.in_(classes))),
+        db.session.query(func.max(Styles.updated_at), func.count(Styles.style_format_id))
+            .filter(Styles.classification_system_id.in_(systems_id)),
+    ]
+
+    if style_formats:
+        queries.append(db.session.query(func.max(StyleFormats.updated_at), func.count(StyleFormats.id)))
+
+    return queries
+
+
 def get_classification_systems() -> List[dict]:
     """Retrieve all classification systems available in service."""
-    system = db.session.query(LucClassificationSystem.id,
-                              LucClassificationSystem.identifier,
-                              LucClassificationSystem.title.label("title"),
-                              LucClassificationSystem.name,
-                              LucClassificationSystem.authority_name,
-                              LucClassificationSystem.version,
-                              LucClassificationSystem.description.label("description"),
-                              LucClassificationSystem.version_successor,
-                              LucClassificationSystem.version_predecessor
-                              ).all()
-    return ClassificationSystemSchema().dump(system, many=True)
+    return classification_system_serializer.dump(_classification_systems_query().all(), many=True)
+
+
+def _classification_systems_query():
+    """Return the query of the classification systems, with the attributes of the listing."""
+    return db.session.query(LucClassificationSystem.id,
+                            LucClassificationSystem.identifier,
+                            LucClassificationSystem.title.label("title"),
+                            LucClassificationSystem.name,
+                            LucClassificationSystem.authority_name,
+                            LucClassificationSystem.version,
+                            LucClassificationSystem.description.label("description"),
+                            LucClassificationSystem.version_successor,
+                            LucClassificationSystem.version_predecessor)
 
 
 def get_classification_system(system_id_or_identifier: str) -> Dict:
@@ -88,19 +406,52 @@ def get_classification_system(system_id_or_identifier: str) -> Dict:
     :param system_id_or_identifier: The id or identifier of a classification system
     :type system_id_or_identifier: string
     """
-    system = _get_classification_system(system_id_or_identifier)
-    return ClassificationSystemSchema(only=("id", "name", "version", "title", "authority_name", "description",
-                                            "version_predecessor", "identifier", "version_successor")).dump(system)
+    system = _query_classification_system(system_id_or_identifier)
+    return classification_system_serializer.dump(system)
 
 
-def get_classification_system_classes(system_id_or_identifier: str) -> Tuple[int, list]:
+def get_classification_system_classes(system_id_or_identifier: str, limit: int = None, cursor: str = None,
+                                      count: bool = False) -> Tuple[int, Page]:
     """Retrieve a list of classes for a given classification system.
 
+    The classes are ordered by id and may be paginated with ``limit`` and ``cursor``.
+
     :param system_id_or_identifier: The id or identifier of a classification system
     :type system_id_or_identifier: string
+    :param limit: The maximum number of classes to return
+    :type limit: int
+    :param cursor: The cursor of the page, as returned in the previous page
+    :type cursor: string
+    :param count: Compute the total number of classes
+    :type count: bool
     """
     system = _get_classification_system(system_id_or_identifier)
 
+    query = _classes_query(system.id)
+
+    classes, next_cursor, total = _paginate(query, [LucClass.id], limit=limit, cursor=cursor, count=count)
+
+    return system.id, Page(class_serializer.dump(classes, many=True), next_cursor, total)
+
+
+def iter_classification_system_classes(system_id_or_identifier: str,
+                                       cursor: str = None) -> Tuple[int, Iterator[dict]]:
+    """Retrieve the classes of a classification system as a stream.
+
+    The classification system is resolved immediately while the classes are read on demand.
+
+    :param system_id_or_identifier: The id or identifier of a classification system
+    :type system_id_or_identifier: string
+    :param cursor: The id of the class after which the stream starts
+    :type cursor: string
+    """
+    system = _get_classification_system(system_id_or_identifier)
+
+    return system.id, _stream(_classes_query(system.id), [LucClass.id], class_serializer, cursor=cursor)
+
+
+def _classes_query(system_id: int):
+    """Return the query of the classes of a classification system."""
     columns = [
         LucClass.id,
         LucClass.name,
@@ -110,12 +461,8 @@ def get_classification_system_classes(system_id_or_identifier: str) -> Tuple[int
         LucClass.class_parent_id,
     ]
 
-    classes = db.session.query(*columns) \
-        .join(LucClassificationSystem, LucClass.classification_system_id == LucClassificationSystem.id) \
-        .filter(LucClassificationSystem.id == system.id) \
-        .all()
-    
-    return system.id, ClassesSchema().dump(classes, many=True)
+    return db.session.query(*columns) \
+        .filter(LucClass.classification_system_id == system_id)
 
 
 def get_classification_system_class(system_id_or_identifier: str, class_id_or_name: str) -> Tuple[int, dict]:
@@ -128,31 +475,19 @@ def get_classification_system_class(system_id_or_identifier: str, class_id_or_na
     """
     system = _get_classification_system(system_id_or_identifier)
 
-    columns = [
-        LucClass.id,
-        LucClass.name,
-        LucClass.title.label("title"),
-        LucClass.code,
-        LucClass.description.label("description"),
-        LucClass.class_parent_id
-    ]
+    class_info = _class_query(system.id, class_id_or_name).first_or_404()
 
-    where = [
-        LucClassificationSystem.id == system.id,
-    ]
+    return system.id, class_serializer.dump(class_info)
 
+
+def _class_query(system_id: int, class_id_or_name: str):
+    """Return the query of a class of a classification system, by id or by name."""
     try:
-        class_id = int(class_id_or_name)
-        where.append(LucClass.id == class_id)
+        where = LucClass.id == int(class_id_or_name)
     except ValueError:
-        where.append(LucClass.name == class_id_or_name)
-    
-    class_info = db.session.query(*columns) \
-        .join(LucClassificationSystem, LucClass.classification_system_id == LucClassificationSystem.id) \
-        .filter(*where) \
-        .first_or_404()
-    
-    return system.id, ClassesSchema().dump(class_info)
+        where = LucClass.name == class_id_or_name
+
+    return _classes_query(system_id).filter(where)
 
 
 def get_style_formats() -> List[dict]:
@@ -225,80 +560,120 @@ def get_classification_system_style(system_id_or_identifier: str, style_format_i
     return file_name, BytesIO(style_file.style)
 
 
-def get_mappings(system_id_or_identifier: str) -> Tuple[LucClassificationSystem, List]:
+def get_mappings(system_id_or_identifier: str) -> Tuple[SystemKey, List]:
     """Return available mapping for a classification system.
 
+    The target classification systems are read in a single query, joining the mappings with
+    the classes of both ends instead of listing the classes of the source system.
+
     :param system_id_or_identifier: identification of a source classification system
     :type system_id_or_identifier: int
+    :returns: The source classification system and the rows, with the ``id`` of each target system.
     """
     system = _get_classification_system(system_id_or_identifier)
 
-    classes_source = db.session.query(LucClass.id) \
-        .filter(LucClass.classification_system_id == system.id) \
-        .all()
-
-    classes_source_ids = [value for (value,) in classes_source]
-    
-    targets_classes = db.session.query(distinct(ClassMapping.target_class_id)) \
-        .filter(ClassMapping.source_class_id.in_(classes_source_ids)) \
-        .all()
+    return system, _mapping_targets_query(system.id).all()
 
-    targets_class_ids = [value for (value,) in targets_classes]
 
-    systems = db.session.query(LucClassificationSystem) \
-        .join(LucClass, LucClass.classification_system_id == LucClassificationSystem.id) \
-        .filter(LucClass.id.in_(targets_class_ids)) \
-        .all()
+def _mapping_targets_query(system_id: int):
+    """Return the query of the ids of the classification systems mapped from a classification system."""
+    source_class = aliased(LucClass)
+    target_class = aliased(LucClass)
 
-    return system, systems
+    return db.session.query(target_class.classification_system_id.label('id')) \
+        .select_from(ClassMapping) \
+        .join(source_class, ClassMapping.source_class_id == source_class.id) \
+        .join(target_class, ClassMapping.target_class_id == target_class.id) \
+        .filter(source_class.classification_system_id == system_id) \
+        .distinct() \
+        .order_by(target_class.classification_system_id)
 
 
-def get_system_mapping(system_id_source: int, system_id_target: int) -> ClassMapping:
+def get_system_mapping(system_id_source: int, system_id_target: int, limit: int = None, cursor: str = None,
+                       count: bool = False) -> Tuple[List[ClassMapping], Optional[str], Optional[int]]:
     """Return a Mapping.
 
+    The mappings are ordered by source and target class and may be paginated with ``limit`` and ``cursor``.
+
     :param system_id_source: identification of a source classification system
     :type system_id_source: int
     :param system_id_target: identification of a target classification system
     :type system_id_target: int
+    :param limit: The maximum number of mappings to return
+    :type limit: int
+    :param cursor: The cursor of the page, as returned in the previous page
+    :type cursor: string
+    :param count: Compute the total number of mappings
+    :type count: bool
     """
-    classes_source = db.session.query(LucClass.id) \
-        .filter(LucClass.classification_system_id == system_id_source) \
-        .all()
+    query = _mappings_query(system_id_source, system_id_target)
 
-    classes_source_ids = [value for (value,) in classes_source]
+    return _paginate(query, [ClassMapping.source_class_id, ClassMapping.target_class_id],
+                     limit=limit, cursor=cursor, count=count)
 
-    classes_target = db.session.query(LucClass.id) \
-        .filter(LucClass.classification_system_id == system_id_target) \
-        .all()
 
-    classes_target_ids = [value for (value,) in classes_target]
-
-    source_alias = aliased(LucClass)
+def _mappings_query(system_id_source: int, system_id_target: int):
+    """Return the query of the mappings between two classification systems.
 
-    mappings = db.session.query(ClassMapping)\
-        .filter(
-            and_(ClassMapping.source_class_id.in_(classes_source_ids), ClassMapping.target_class_id.in_(classes_target_ids)),
-            ClassMapping.source_class_id == source_alias.id,
-            ClassMapping.target_class_id == LucClass.id
-    ).all()
+    Both ends of the mapping are joined with their classes and filtered by classification system,
+    so the query does not depend on the number of classes of each system.
+    """
+    source_class = aliased(LucClass)
+    target_class = aliased(LucClass)
 
-    return mappings
+    return db.session.query(ClassMapping) \
+        .join(source_class, ClassMapping.source_class_id == source_class.id) \
+        .join(target_class, ClassMapping.target_class_id == target_class.id) \
+        .filter(source_class.classification_system_id == system_id_source,
+                target_class.classification_system_id == system_id_target)
 
 
-def get_mapping(system_id_or_identifier_source: str, system_id_or_identifier_target: str) -> Tuple[int, int, list]:
+def get_mapping(system_id_or_identifier_source: str, system_id_or_identifier_target: str, limit: int = None,
+                cursor: str = None, count: bool = False) -> Tuple[int, int, Page]:
     """Return the classes mapping between the classification system.
     
     :param system_id_or_identifier_source: id or identifier of a source classification system
     :type system_id_or_identifier_source: str
     :param system_id_or_identifier_target: id or identifier of a target classification system
     :type system_id_or_identifier_target: str
+    :param limit: The maximum number of mappings to return
+    :type limit: int
+    :param cursor: The cursor of the page, as returned in the previous page
+    :type cursor: string
+    :param count: Compute the total number of mappings
+    :type count: bool
+    """
+    system_source = _get_classification_system(system_id_or_identifier_source)
+    system_target = _get_classification_system(system_id_or_identifier_target)
+
+    mappings, next_cursor, total = get_system_mapping(system_source.id, system_target.id,
+                                                      limit=limit, cursor=cursor, count=count)
+
+    return system_source.id, system_target.id, Page(class_mapping_serializer.dump(mappings, many=True),
+                                                    next_cursor, total)
+
+
+def iter_mapping(system_id_or_identifier_source: str, system_id_or_identifier_target: str,
+                 cursor: str = None) -> Tuple[int, int, Iterator[dict]]:
+    """Return the classes mapping between the classification system as a stream.
+
+    The classification systems are resolved immediately while the mappings are read on demand.
+
+    :param system_id_or_identifier_source: id or identifier of a source classification system
+    :type system_id_or_identifier_source: str
+    :param system_id_or_identifier_target: id or identifier of a target classification system
+    :type system_id_or_identifier_target: str
+    :param cursor: The source and target class ids, separated by ``:``, after which the stream starts
+    :type cursor: string
     """
     system_source = _get_classification_system(system_id_or_identifier_source)
     system_target = _get_classification_system(system_id_or_identifier_target)
 
-    mappings = get_system_mapping(system_source.id, system_target.id)
+    mappings = _stream(_mappings_query(system_source.id, system_target.id),
+                       [ClassMapping.source_class_id, ClassMapping.target_class_id],
+                       class_mapping_serializer, cursor=cursor)
 
-    return system_source.id, system_target.id, ClassesMappingSchema().dump(mappings, many=True)
+    return system_source.id, system_target.id, mappings
 
 
 def classification_system(system_id):
@@ -344,23 +719,54 @@ def create_classification_system(name: str, authority_name: str, version: str, t
     
     db.session.commit()
 
+    _changed(('systems',))
+
     return ClassificationSystemSchema(only=("id", "name", "version", "title", "authority_name", "description",
                                             "version_predecessor", "version_successor")).dump(system)
 
 
-def delete_classification_system(system_id_or_identifier: str) -> None:
+def _system_classes(system_id: int):
+    """Return a subquery with the ids of the classes of a classification system."""
+    return select([LucClass.id]).where(LucClass.classification_system_id == system_id)
+
+
+def _delete(model, *where) -> int:
+    """Delete the rows of a model matching the criteria with a single statement.
+
+    :returns: The number of deleted rows.
+    """
+    return db.session.query(model).filter(*where).delete(synchronize_session=False)
+
+
+def delete_classification_system(system_id_or_identifier: str) -> Dict[str, int]:
     """Delete an classification system by a identifier.
 
+    The mappings, classes and styles of the system are deleted with one statement per table.
+
     :param system_id_or_identifier: The id or identifier of a classification system to be deleted
     :type system_id_or_identifier: string
+    :returns: The number of deleted rows of each table.
     """
     system = _get_classification_system(system_id_or_identifier)
+    classes = _system_classes(system.id)
+    peers = _mapped_systems(classes)
 
     with db.session.begin_nested():
-        db.session.delete(system)
+        deleted = dict(
+            class_mappings=_delete(ClassMapping, or_(ClassMapping.source_class_id.in_(classes),
+                                                     ClassMapping.target_class_id.in_(classes))),
+            styles=_delete(Styles, Styles.classification_system_id == system.id),
+            classes=_delete(LucClass, LucClass.classification_system_id == system.id),
+            classification_systems=_delete(LucClassificationSystem, LucClassificationSystem.id == system.id),
+        )
 
     db.session.commit()
 
+    _forget('system', system.id)
+    _changed(('systems',), *(('system', system_id) for system_id in {system.id, *peers}))
+
+    return deleted
+
 
 def update_classification_system(system_id_or_identifier: str, obj: dict) -> dict:
     """Update an classification system by a given name.
@@ -370,7 +776,7 @@ def update_classification_system(system_id_or_identifier: str, obj: dict) -> dic
     :param obj: Object with classification system information to update
     :type obj: dict
     """
-    system = _get_classification_system(system_id_or_identifier)
+    system = _query_classification_system(system_id_or_identifier)
 
     if 'title' in obj:
         obj['title_translations'] = obj.pop('title')
@@ -384,24 +790,38 @@ def update_classification_system(system_id_or_identifier: str, obj: dict) -> dic
 
     db.session.commit()
 
+    _forget('system', system.id)
+    _changed(('systems',), ('system', system.id))
+
     return ClassificationSystemSchema(only=("id", "name", "version", "title", "authority_name", "description",
                                             "version_predecessor", "version_successor")).dump(system)
 
 
-def delete_classes(system_id_or_identifier: str) -> None:
+def delete_classes(system_id_or_identifier: str) -> Dict[str, int]:
     """Delete all class by a given classification system.
 
+    The classes and their mappings are deleted with one statement per table.
+
     :param system_id_or_identifier: The id or identifier of Classification System.
     :type system_id_or_identifier: string
+    :returns: The number of deleted rows of each table.
     """
     system = _get_classification_system(system_id_or_identifier)
-    classes = db.session.query(LucClass).filter(LucClass.classification_system_id == system.id)
+    classes = _system_classes(system.id)
+    peers = _mapped_systems(classes)
 
     with db.session.begin_nested():
-        for c in classes:
-            db.session.delete(c)
+        deleted = dict(
+            class_mappings=_delete(ClassMapping, or_(ClassMapping.source_class_id.in_(classes),
+                                                     ClassMapping.target_class_id.in_(classes))),
+            classes=_delete(LucClass, LucClass.classification_system_id == system.id),
+        )
     db.session.commit()
 
+    _changed(*(('system', system_id) for system_id in {system.id, *peers}))
+
+    return deleted
+
 
 def delete_class(system_id_or_identifier: str, class_id_or_identifier: str):
     """Delete an class by a given name and classification system."""
@@ -418,12 +838,16 @@ def delete_class(system_id_or_identifier: str, class_id_or_identifier: str):
     class_to_delete = db.session.query(LucClass)\
         .filter(*where)\
         .first_or_404()
+
+    peers = _mapped_systems([class_to_delete.id])
     
     with db.session.begin_nested():
         db.session.delete(class_to_delete)
     
     db.session.commit()
 
+    _changed(*(('system', system_id) for system_id in {system.id, *peers}))
+
 
 def update_class(system_id_or_identifier: int, class_id_or_identifier: int, obj: dict) -> dict:
     """Update an classification system by a given name."""
@@ -453,100 +877,109 @@ def update_class(system_id_or_identifier: int, class_id_or_identifier: int, obj:
     
     db.session.commit()
 
-    return ClassesSchema(only=("id", "name", "title", "code", "class_parent_id",)).dump(system_class)
-
-
-def insert_class(system_id: int, name: str, code: str,
-                 title: dict, description: dict, class_parent_id: str = None) -> int:
-    """Create a new class.
-
-    :param system_id: identifier of classification system.
-    :type system_id: int
+    _changed(('system', system.id))
 
-    :param name: name of a class.
-    :type name: string
-
-    :param code: class code.
-    :type code: string
-
-    :param title: class title.
-    :type title: string
-
-    :param description: class description.
-    :type description: string
-
-    :param class_parent_id: class class_parent_id.
-    :type class_parent_id: integer
-    """
-    system_class = db.session.query(LucClass).filter_by(classification_system_id=system_id, name=name).first()
-    
-    if system_class:
-        abort(409, f'Class already {name} registered in the system!')
-    
-    class_infos = dict(
-        name=name,
-        code=code,
-        title_translations=title,
-        description_translations=description,
-        classification_system_id=system_id,
-        class_parent_id=class_parent_id
-    )
+    return ClassesSchema(only=("id", "name", "title", "code", "class_parent_id",)).dump(system_class)
 
-    system_class = LucClass(**dict(class_infos))
-    
-    db.session.add(system_class)
-    db.session.flush()
 
-    return system_class.id
+_INSERT_BATCH_SIZE = 1000
+"""Maximum number of rows of a multi-row INSERT statement."""
 
 
 def insert_classes(system_id_or_identifier: str, classes_files_json: dict) -> List:
     """Create classes for a given classification system.
 
+    The classes are inserted level by level of the hierarchy, with multi-row
+    ``INSERT ... RETURNING`` statements of at most ``_INSERT_BATCH_SIZE`` rows which
+    resolve the parent ids of the next level. The ``children`` of a class may be
+    nested at any depth.
+
     :param classes_files_json: classes file
     :type classes_files_json: dict
 
     :param system_id_or_identifier: The id or identifier of classification system
     :type system_id_or_identifier: string
+    :returns: The created classes.
     """
     system = _get_classification_system(system_id_or_identifier)
     
     if system is None:
         abort(400, f'Error to add new class Classification System {system_id_or_identifier} not exist')
 
+    _validate_classes_names(system.id, classes_files_json)
+
+    table = LucClass.__table__
+    returning = [
+        LucClass.id,
+        LucClass.name,
+        LucClass.title.label('title'),
+        LucClass.description.label('description'),
+        LucClass.code,
+        LucClass.classification_system_id,
+        LucClass.class_parent_id,
+    ]
+
+    classes = []
+    level = [(None, system_class) for system_class in classes_files_json]
+
     with db.session.begin_nested():
-        for system_class in classes_files_json:
-            _add_classes(system.id, system_class)
+        while level:
+            rows = [
+                dict(name=system_class['name'],
+                     code=system_class['code'],
+                     title_translations=system_class['title'],
+                     description_translations=system_class['description'],
+                     classification_system_id=system.id,
+                     class_parent_id=class_parent_id)
+                for class_parent_id, system_class in level
+            ]
+
+            created = []
+
+            for offset in range(0, len(rows), _INSERT_BATCH_SIZE):
+                created += db.session.execute(
+                    table.insert().values(rows[offset:offset + _INSERT_BATCH_SIZE]).returning(*returning)
+                ).fetchall()
+
+            classes.extend(created)
+
+            ids = {row.name: row.id for row in created}
+
+            level = [
+                (ids[system_class['name']], child)
+                for _, system_class in level
+                for child in system_class.get('children') or []
+            ]
 
     db.session.commit()
 
-    classes = db.session.query(LucClass.id,
-                               LucClass.name,
-                               LucClass.title.label('title'),
-                               LucClass.description.label('description'),
-                               LucClass.code,
-                               LucClass.classification_system_id,
-                               LucClass.class_parent_id)\
-        .filter(LucClass.classification_system_id == system.id)\
-        .all()
-    
+    _changed(('system', system.id))
+
     return classes
 
 
-def _add_classes(system_id: int, classes: dict):
-    """Add class to a classification system."""
-    class_info = dict(name=classes['name'], title=classes['title'],
-                      code=classes['code'], description=classes['description'])
+def _validate_classes_names(system_id: int, classes: List[dict]):
+    """Check that the names of a class hierarchy are unique and not registered in the system."""
+    names = []
+    pending = list(classes)
+
+    while pending:
+        system_class = pending.pop()
+        names.append(system_class['name'])
+        pending.extend(system_class.get('children') or [])
+
+    duplicated = sorted(name for name, total in Counter(names).items() if total > 1)
 
-    class_id = insert_class(system_id, **class_info)
+    if duplicated:
+        abort(409, f'Classes {", ".join(duplicated)} are duplicated!')
 
-    if classes.get('children') is not None:
-        for child in classes['children']:
-            child_info = dict(name=child['name'], title=child['title'],
-                              code=child['code'], description=child['description'],
-                             class_parent_id=class_id)
-            _add_classes(system_id, child_info)
-    return
+    registered = db.session.query(LucClass.name) \
+        .filter(LucClass.classification_system_id == system_id,
+                LucClass.name.in_(names)) \
+        .all()
+
+    if registered:
+        abort(409, f'Classes {", ".join(sorted(name for (name,) in registered))} already registered in the system!')
 
 
 def insert_file(system_id_or_identifier: str, style_format_id_or_name: str, file: FileStorage) -> Union[int, int]:
@@ -573,6 +1006,8 @@ def insert_file(system_id_or_identifier: str, style_format_id_or_name: str, file
 
         db.session.add(style)
     db.session.commit()
+
+    _changed(('system', system.id))
     
     return system.id, style_format.id
 
@@ -604,61 +1039,70 @@ def update_file(style_format_id_or_name: str, system_id_or_identifier: str, file
         style.mime_type = mime_type
     
     db.session.commit()
+
+    _changed(('system', system.id))
     
     return system.id, style_format.id
 
 
-def delete_file(style_format_id_or_name: str, system_id_or_identifier: str) -> None:
+def delete_file(style_format_id_or_name: str, system_id_or_identifier: str) -> Dict[str, int]:
     """Delete a style from a classification system.
 
     :param style_format_id_or_name: The id or name of style format
     :type style_format_id_or_name: string
     :param system_id_or_identifier: The id or identification of classification system
     :type system_id_or_identifier: string
+    :returns: The number of deleted rows of each table.
     """
     system = _get_classification_system(system_id_or_identifier)
     style_format = _get_style_format(style_format_id_or_name)
 
-    style = db.session.query(Styles) \
-        .filter(Styles.classification_system_id == system.id,
-                Styles.style_format_id == style_format.id) \
-        .first_or_404()
-
     with db.session.begin_nested():
-        db.session.delete(style)
+        deleted = dict(styles=_delete(Styles,
+                                      Styles.classification_system_id == system.id,
+                                      Styles.style_format_id == style_format.id))
+
+    if not deleted['styles']:
+        abort(404, 'Style File not found.')
     
     db.session.commit()
 
+    _changed(('system', system.id))
 
-def insert_mapping(system_id_source: int, system_id_target: int, target_class: str, source_class: str, description,
-                   degree_of_similarity) -> None:
-    """Insert mapping."""
-    target_class_alias = aliased(LucClass)
+    return deleted
 
-    try:
-        class_id_source = int(source_class)
-        class_id_target = int(target_class)
-        where = [target_class_alias.id == class_id_target,
-                 LucClass.id == class_id_source]
-    except ValueError:
-        where = [target_class_alias.name == source_class,
-                 LucClass.id == target_class]
-    where.append(and_(LucClass.classification_system_id == system_id_source, target_class_alias.classification_system_id == system_id_target))
 
-    class_mappings = db.session.query(LucClass, target_class_alias). \
-        filter(*where) \
-        .first_or_404()
+def _resolve_classes(references: Dict[int, List[Union[int, str]]]) -> Dict[Tuple[int, str], int]:
+    """Resolve class ids or names of several classification systems with a single query.
 
-    mapping_infos = dict(
-        source_class_id=class_mappings[0].id,
-        target_class_id=class_mappings[1].id,
-        description=description,
-        degree_of_similarity=degree_of_similarity
-    )
-    
-    mapping = ClassMapping(**dict(mapping_infos))
-    
-    db.session.add(mapping)
+    :param references: The class ids or names referenced in each classification system id.
+    :returns: The class id of each resolved ``(system id, reference)`` pair, with the reference as string.
+    """
+    where = []
+
+    for system_id, values in references.items():
+        ids, names = set(), set()
+
+        for value in values:
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                names.add(str(value))
+
+        where.append(and_(LucClass.classification_system_id == system_id,
+                          or_(LucClass.id.in_(ids), LucClass.name.in_(names))))
+
+    rows = db.session.query(LucClass.id, LucClass.name, LucClass.classification_system_id) \
+        .filter(or_(*where)) \
+        .all()
+
+    classes = dict()
+
+    for class_id, name, system_id in rows:
+        classes.setdefault((system_id, name), class_id)
+        classes[(system_id, str(class_id))] = class_id
+
+    return classes
 
 
 def insert_mappings(system_id_or_identifier_source: str, system_id_or_identifier_target: str, mapping_file: dict) \
@@ -675,14 +1119,39 @@ def insert_mappings(system_id_or_identifier_source: str, system_id_or_identifier
     system_source = _get_classification_system(system_id_or_identifier_source)
     system_target = _get_classification_system(system_id_or_identifier_target)
 
+    classes = _resolve_classes({
+        system_source.id: [mapping['source_class'] for mapping in mapping_file],
+        system_target.id: [mapping['target_class'] for mapping in mapping_file],
+    })
+
+    unresolved = [
+        f'{side} class {mapping[side + "_class"]}'
+        for mapping in mapping_file
+        for side, system in (('source', system_source), ('target', system_target))
+        if (system.id, str(mapping[side + '_class'])) not in classes
+    ]
+
+    if unresolved:
+        abort(400, f'Classes not found: {", ".join(unresolved)}.')
+
+    rows = [
+        dict(source_class_id=classes[(system_source.id, str(mapping['source_class']))],
+             target_class_id=classes[(system_target.id, str(mapping['target_class']))],
+             description=mapping.get('description'),
+             degree_of_similarity=mapping.get('degree_of_similarity'))
+        for mapping in mapping_file
+    ]
+
     with db.session.begin_nested():
-        for mapping in mapping_file:
-            insert_mapping(system_source.id, system_target.id, **mapping)
+        for offset in range(0, len(rows), _INSERT_BATCH_SIZE):
+            db.session.execute(ClassMapping.__table__.insert().values(rows[offset:offset + _INSERT_BATCH_SIZE]))
     db.session.commit()
+
+    _changed(('system', system_source.id), ('system', system_target.id))
     
     _, _, mappings = get_mapping(system_source.id, system_target.id)
 
-    return ClassesMappingSchema().dump(mappings, many=True)
+    return mappings.items
 
 
 def update_mapping(system_id_or_identifier_source: str, system_id_or_identifier_target: str, degree_of_similarity: float,
@@ -742,26 +1211,31 @@ def update_mapping(system_id_or_identifier_source: str, system_id_or_identifier_
 
     db.session.commit()
 
+    _changed(('system', system_source.id), ('system', system_target.id))
+
     return ClassesMappingSchema().dump(mappings)
 
 
-def delete_mappings(system_id_or_identifier_source: str, system_id_or_identifier_target: str):
-    """Delete classification system mappings."""
+def delete_mappings(system_id_or_identifier_source: str, system_id_or_identifier_target: str) -> Dict[str, int]:
+    """Delete classification system mappings.
+
+    :returns: The number of deleted rows of each table.
+    """
     system_source = _get_classification_system(system_id_or_identifier_source)
     system_target = _get_classification_system(system_id_or_identifier_target)
 
-    mappings = get_system_mapping(system_source.id, system_target.id)
-    
-    if mappings is None:
-        abort(400, f'Error to delete mapping')
-    
     with db.session.begin_nested():
-        for m in mappings:
-            db.session.delete(m)
+        deleted = dict(
+            class_mappings=_delete(ClassMapping,
+                                   ClassMapping.source_class_id.in_(_system_classes(system_source.id)),
+                                   ClassMapping.target_class_id.in_(_system_classes(system_target.id)))
+        )
     
     db.session.commit()
+
+    _changed(('system', system_source.id), ('system', system_target.id))
     
-    return
+    return deleted
 
 
 def create_style_format(name: str) -> dict:
@@ -783,6 +1257,8 @@ def create_style_format(name: str) -> dict:
         db.session.add(style_format)
     
     db.session.commit()
+
+    _changed(('style_formats',))
     
     return StyleFormatsSchema().dump(style_format)
 
@@ -793,12 +1269,15 @@ def delete_style_format(style_format_id_or_name:str):
     :param style_format_id_or_name: The id or identifier of a style format to be deleted
     :type style_format_id_or_name: string
     """
-    style = _get_style_format(style_format_id_or_name)
+    style = _query_style_format(style_format_id_or_name)
 
     with db.session.begin_nested():
         db.session.delete(style)
     db.session.commit()
 
+    _forget('style_format', style.id)
+    _changed(('style_formats',), ('style_format', style.id))
+
 
 def update_style_format(style_format_id_or_name: str, name: str) -> dict:
     """Update an style format.
@@ -808,12 +1287,15 @@ def update_style_format(style_format_id_or_name: str, name: str) -> dict:
     :param name: name of style format for update.
     :type name: string
     """
-    style_format = _get_style_format(style_format_id_or_name)
+    style_format = _query_style_format(style_format_id_or_name)
 
     with db.session.begin_nested():
         style_format.name = name
     
     db.session.commit()
+
+    _forget('style_format', style_format.id)
+    _changed(('style_formats',), ('style_format', style_format.id))
     
     return StyleFormatsSchema().dump(style_format)
 
@@ -830,7 +1312,7 @@ def get_identifier_system(system_name, system_version):
         .filter(LucClassificationSystem.name == system_name, LucClassificationSystem.version == system_version) \
         .first_or_404()
     
-    return ClassificationSystemSchema().dump(system), 200
+    return ClassificationSystemSchema().dump(system)
 
 
 def get_identifier_style_format(style_format_name):
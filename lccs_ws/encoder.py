@@ -0,0 +1,103 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""JSON encoders of Land Cover Classification System Web Service.
+
+The encoder is set in :attr:`flask.Flask.json_encoder` by :func:`lccs_ws.create_app`, so it is used
+by ``jsonify``, by the views returning dictionaries and by ``flask.json.dumps``.
+"""
+from decimal import Decimal
+from typing import Optional, Type
+
+from flask.json import JSONEncoder as _FlaskJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSON_ENCODERS = ('orjson', 'json')
+"""Supported values for ``LCCS_JSON_ENCODER``."""
+
+
+class JSONEncoder(_FlaskJSONEncoder):
+    """Flask JSON encoder which also serializes :class:`decimal.Decimal` values as numbers."""
+
+    def default(self, o):
+        """Return a serializable version of ``o``."""
+        if isinstance(o, Decimal):
+            return float(o)
+
+        return super().default(o)
+
+
+class ORJSONEncoder(JSONEncoder):
+    """JSON encoder backed by `orjson <https://github.com/ijl/orjson>`_.
+
+    The ``sort_keys`` and ``indent`` arguments given by Flask are honored. The values not supported
+    natively by orjson, such as dates and decimals, are converted with :meth:`JSONEncoder.default`,
+    so they have the same representation of the stdlib encoder.
+
+    The encoder falls back to the stdlib encoder when orjson can not represent the arguments or
+    the values, e.g. an indentation other than two spaces or integers larger than 64 bits.
+
+    .. note::
+
+        Unlike the stdlib encoder, the non ASCII characters are not escaped. The output is UTF-8.
+    """
+
+    def _options(self) -> Optional[int]:
+        """Return the orjson options equivalent to the encoder arguments or ``None`` if there is none."""
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        if self.indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif self.indent is not None:
+            return None
+
+        return option
+
+    def encode(self, o) -> str:
+        """Return the JSON representation of ``o``."""
+        option = self._options()
+
+        if option is not None:
+            try:
+                return orjson.dumps(o, default=self.default, option=option).decode()
+            except TypeError:
+                pass
+
+        return super().encode(o)
+
+
+def get_json_encoder(name: str) -> Type[JSONEncoder]:
+    """Return the JSON encoder class.
+
+    :param name: The encoder name, see :data:`JSON_ENCODERS`. When orjson is not installed
+        the stdlib encoder is used.
+    :type name: string
+    """
+    if name not in JSON_ENCODERS:
+        raise ValueError(f'Invalid JSON encoder "{name}". Use one of {", ".join(JSON_ENCODERS)}.')
+
+    if name == 'orjson' and orjson is not None:
+        return ORJSONEncoder
+
+    return JSONEncoder
@@ -0,0 +1,617 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Instrumentation of Land Cover Classification System Web Service.
+
+The database statements executed by each request are counted and timed, see
+:func:`request_statistics`. The totals are sent in the ``Server-Timing`` header of the response,
+e.g. ``db;dur=4.210;count=3, app;dur=9.870`` (durations in milliseconds), and a warning is logged
+when a request exceeds its query budget, see ``LCCS_QUERY_BUDGET``, or repeats the same statement
+many times, the usual sign of a N+1 query pattern.
+
+The statements slower than ``LCCS_SLOW_QUERY_THRESHOLD`` are logged by the ``lccs_ws.slow_queries``
+logger as a JSON document, see :class:`SlowQueryLog`, with their calling functions and, with
+``LCCS_SLOW_QUERY_EXPLAIN``, their PostgreSQL plan.
+
+When `prometheus_client <https://github.com/prometheus/client_python>`_
+is installed (``metrics`` extra) and ``LCCS_METRICS`` is enabled, the requests are measured and the
+metrics are published in the Prometheus text format at ``/metrics``:
+
+- ``lccs_ws_requests_total``: the requests, by endpoint, method and status code;
+- ``lccs_ws_request_duration_seconds``: the latency of the requests, by endpoint;
+- ``lccs_ws_response_size_bytes``: the size of the response bodies, by endpoint;
+- ``lccs_ws_db_queries``: the number of database statements of each request, by endpoint;
+- ``lccs_ws_db_duration_seconds``: the time spent in the database by each request, by endpoint;
+- ``lccs_ws_cache_requests_total``: the lookups of the caches, by cache and result (``hit``, ``miss``).
+
+The endpoint label is the Flask endpoint name, e.g. ``classification_systems_classes``.
+
+With several worker processes, e.g. ``gunicorn -w 4``, set the ``PROMETHEUS_MULTIPROC_DIR``
+environment variable to an empty directory, so the metrics are aggregated across the workers.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                                   CollectorRegistry, Counter, Histogram,
+                                   generate_latest, multiprocess)
+except ImportError:  # pragma: no cover
+    CollectorRegistry = None
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, float('inf'))
+"""Buckets, in bytes, of the response size histogram."""
+
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, float('inf'))
+"""Buckets of the database statements per request histogram."""
+
+
+class RequestStatistics:
+    """Database statements executed by a request."""
+
+    def __init__(self):
+        """Build empty statistics, starting the request clock."""
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = _Counter()
+
+    def record_query(self, statement: str, duration: float):
+        """Record a database statement.
+
+        :param statement: The SQL of the statement.
+        :type statement: string
+        :param duration: The execution time, in seconds.
+        :type duration: float
+        """
+        self.queries += 1
+        self.db_time += duration
+        self.statements[statement] += 1
+
+    @property
+    def elapsed(self) -> float:
+        """The time, in seconds, since the beginning of the request."""
+        return time.perf_counter() - self.started_at
+
+
+_task_statistics: ContextVar[Optional[RequestStatistics]] = ContextVar('lccs_ws_statistics', default=None)
+"""The statistics of the request served by the current asyncio task, see :func:`bind_statistics`."""
+
+
+def request_statistics() -> Optional[RequestStatistics]:
+    """Return the statistics of the current request or ``None`` out of a request.
+
+    Out of a request context, return the statistics bound to the current task, if any.
+    """
+    if not has_request_context():
+        return _task_statistics.get()
+
+    statistics = g.get('lccs_ws_statistics')
+
+    if statistics is None:
+        statistics = g.lccs_ws_statistics = RequestStatistics()
+
+    return statistics
+
+
+@contextmanager
+def bind_statistics(statistics: Optional[RequestStatistics]):
+    """Record the statements of a block, executed out of the request context, in the statistics of a request.
+
+    Used by :class:`lccs_ws.asgi.ASGIApplication`, which accesses the database between two request contexts.
+    """
+    token = _task_statistics.set(statistics)
+
+    try:
+        yield statistics
+    finally:
+        _task_statistics.reset(token)
+
+
+def parameters_shape(parameters) -> dict:
+    """Return the shape of the bound parameters of a statement: their number and types, never their values."""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return dict(rows=len(parameters), **parameters_shape(parameters[0]))
+
+    values = list(parameters.values()) if isinstance(parameters, dict) else list(parameters or ())
+
+    return dict(count=len(values), types=dict(_Counter(type(value).__name__ for value in values)))
+
+
+def _callers(limit: int = 5) -> List[str]:
+    """Return the functions of the service which executed the current statement, innermost first.
+
+    E.g. ``['lccs_ws.data._paginate:226', 'lccs_ws.data.get_mapping:590', 'lccs_ws.views.get_mapping:320']``.
+    """
+    callers = []
+    frame = sys._getframe(2)
+
+    while frame is not None and len(callers) < limit:
+        module = frame.f_globals.get('__name__', '')
+
+        if module.startswith('lccs_ws.') and module != __name__:
+            callers.append(f'{module}.{frame.f_code.co_name}:{frame.f_lineno}')
+
+        frame = frame.f_back
+
+    return callers
+
+
+class RateLimiter:
+    """Allow ``rate`` events per ``period`` seconds, as a token bucket.
+
+    :param rate: The number of events of a period.
+    :type rate: int
+    :param period: The period, in seconds.
+    :type period: float
+    """
+
+    def __init__(self, rate: int, period: float = 60):
+        """Build a full bucket."""
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated_at = time.monotonic()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Consume an event, if allowed."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate / self.period)
+            self.updated_at = now
+
+            if self.tokens < 1:
+                self.suppressed += 1
+                return False
+
+            self.tokens -= 1
+
+            return True
+
+
+_SIDE_EFFECTS = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b|\b(pg_notify|nextval|setval)\s*\(', re.IGNORECASE)
+"""Statements which must not be executed again by ``EXPLAIN ANALYZE``: data-modifying ``WITH`` queries
+and ``SELECT`` of functions with side effects, e.g. ``pg_notify`` of :class:`lccs_ws.invalidation.PostgresBus`."""
+
+
+class SlowQueryLog:
+    """Log of the statements slower than a threshold.
+
+    Each record is a JSON document with the statement, the shape of its parameters, see
+    :func:`parameters_shape`, the functions of the service which executed it, the request and,
+    when ``explain`` is set, the plan of ``EXPLAIN (ANALYZE, BUFFERS)``. As ``ANALYZE`` executes the
+    statement again, the plans are only captured on PostgreSQL for the ``SELECT`` statements without
+    side effects, and ``EXPLAIN`` runs in a savepoint which is rolled back.
+
+    The records are rate limited: at most ``rate`` per minute and one per ``interval`` seconds for
+    the same statement.
+
+    :param threshold: The duration, in seconds, of a slow statement.
+    :type threshold: float
+    :param explain: Capture the plans of the slow statements.
+    :type explain: bool
+    :param rate: The maximum number of records per minute.
+    :type rate: int
+    :param interval: The minimum time, in seconds, between two records of the same statement.
+    :type interval: float
+    """
+
+    logger = logging.getLogger('lccs_ws.slow_queries')
+
+    def __init__(self, threshold: float, explain: bool = False, rate: int = 10, interval: float = 300):
+        """Build the log."""
+        self.threshold = threshold
+        self.explain = explain
+        self.interval = interval
+        self.limiter = RateLimiter(rate)
+        self._logged_at: Dict[str, float] = dict()
+        self._lock = threading.Lock()
+
+    def _due(self, statement: str) -> bool:
+        """Tell if a slow statement must be logged."""
+        now = time.monotonic()
+
+        with self._lock:
+            if now - self._logged_at.get(statement, float('-inf')) < self.interval:
+                return False
+
+            if len(self._logged_at) >= 1000:
+                self._logged_at = {key: logged_at for key, logged_at in self._logged_at.items()
+                                   if now - logged_at < self.interval}
+
+            self._logged_at[statement] = now
+
+        return self.limiter.allow()
+
+    def plan(self, conn, statement: str, parameters) -> Optional[list]:
+        """Return the plan of a ``SELECT`` statement on PostgreSQL, in the JSON format of ``EXPLAIN``.
+
+        The statements with side effects are not planned. ``EXPLAIN`` runs in a savepoint, rolled back
+        afterwards, so that neither its changes nor its errors reach the transaction of the statement.
+        """
+        if conn.dialect.name != 'postgresql' or not statement.lstrip().upper().startswith(('SELECT', 'WITH')) \
+                or _SIDE_EFFECTS.search(statement):
+            return None
+
+        cursor = conn.connection.cursor()
+
+        try:
+            cursor.execute('SAVEPOINT lccs_ws_explain')
+
+            try:
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}', parameters)
+                return cursor.fetchone()[0]
+            finally:
+                cursor.execute('ROLLBACK TO SAVEPOINT lccs_ws_explain')
+                cursor.execute('RELEASE SAVEPOINT lccs_ws_explain')
+        finally:
+            cursor.close()
+
+    def record(self, conn, statement: str, parameters, executemany: bool, duration: float):
+        """Log a statement, if slow and not rate limited.
+
+        The plan is not captured without the SQLAlchemy connection ``conn``, e.g. for the asyncpg statements.
+        """
+        if duration < self.threshold or not self._due(statement):
+            return
+
+        record = dict(
+            event='slow_query',
+            duration_ms=round(duration * 1000, 3),
+            statement=' '.join(statement.split())[:10000],
+            parameters=parameters_shape(parameters),
+            callers=_callers(),
+        )
+
+        if has_request_context():
+            record.update(method=request.method, path=request.path, endpoint=request.endpoint)
+
+        if self.explain and not executemany and conn is not None:
+            try:
+                record['plan'] = self.plan(conn, statement, parameters)
+            except Exception as e:
+                record['plan_error'] = str(e)
+
+        if self.limiter.suppressed:
+            record['suppressed'] = self.limiter.suppressed
+            self.limiter.suppressed = 0
+
+        self.logger.warning(json.dumps(record, default=str), extra=dict(slow_query=record))
+
+
+_slow_query_log: Optional[SlowQueryLog] = None
+"""The log of the slow statements of all engines, see :func:`init_instrumentation`."""
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._lccs_ws_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, '_lccs_ws_started_at', None)
+
+    if started_at is None:
+        return
+
+    duration = time.perf_counter() - started_at
+    statistics = request_statistics()
+
+    if statistics is not None:
+        statistics.record_query(statement, duration)
+
+    if _slow_query_log is not None:
+        _slow_query_log.record(conn, statement, parameters, executemany, duration)
+
+
+def record_statement(statement: str, parameters, duration: float):
+    """Record a statement executed out of SQLAlchemy, e.g. with asyncpg, in the statistics and the slow query log.
+
+    :param statement: The SQL of the statement.
+    :type statement: string
+    :param parameters: The bound parameters.
+    :param duration: The execution time, in seconds.
+    :type duration: float
+    """
+    statistics = request_statistics()
+
+    if statistics is not None:
+        statistics.record_query(statement, duration)
+
+    if _slow_query_log is not None:
+        _slow_query_log.record(None, statement, parameters, False, duration)
+
+
+def _listen_statements():
+    """Measure the statements of all engines."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class QueryCounter:
+    """Statements executed in a block, see :func:`count_queries`."""
+
+    def __init__(self):
+        """Build an empty counter."""
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        """The number of statements executed."""
+        return len(self.statements)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, int]:
+        """Return the statements executed at least ``threshold`` times."""
+        return {statement: count for statement, count in _Counter(self.statements).items() if count >= threshold}
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count the statements executed by all engines in a block.
+
+    Example::
+
+        with count_queries() as counter:
+            client.get('/classification_systems/1/classes')
+
+        assert counter.count <= 3
+    """
+    counter = QueryCounter()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(Engine, 'after_cursor_execute', _count)
+
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, 'after_cursor_execute', _count)
+
+
+def parse_query_budgets(value: str) -> Dict[str, int]:
+    """Parse the query budgets per endpoint of ``LCCS_QUERY_BUDGETS``, e.g. ``"get_mapping=4 create_classes=500"``."""
+    budgets = dict()
+
+    for item in value.split():
+        endpoint, _, budget = item.partition('=')
+
+        if not budget.isdigit():
+            raise ValueError(f'Invalid query budget "{item}". Use <endpoint>=<number of statements>.')
+
+        budgets[endpoint] = int(budget)
+
+    return budgets
+
+
+def server_timing(statistics: RequestStatistics) -> str:
+    """Return the ``Server-Timing`` header value of the request statistics."""
+    return (f'db;dur={statistics.db_time * 1000:.3f};count={statistics.queries}, '
+            f'app;dur={statistics.elapsed * 1000:.3f}')
+
+
+def report_request(app: Flask, response: Response) -> Response:
+    """Add the ``Server-Timing`` header and warn about the requests over their query budget.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param response: The response of the current request.
+    :type response: flask.Response
+    """
+    statistics = g.get('lccs_ws_statistics')
+
+    if statistics is None:
+        return response
+
+    if app.config['LCCS_SERVER_TIMING']:
+        response.headers['Server-Timing'] = server_timing(statistics)
+
+    endpoint = request.endpoint or 'unmatched'
+    budget = app.config['LCCS_QUERY_BUDGETS'].get(endpoint, app.config['LCCS_QUERY_BUDGET'])
+
+    if budget and statistics.queries > budget:
+        app.logger.warning(f'{request.method} {request.path} ({endpoint}) executed {statistics.queries} '
+                           f'database statements, over the budget of {budget}')
+
+    threshold = app.config['LCCS_QUERY_REPEAT_THRESHOLD']
+
+    if threshold and statistics.statements:
+        statement, count = statistics.statements.most_common(1)[0]
+
+        if count >= threshold:
+            app.logger.warning(f'{request.method} {request.path} ({endpoint}) executed the same statement '
+                               f'{count} times, possible N+1 queries: {" ".join(statement.split())[:200]}')
+
+    return response
+
+
+def is_multiprocess() -> bool:
+    """Tell if the metrics are shared by several processes, through ``PROMETHEUS_MULTIPROC_DIR``."""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir'))
+
+
+class Metrics:
+    """Prometheus metrics of the service.
+
+    :param registry: The registry of the metrics.
+    :type registry: prometheus_client.CollectorRegistry
+    """
+
+    def __init__(self, registry=None):
+        """Create the metrics."""
+        registry = registry if registry is not None else REGISTRY
+
+        self.registry = registry
+        self.requests = Counter('lccs_ws_requests_total', 'Requests.',
+                                ['endpoint', 'method', 'status'], registry=registry)
+        self.duration = Histogram('lccs_ws_request_duration_seconds', 'Request latency, in seconds.',
+                                  ['endpoint'], registry=registry)
+        self.size = Histogram('lccs_ws_response_size_bytes', 'Response body size, in bytes.',
+                              ['endpoint'], buckets=SIZE_BUCKETS, registry=registry)
+        self.db_queries = Histogram('lccs_ws_db_queries', 'Database statements per request.',
+                                    ['endpoint'], buckets=QUERIES_BUCKETS, registry=registry)
+        self.db_duration = Histogram('lccs_ws_db_duration_seconds', 'Database time per request, in seconds.',
+                                     ['endpoint'], registry=registry)
+        self.cache = Counter('lccs_ws_cache_requests_total', 'Cache lookups.',
+                             ['cache', 'result'], registry=registry)
+
+        self._caches = dict()
+        self._lock = threading.Lock()
+
+    def track_cache(self, name: str, cache):
+        """Report the hits and misses of a cache.
+
+        The cache counters are local to the process. Their increments are added to the Prometheus
+        counters at the end of each request, so they are aggregated across the workers as well.
+
+        :param name: The cache label.
+        :type name: string
+        :param cache: The cache, an object with the ``hits`` and ``misses`` attributes.
+        """
+        with self._lock:
+            self._caches[name] = [cache, cache.hits, cache.misses]
+
+    def _sync_caches(self):
+        """Add the cache hits and misses since the last synchronization."""
+        with self._lock:
+            for name, state in self._caches.items():
+                cache, hits, misses = state
+                state[1:] = cache.hits, cache.misses
+
+                if cache.hits > hits:
+                    self.cache.labels(name, 'hit').inc(cache.hits - hits)
+                if cache.misses > misses:
+                    self.cache.labels(name, 'miss').inc(cache.misses - misses)
+
+    def observe(self, response: Response):
+        """Record the metrics of the current request."""
+        endpoint = request.endpoint or 'unmatched'
+        statistics = g.get('lccs_ws_statistics')
+
+        self.requests.labels(endpoint, request.method, str(response.status_code)).inc()
+
+        if response.content_length is not None:
+            self.size.labels(endpoint).observe(response.content_length)
+
+        if statistics is not None:
+            self.duration.labels(endpoint).observe(statistics.elapsed)
+            self.db_queries.labels(endpoint).observe(statistics.queries)
+            self.db_duration.labels(endpoint).observe(statistics.db_time)
+
+        self._sync_caches()
+
+    def render(self) -> Response:
+        """Return the response of the metrics in the Prometheus text format."""
+        registry = self.registry
+
+        if is_multiprocess():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics of the process, created on the first call."""
+    global _metrics
+
+    if _metrics is None:
+        _metrics = Metrics()
+
+    return _metrics
+
+
+def child_exit(server, worker):
+    """Gunicorn hook which removes the metrics of the dead workers, see ``PROMETHEUS_MULTIPROC_DIR``.
+
+    Add it to the gunicorn configuration file::
+
+        from lccs_ws.instrumentation import child_exit
+    """
+    if CollectorRegistry is not None and is_multiprocess():
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def init_instrumentation(app: Flask):
+    """Measure the requests and publish the metrics at ``/metrics``.
+
+    The statements are always measured and reported, see :func:`report_request`, and the slow ones
+    logged, see :class:`SlowQueryLog`. The metrics require ``LCCS_METRICS`` and ``prometheus_client``.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    global _slow_query_log
+
+    _listen_statements()
+
+    _slow_query_log = None
+
+    if app.config['LCCS_SLOW_QUERY_THRESHOLD']:
+        _slow_query_log = SlowQueryLog(app.config['LCCS_SLOW_QUERY_THRESHOLD'] / 1000,
+                                       explain=app.config['LCCS_SLOW_QUERY_EXPLAIN'],
+                                       rate=app.config['LCCS_SLOW_QUERY_RATE'],
+                                       interval=app.config['LCCS_SLOW_QUERY_INTERVAL'])
+
+    @app.before_request
+    def start_request_statistics():
+        request_statistics()
+
+    @app.after_request
+    def report_request_statistics(response):
+        return report_request(app, response)
+
+    if not app.config['LCCS_METRICS'] or CollectorRegistry is None:
+        return
+
+    from .data import _identifiers_cache
+    from .response_cache import responses
+
+    metrics = get_metrics()
+    metrics.track_cache(_identifiers_cache.name, _identifiers_cache)
+    metrics.track_cache(responses.name, responses)
+
+    if 'lccs_ws_token_cache' in app.extensions:
+        metrics.track_cache('tokens', app.extensions['lccs_ws_token_cache'])
+
+    app.extensions['lccs_ws_metrics'] = metrics
+
+    @app.after_request
+    def observe_request(response):
+        metrics.observe(response)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics.render, methods=['GET'])
@@ -0,0 +1,403 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Invalidation of the caches of all the workers of Land Cover Classification System Web Service.
+
+The write functions of :mod:`lccs_ws.data` invalidate the caches of their own process and
+publish the changed tags, see :mod:`lccs_ws.response_cache`, on an :class:`InvalidationBus`.
+Every worker subscribes to the bus and applies the invalidations of the other workers with
+:func:`apply`, so the caches stay coherent without short expiration times. With read replicas,
+the reads of the changed tags go to the primary for a while, see :meth:`lccs_ws.routing.ReplicaRouter.pin`.
+
+The bus is chosen by ``LCCS_INVALIDATION_BUS``:
+
+- ``postgres``: :class:`PostgresBus`, with ``LISTEN``/``NOTIFY`` on the primary database. Each
+  worker keeps a connection, besides the pool, to listen for the notifications;
+- ``memory``: :class:`MemoryBus`, which only reaches the buses of the same process. Used by the tests;
+- ``none``: the changes are not published, the caches of the other workers expire with ``LCCS_RESPONSE_CACHE_TTL``.
+
+When the listener loses its connection some notifications may be missed, so the caches of the
+worker are cleared once it reconnects.
+"""
+import abc
+import json
+import logging
+import os
+import selectors
+import threading
+import uuid
+from typing import Callable, Hashable, List, Optional, Sequence
+
+from flask import Flask
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from .response_cache import invalidate, responses
+
+logger = logging.getLogger(__name__)
+
+BUSES = ('postgres', 'memory', 'none')
+"""Values of ``LCCS_INVALIDATION_BUS``."""
+
+_MAX_PAYLOAD = 7900
+"""Maximum size of a notification, below the 8000 bytes of PostgreSQL. Larger changes clear the caches."""
+
+bus: Optional['InvalidationBus'] = None
+"""The bus of the application, set by :func:`init_invalidation`."""
+
+
+class InvalidationBus(abc.ABC):
+    """Bus which carries the tags changed by a worker to all the other workers.
+
+    A message is a JSON document with the ``origin`` of the bus which published it and the list of
+    ``tags``, or ``null`` to clear the caches. The messages of a bus are not delivered back to it.
+    """
+
+    def __init__(self):
+        """Build the bus."""
+        self.origin = uuid.uuid4().hex
+        self.handlers: List[Callable[[Optional[List[tuple]]], None]] = []
+        self.published = 0
+        self.received = 0
+        self._pid = None
+
+    def subscribe(self, handler: Callable[[Optional[List[tuple]]], None]):
+        """Register a function called with the tags received from the other workers, or ``None`` to clear the caches."""
+        self.handlers.append(handler)
+
+    def encode(self, tags: Optional[Sequence[Hashable]]) -> str:
+        """Return the message of the changed tags."""
+        payload = json.dumps(dict(origin=self.origin, tags=None if tags is None else [list(tag) for tag in tags]))
+
+        if len(payload) > _MAX_PAYLOAD:
+            return self.encode(None)
+
+        return payload
+
+    def publish(self, tags: Optional[Sequence[Hashable]]):
+        """Publish the changed tags to the other workers.
+
+        :param tags: The changed tags or ``None`` to clear the caches.
+        """
+        self.send(self.encode(tags))
+        self.published += 1
+
+    @abc.abstractmethod
+    def send(self, payload: str):
+        """Send a message to the other workers."""
+
+    def receive(self, payload: str):
+        """Deliver a message to the handlers, unless it was published by this bus."""
+        message = json.loads(payload)
+
+        if message.get('origin') == self.origin:
+            return
+
+        self.received += 1
+        tags = message.get('tags')
+
+        self.dispatch(None if tags is None else [tuple(tag) for tag in tags])
+
+    def dispatch(self, tags: Optional[List[tuple]]):
+        """Call the handlers with the tags received."""
+        for handler in self.handlers:
+            try:
+                handler(tags)
+            except Exception:
+                logger.exception('Cache invalidation failed.')
+
+    def start(self):
+        """Start receiving the messages of the other workers."""
+
+    def ensure_started(self):
+        """Start the bus in the current process, once after each fork.
+
+        The forked workers get a new origin, otherwise they would ignore the messages of each other.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.origin = uuid.uuid4().hex
+            self.published = self.received = 0
+            self.start()
+
+    def close(self):
+        """Stop receiving messages."""
+
+    def statistics(self) -> dict:
+        """Return the counters of the bus in the current process."""
+        return dict(backend=type(self).__name__, published=self.published, received=self.received)
+
+
+class MemoryHub:
+    """Channel shared by the :class:`MemoryBus` instances of a process."""
+
+    def __init__(self):
+        """Build a hub without buses."""
+        self.buses: List['MemoryBus'] = []
+        self._lock = threading.Lock()
+
+    def attach(self, bus: 'MemoryBus'):
+        """Add a bus to the hub."""
+        with self._lock:
+            self.buses.append(bus)
+
+    def detach(self, bus: 'MemoryBus'):
+        """Remove a bus from the hub."""
+        with self._lock:
+            if bus in self.buses:
+                self.buses.remove(bus)
+
+    def broadcast(self, payload: str):
+        """Deliver a message to all the buses, synchronously."""
+        with self._lock:
+            buses = list(self.buses)
+
+        for bus in buses:
+            bus.receive(payload)
+
+
+_default_hub = MemoryHub()
+
+
+class MemoryBus(InvalidationBus):
+    """Bus which delivers the messages to the buses of the same :class:`MemoryHub`, in the same process.
+
+    :param hub: The shared channel. Defaults to a hub global to the process.
+    :type hub: MemoryHub
+    """
+
+    def __init__(self, hub: MemoryHub = None):
+        """Build the bus and attach it to the hub."""
+        super().__init__()
+        self.hub = hub or _default_hub
+        self.hub.attach(self)
+
+    def send(self, payload: str):
+        """Broadcast a message on the hub."""
+        self.hub.broadcast(payload)
+
+    def close(self):
+        """Detach the bus from the hub."""
+        self.hub.detach(self)
+
+
+class PostgresBus(InvalidationBus):
+    """Bus on the ``LISTEN``/``NOTIFY`` channel of a PostgreSQL database.
+
+    The messages are sent with ``pg_notify`` on a connection of the pool. They are received by a
+    daemon thread, on a dedicated connection, which waits for the notifications at most
+    ``poll_interval`` seconds at a time and reconnects after ``retry_interval`` seconds on errors.
+
+    :param engine: The engine of the primary database.
+    :type engine: sqlalchemy.engine.Engine
+    :param channel: The notification channel.
+    :type channel: string
+    :param poll_interval: The time, in seconds, between the checks for the end of the thread.
+    :type poll_interval: float
+    :param retry_interval: The time, in seconds, to wait before reconnecting.
+    :type retry_interval: float
+    """
+
+    def __init__(self, engine: Engine, channel: str = 'lccs_ws_invalidation', poll_interval: float = 1.0,
+                 retry_interval: float = 5.0):
+        """Build the bus. The listener starts with :meth:`start`."""
+        super().__init__()
+        self.engine = engine
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.reconnections = 0
+        self._thread = None
+        self._stopped = threading.Event()
+        self._listening = threading.Event()
+
+    def send(self, payload: str):
+        """Notify the channel, out of the transaction of the session."""
+        with self.engine.connect() as connection:
+            connection.execution_options(autocommit=True).execute(select([func.pg_notify(self.channel, payload)]))
+
+    def start(self):
+        """Start the listener thread."""
+        self._stopped.clear()
+        self._listening.clear()
+        self._thread = threading.Thread(target=self._listen, name='lccs-ws-invalidation', daemon=True)
+        self._thread.start()
+
+    def wait_listening(self, timeout: float = None) -> bool:
+        """Wait until the listener is connected. Return ``False`` on timeout."""
+        return self._listening.wait(timeout)
+
+    def _connect(self):
+        """Open the listening connection, out of the pool, so it is never shared with a forked process."""
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        connection = self.engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+
+        return connection
+
+    def _listen(self):
+        """Receive the notifications until :meth:`close`."""
+        connected = False
+
+        while not self._stopped.is_set():
+            connection = None
+
+            try:
+                connection = self._connect()
+
+                if connected:
+                    # The notifications sent while disconnected are lost.
+                    self.reconnections += 1
+                    self.dispatch(None)
+
+                connected = True
+                self._listening.set()
+
+                with selectors.DefaultSelector() as selector:
+                    selector.register(connection, selectors.EVENT_READ)
+
+                    while not self._stopped.is_set():
+                        if not selector.select(self.poll_interval):
+                            continue
+
+                        connection.poll()
+
+                        while connection.notifies:
+                            self.receive(connection.notifies.pop(0).payload)
+            except Exception as e:
+                self._listening.clear()
+                logger.warning(f'Cache invalidation listener disconnected: {e}')
+                self._stopped.wait(self.retry_interval)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def close(self):
+        """Stop the listener thread."""
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join(self.poll_interval * 2)
+
+    def statistics(self) -> dict:
+        """Return the counters of the bus in the current process and the state of the listener."""
+        return dict(super().statistics(), listening=self._listening.is_set(), reconnections=self.reconnections)
+
+
+def apply(tags: Optional[List[tuple]]):
+    """Invalidate the caches of the current process with the tags changed by another worker.
+
+    The cached keys of the changed classification systems and style formats are forgotten as well,
+    since their identifiers or names may have changed.
+
+    :param tags: The changed tags or ``None`` to clear the caches.
+    """
+    from .data import _forget, _identifiers_cache
+
+    if tags is None:
+        responses.clear()
+        _identifiers_cache.clear()
+        return
+
+    invalidate(*tags)
+
+    for tag in tags:
+        if len(tag) == 2 and tag[0] in ('system', 'style_format'):
+            _forget(*tag)
+
+
+def publish(tags: Sequence[Hashable]):
+    """Publish the tags changed by the current worker, when a bus is configured.
+
+    A failure is logged and does not fail the write: the caches of the other workers expire with
+    ``LCCS_RESPONSE_CACHE_TTL``.
+    """
+    if bus is None:
+        return
+
+    try:
+        bus.publish(tags)
+    except Exception:
+        logger.exception('Cache invalidation could not be published.')
+
+
+def create_bus(app: Flask, engine: Engine) -> Optional[InvalidationBus]:
+    """Create the bus configured by ``LCCS_INVALIDATION_BUS``.
+
+    The ``postgres`` bus falls back to ``none`` on the other databases.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param engine: The engine of the primary database.
+    :type engine: sqlalchemy.engine.Engine
+    """
+    kind = app.config['LCCS_INVALIDATION_BUS']
+
+    if kind not in BUSES:
+        raise ValueError(f'Invalid LCCS_INVALIDATION_BUS {kind}. Use one of: {", ".join(BUSES)}.')
+
+    if kind == 'memory':
+        return MemoryBus()
+
+    if kind == 'postgres':
+        if engine.dialect.name != 'postgresql':
+            logger.warning(f'Cache invalidation bus disabled: {engine.dialect.name} has no LISTEN/NOTIFY.')
+            return None
+
+        return PostgresBus(engine, channel=app.config['LCCS_INVALIDATION_CHANNEL'])
+
+    return None
+
+
+def init_invalidation(app: Flask, db, invalidation_bus: InvalidationBus = None):
+    """Publish the cache invalidations of the application and apply the ones of the other workers.
+
+    The bus is started on the first request of each worker process, so it is not started by the
+    command line interface and survives the fork of the preloaded servers.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param db: The Flask-SQLAlchemy extension.
+    :param invalidation_bus: The bus. Defaults to the bus configured by ``LCCS_INVALIDATION_BUS``.
+    :type invalidation_bus: InvalidationBus
+    """
+    global bus
+
+    bus = invalidation_bus or create_bus(app, db.engine)
+
+    if bus is None:
+        return
+
+    current = bus
+    router = app.extensions.get('lccs_ws_replicas')
+
+    if router is not None:
+        # Before apply, so the responses purged are not rendered again from a lagging replica.
+        current.subscribe(router.pin)
+
+    current.subscribe(apply)
+    app.extensions['lccs_ws_invalidation_bus'] = current
+
+    @app.before_request
+    def start_invalidation_bus():
+        current.ensure_started()
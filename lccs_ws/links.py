@@ -0,0 +1,261 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Hypermedia links of Land Cover Classification System Web Service.
+
+Every route of the service describes its links with :class:`LinkTemplate` objects
+declared once in this module. For each request a :class:`Links` instance binds the
+templates to the service URL and to the query string arguments, so the per item
+work is reduced to a single string format.
+"""
+from typing import Dict, Iterable, List, Optional
+
+LINKS_MODES = ('full', 'compact', 'none')
+"""Supported values for the ``links`` query string argument."""
+
+
+class LinkTemplate:
+    """Precompiled hypermedia link of a route.
+
+    :param path: The URL path, with ``str.format`` placeholders for the route parameters.
+    :type path: string
+    :param rel: The link relation type.
+    :type rel: string
+    :param title: The link title, with ``str.format`` placeholders for the route parameters.
+    :type title: string
+    :param i18n: Propagate the internationalization arguments in the link.
+    :type i18n: bool
+    """
+
+    __slots__ = ('path', 'rel', 'title', 'i18n')
+
+    def __init__(self, path: str, rel: str, title: str, i18n: bool = True):
+        """Build a link template."""
+        self.path = path
+        self.rel = rel
+        self.title = title
+        self.i18n = i18n
+
+
+class Links:
+    """Render link templates for a request.
+
+    :param base_url: The service URL.
+    :type base_url: string
+    :param assets_kwargs: The encoded query string with the assets arguments (``BDC_LCCS_ARGS``).
+    :type assets_kwargs: string
+    :param intern_kwargs: The encoded query string with the i18n arguments (``BDC_LCCS_ARGS_I18N``).
+    :type intern_kwargs: string
+    :param mode: How links are rendered: ``full``, ``compact`` (only item links, with ``href`` and ``rel``)
+        or ``none`` (items without links).
+    :type mode: string
+    """
+
+    def __init__(self, base_url: str, assets_kwargs: Optional[str] = None, intern_kwargs: Optional[str] = None,
+                 mode: str = 'full'):
+        """Build the link renderer of a request."""
+        assets_kwargs = (assets_kwargs or '').lstrip('?&')
+        intern_kwargs = (intern_kwargs or '').lstrip('?&')
+
+        self.mode = mode
+        self._base_url = _escape(base_url.rstrip('/'))
+        self._query = {
+            False: _escape(_query_string(assets_kwargs)),
+            True: _escape(_query_string(assets_kwargs, intern_kwargs)),
+        }
+        self._bound: Dict[int, str] = dict()
+
+    @property
+    def enabled(self) -> bool:
+        """Tell if the items of a response must carry links."""
+        return self.mode != 'none'
+
+    def _href(self, template: LinkTemplate) -> str:
+        """Return the href format string of a template bound to this request."""
+        href = self._bound.get(id(template))
+
+        if href is None:
+            href = f'{self._base_url}{template.path}{self._query[template.i18n]}'
+            self._bound[id(template)] = href
+
+        return href
+
+    def render(self, template: LinkTemplate, **params) -> dict:
+        """Render a single link.
+
+        :param template: The link template.
+        :type template: LinkTemplate
+        :param params: The values for the template placeholders.
+        """
+        href = self._href(template).format_map(params)
+
+        if self.mode == 'compact':
+            return {'href': href, 'rel': template.rel}
+
+        return {
+            'href': href,
+            'rel': template.rel,
+            'type': 'application/json',
+            'title': template.title.format_map(params),
+        }
+
+    def render_all(self, templates: Iterable[LinkTemplate], **params) -> List[dict]:
+        """Render a list of links.
+
+        :param templates: The link templates.
+        :param params: The values for the templates placeholders.
+        """
+        return [self.render(template, **params) for template in templates]
+
+    def shared(self, templates: Iterable[LinkTemplate], **params) -> List[dict]:
+        """Render the links shared by every item of a response.
+
+        The shared links are rendered once per response and omitted in ``compact`` and ``none`` modes.
+        """
+        if self.mode != 'full':
+            return []
+
+        return self.render_all(templates, **params)
+
+    def attach(self, obj: dict, shared: List[dict], *templates: LinkTemplate, **params) -> dict:
+        """Set the ``links`` of an item.
+
+        :param obj: The item.
+        :type obj: dict
+        :param shared: The links shared by all items, see :meth:`Links.shared`.
+        :type shared: list
+        :param templates: The link templates specific of the item.
+        :param params: The values for the templates placeholders.
+        """
+        if self.enabled:
+            obj['links'] = shared + self.render_all(templates, **params)
+
+        return obj
+
+
+def _query_string(*parts: str) -> str:
+    """Join encoded query strings."""
+    query = '&'.join(part for part in parts if part)
+
+    return f'?{query}' if query else ''
+
+
+def _escape(value: str) -> str:
+    """Escape the braces of a literal value used in a format string."""
+    return value.replace('{', '{{').replace('}', '}}')
+
+
+ROOT_LINKS = (
+    LinkTemplate('/', 'self', 'Link to this document'),
+    LinkTemplate('/classification_systems', 'classification_systems', 'Information about Classification Systems'),
+    LinkTemplate('/style_formats', 'style_formats', 'Information about Style Formats', i18n=False),
+)
+
+CLASSIFICATION_SYSTEMS_ITEM_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}', 'classification_system', 'Link to Classification System'),
+    LinkTemplate('/classification_systems/{system_id}/classes', 'classes', 'Link to Classification System Classes'),
+    LinkTemplate('/classification_systems/{system_id}/style_formats', 'style_formats',
+                 'Link to Available Style Formats', i18n=False),
+    LinkTemplate('/mappings/{system_id}', 'mappings', 'Link to Classification Mappings', i18n=False),
+)
+
+CLASSIFICATION_SYSTEMS_LINKS = (
+    LinkTemplate('/classification_systems', 'self', 'Link to this document'),
+)
+
+CLASSIFICATION_SYSTEM_LINKS = (
+    LinkTemplate('/classification_systems', 'parent', 'Link to this document'),
+    LinkTemplate('/classification_systems/{system_id}', 'self', 'The classification_system'),
+    LinkTemplate('/classification_systems/{system_id}/classes', 'classes', 'The classes related to this item'),
+    LinkTemplate('/classification_systems/{system_id}/style_formats', 'styles_formats',
+                 'The styles formats related to this item', i18n=False),
+    LinkTemplate('/mappings/{system_id}', 'mappings', 'The classification system mappings', i18n=False),
+    LinkTemplate('/', 'root', 'API landing page.'),
+)
+
+CLASSES_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}/classes', 'self',
+                 'Classes of the classification system {system_id}'),
+    LinkTemplate('/classification_systems/{system_id}', 'parent', 'Link to classification system'),
+    LinkTemplate('/classification_systems', 'parent', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+)
+
+CLASSES_ITEM_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}/classes/{class_id}', 'child', 'Classification System Class'),
+)
+
+CLASS_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}/classes/{class_id}', 'self', 'Link to this document'),
+    LinkTemplate('/classification_systems/{system_id}/classes', 'parent', 'Link to this document'),
+    LinkTemplate('/classification_systems', 'classification_systems', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+)
+
+MAPPINGS_LINKS = (
+    LinkTemplate('/classification_systems', 'parent', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+)
+
+MAPPINGS_ITEM_LINKS = (
+    LinkTemplate('/mappings/{source_id}/{target_id}', 'child', 'Mapping', i18n=False),
+)
+
+MAPPING_ITEM_LINKS = (
+    LinkTemplate('/classification_systems/{source_id}/classes/{source_class_id}', 'item', 'Link to source class',
+                 i18n=False),
+    LinkTemplate('/classification_systems/{target_id}/classes/{target_class_id}', 'item', 'Link to target class',
+                 i18n=False),
+)
+
+STYLE_FORMATS_LINKS = (
+    LinkTemplate('/classification_systems', 'parent', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+)
+
+STYLE_FORMATS_ITEM_LINKS = (
+    LinkTemplate('/style_formats/{style_format_id}', 'items', 'Link to style format {style_format_id}', i18n=False),
+)
+
+STYLE_FORMAT_LINKS = (
+    LinkTemplate('/classification_systems', 'classification_systems', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+    LinkTemplate('/style_formats/{style_format_id}', 'style_format', 'Link to classification systems', i18n=False),
+    LinkTemplate('/style_formats/', 'parent', 'Link to classification systems', i18n=False),
+)
+
+SYSTEM_STYLE_FORMATS_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}/style_formats', 'self',
+                 'Available style formats for {system_id}', i18n=False),
+    LinkTemplate('/classification_systems/{system_id}', 'parent', 'Link to classification system'),
+    LinkTemplate('/classification_systems', 'parent', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+)
+
+SYSTEM_STYLE_FORMATS_ITEM_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}/styles/{style_format_id}', 'style', 'Link to style',
+                 i18n=False),
+)
+
+STYLES_LINKS = (
+    LinkTemplate('/classification_systems/{system_id}/styles/{style_format_id}', 'style', 'style', i18n=False),
+    LinkTemplate('/classification_systems/{system_id}/style_formats', 'self',
+                 'Styles of the classification system {system_id}', i18n=False),
+    LinkTemplate('/classification_systems/{system_id}', 'parent', 'Link to classification system'),
+    LinkTemplate('/classification_systems', 'parent', 'Link to classification systems'),
+    LinkTemplate('/', 'root', 'API landing page'),
+)
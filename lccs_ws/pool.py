@@ -0,0 +1,157 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Database connection pool of Land Cover Classification System Web Service.
+
+The pool of every engine, the primary and the replicas, is a :class:`MonitoredQueuePool`
+configured by the ``LCCS_POOL_*`` variables of :class:`lccs_ws.config.Config`.
+
+With ``LCCS_POOL_SHED`` enabled, a request waits at most ``LCCS_POOL_SHED_WAIT`` seconds for a
+connection. When the pool is saturated for longer, the request fails fast with
+``503 Service Unavailable`` and a ``Retry-After`` header, instead of queuing in the worker.
+"""
+import threading
+import time
+from typing import Dict
+
+from flask import Flask
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStatistics:
+    """Counters of the connections requested to a pool."""
+
+    def __init__(self):
+        """Build empty statistics."""
+        self.requests = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timeout: bool = False):
+        """Record a connection request.
+
+        :param wait: The time, in seconds, waited for the connection.
+        :type wait: float
+        :param timeout: The request timed out.
+        :type timeout: bool
+        """
+        with self._lock:
+            self.requests += 1
+            self.timeouts += int(timeout)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def to_dict(self) -> dict:
+        """Return the statistics as a dictionary."""
+        with self._lock:
+            return dict(
+                requests=self.requests,
+                timeouts=self.timeouts,
+                wait_total=self.wait_total,
+                wait_max=self.wait_max,
+                wait_mean=self.wait_total / self.requests if self.requests else 0.0,
+            )
+
+
+class MonitoredQueuePool(QueuePool):
+    """Queue pool which measures the time waited for each connection."""
+
+    def __init__(self, *args, **kwargs):
+        """Build the pool."""
+        super().__init__(*args, **kwargs)
+        self.statistics = PoolStatistics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.statistics.record(time.perf_counter() - start, timeout=True)
+            raise
+
+        self.statistics.record(time.perf_counter() - start)
+
+        return connection
+
+    def to_dict(self) -> dict:
+        """Return the state and the statistics of the pool."""
+        return dict(
+            size=self.size(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            overflow=max(self.overflow(), 0),
+            max_overflow=self._max_overflow,
+            **self.statistics.to_dict(),
+        )
+
+
+def engine_options(config) -> dict:
+    """Return the pool options of ``SQLALCHEMY_ENGINE_OPTIONS`` from the application settings."""
+    timeout = config['LCCS_POOL_TIMEOUT']
+
+    if config['LCCS_POOL_SHED']:
+        timeout = min(timeout, config['LCCS_POOL_SHED_WAIT'])
+
+    return dict(
+        poolclass=MonitoredQueuePool,
+        pool_size=config['LCCS_POOL_SIZE'],
+        max_overflow=config['LCCS_POOL_MAX_OVERFLOW'],
+        pool_timeout=timeout,
+        pool_pre_ping=config['LCCS_POOL_PRE_PING'],
+        pool_recycle=config['LCCS_POOL_RECYCLE'],
+    )
+
+
+def init_pool(app: Flask):
+    """Configure the connection pool of the database engines.
+
+    The options set explicitly in ``SQLALCHEMY_ENGINE_OPTIONS`` take precedence. SQLite databases keep
+    the pool chosen by Flask-SQLAlchemy.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+
+    options = engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or dict())
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def pool_status(app: Flask, db) -> Dict[str, dict]:
+    """Return the state and the statistics of the pools of the primary and replica engines.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param db: The Flask-SQLAlchemy extension.
+    """
+    binds = [None] + list(app.config.get('SQLALCHEMY_BINDS') or dict())
+    status = dict()
+
+    for bind in binds:
+        pool = db.get_engine(app, bind=bind).pool
+
+        if isinstance(pool, MonitoredQueuePool):
+            status[bind or 'primary'] = pool.to_dict()
+
+    return status
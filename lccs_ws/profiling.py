@@ -0,0 +1,128 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Per-request profiling of Land Cover Classification System Web Service.
+
+With ``LCCS_PROFILING`` enabled, an administrator profiles a request with :mod:`cProfile` by adding
+the ``profile`` argument to its query string:
+
+- ``profile=text`` replaces the response body by the ``LCCS_PROFILING_TOP`` functions of highest
+  cumulative time;
+- ``profile=pstats`` keeps the response and saves the statistics to ``LCCS_PROFILING_DIR``, named
+  in the ``X-LCCS-Profile`` header. The file is read by :mod:`pstats` and by viewers such as
+  snakeviz or flameprof.
+
+The requests must carry a token with the ``admin`` role, validated by :func:`lccs_ws.auth.oauth2`.
+The profile covers the request up to the response, not the body of the streamed responses.
+
+When ``LCCS_PROFILING`` is disabled, the default, no hook is installed.
+"""
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import time
+import uuid
+
+from flask import Flask, abort, g, request
+
+from .auth import oauth2
+
+PROFILE_ARG = 'profile'
+"""Query string argument which enables the profiling of a request."""
+
+PROFILE_HEADER = 'X-LCCS-Profile'
+"""Response header with the name of the saved statistics."""
+
+PROFILE_MODES = ('text', 'pstats')
+"""Outputs of a profile."""
+
+DEFAULT_PROFILING_DIR = os.path.join(tempfile.gettempdir(), 'lccs-ws-profiles')
+"""Default location of the saved statistics."""
+
+
+def _admin(**kwargs):
+    """Accept the requests which passed :func:`lccs_ws.auth.oauth2`."""
+
+
+def start_profile():
+    """Start the profiler of the current request, if requested."""
+    mode = request.args.get(PROFILE_ARG)
+
+    if mode is None:
+        return
+
+    if mode not in PROFILE_MODES:
+        abort(400, f'Invalid {PROFILE_ARG} "{mode}", use one of {", ".join(PROFILE_MODES)}.')
+
+    # Abort the request unless its token has the ``admin`` role.
+    oauth2(roles=['admin'])(_admin)()
+
+    profiler = cProfile.Profile()
+    g.lccs_ws_profile = (mode, profiler)
+    profiler.enable()
+
+
+def stop_profile(app: Flask, response):
+    """Stop the profiler of the current request and return the response with the profile.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param response: The response of the request.
+    :type response: flask.Response
+    """
+    profile = g.pop('lccs_ws_profile', None)
+
+    if profile is None:
+        return response
+
+    mode, profiler = profile
+    profiler.disable()
+
+    if mode == 'pstats':
+        directory = app.config['LCCS_PROFILING_DIR'] or DEFAULT_PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{request.endpoint}-{uuid.uuid4().hex[:8]}.pstats'
+        profiler.dump_stats(os.path.join(directory, name))
+
+        response.headers[PROFILE_HEADER] = name
+
+        return response
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(app.config['LCCS_PROFILING_TOP'])
+
+    return app.response_class(stream.getvalue(), status=response.status_code, mimetype='text/plain')
+
+
+def init_profiling(app: Flask):
+    """Install the profiling hooks, if ``LCCS_PROFILING`` is enabled.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    if not app.config['LCCS_PROFILING']:
+        return
+
+    app.before_request(start_profile)
+
+    @app.after_request
+    def stop_request_profile(response):
+        return stop_profile(app, response)
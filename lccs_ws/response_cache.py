@@ -0,0 +1,149 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Cache of the rendered responses of Land Cover Classification System Web Service.
+
+The read routes are decorated with :func:`cached`, which keeps the encoded body, the status and
+the headers of the successful responses in a :class:`lccs_ws.cache.TaggedCache`. A hit skips
+the database, the serialization and the JSON encoding altogether.
+
+An entry is keyed by the endpoint, the view arguments, the host and the query arguments, which
+include the ``language`` and the ``BDC_LCCS_ARGS`` arguments rendered in the links. It is tagged
+with the records it depends on:
+
+- ``('system', id)``: a classification system, its classes, mappings and styles;
+- ``('systems',)``: the list of classification systems;
+- ``('style_format', id)``: a style format;
+- ``('style_formats',)``: the list of style formats.
+
+The write functions of :mod:`lccs_ws.data` invalidate the tags they change, e.g. editing a class
+only purges the entries of its classification system. The cache is local to the process: the
+other workers are told of the change by :mod:`lccs_ws.invalidation`.
+"""
+from functools import wraps
+from typing import Callable, Hashable, Iterable, NamedTuple
+
+from flask import Flask, current_app, request
+
+from .cache import TaggedCache
+from .routing import use_primary_for
+
+CACHE_HEADER = 'X-LCCS-Cache'
+"""Response header which tells if a response was served from the cache, ``hit`` or ``miss``."""
+
+_BYPASS_ARGS = ('access_token', 'profile')
+"""Query arguments of the requests not cached: the tokens are never kept in memory."""
+
+
+class CachedResponse(NamedTuple):
+    """A rendered response."""
+
+    body: bytes
+    status: int
+    headers: list
+
+
+responses = TaggedCache(max_bytes=0, ttl=0, name='responses')
+"""The cache of the process, disabled until :func:`init_response_cache`."""
+
+
+def cache_key() -> tuple:
+    """Return the cache key of the current request."""
+    return (
+        request.endpoint,
+        tuple(sorted((request.view_args or {}).items())),
+        request.host_url,
+        tuple(sorted(request.args.items(multi=True))),
+    )
+
+
+def cacheable() -> bool:
+    """Tell if the response of the current request may be cached."""
+    if responses.max_bytes <= 0 or any(arg in request.args for arg in _BYPASS_ARGS):
+        return False
+
+    return request.args.get("stream", "false").lower() not in ("true", "1")
+
+
+def cached(tags: Callable[..., Iterable[Hashable]]):
+    """Decorate a read view to cache its successful responses, see :mod:`lccs_ws.response_cache`.
+
+    It must be applied after the authentication decorators, so the cached responses are only
+    served to the authorized requests, and before :func:`lccs_ws.utils.conditional`, whose
+    ``ETag`` is cached with the response and still answered with ``304 Not Modified``.
+
+    :param tags: Function called with the view arguments that returns the tags of the response.
+    """
+    def _cached(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            if not cacheable():
+                return func(*args, **kwargs)
+
+            key = cache_key()
+            entry = responses.get(key)
+
+            if entry is not None:
+                response = current_app.response_class(entry.body, status=entry.status, headers=entry.headers)
+                etag, _ = response.get_etag()
+
+                if etag is not None and request.if_none_match.contains(etag):
+                    response = current_app.response_class(status=304)
+                    response.set_etag(etag)
+
+                response.headers[CACHE_HEADER] = 'hit'
+
+                return response
+
+            # A write committed while the view runs may purge the tags before the response is stored.
+            generation = responses.generation()
+            entry_tags = list(tags(**request.view_args))
+            # The replicas may not have the recent changes yet, see lccs_ws.routing.
+            use_primary_for(entry_tags)
+            response = current_app.make_response(func(*args, **kwargs))
+
+            # The files, e.g. the styles, are sent in passthrough mode: they are read once for the cache.
+            if response.status_code == 200 and (response.direct_passthrough or not response.is_streamed):
+                response.direct_passthrough = False
+                body = response.get_data()
+                headers = [(name, value) for name, value in response.headers.items() if name != 'Content-Length']
+
+                responses.set(key, CachedResponse(body, 200, headers), len(body), entry_tags, generation=generation)
+                response.headers[CACHE_HEADER] = 'miss'
+
+            return response
+
+        return wrapped
+
+    return _cached
+
+
+def init_response_cache(app: Flask):
+    """Size the response cache with ``LCCS_RESPONSE_CACHE_SIZE`` and ``LCCS_RESPONSE_CACHE_TTL``.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    responses.configure(app.config['LCCS_RESPONSE_CACHE_SIZE'], app.config['LCCS_RESPONSE_CACHE_TTL'])
+
+
+def invalidate(*tags: Hashable) -> int:
+    """Remove the cached responses with any of the given tags.
+
+    :returns: The number of removed responses.
+    """
+    return responses.invalidate(*tags)
@@ -0,0 +1,255 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Read replica routing of Land Cover Classification System Web Service.
+
+The replicas are declared as binds named ``replica_<n>`` in ``SQLALCHEMY_BINDS``, see
+``LCCS_REPLICA_URIS`` in :class:`lccs_ws.config.Config`. The :class:`RoutingSession` sends
+the ``SELECT`` statements of ``GET``, ``HEAD`` and ``OPTIONS`` requests to a replica and
+everything else to the primary database:
+
+- write statements and flushes go to the primary and pin the session to the primary until the end
+  of the request, so the data written is read back from the primary;
+- the statements executed out of a request, e.g. by the command line interface, go to the primary;
+- each session uses a single replica, chosen in round-robin among the healthy ones. When no replica
+  is healthy, the primary is used;
+- the reads of the records changed in the last ``LCCS_REPLICA_MAX_LAG`` seconds, by this worker or
+  another one, see :mod:`lccs_ws.invalidation`, go to the primary as well. The replicas may not have
+  received the change yet, and the stale response would be kept by :mod:`lccs_ws.response_cache`.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from flask import Flask, current_app, g, has_request_context, request
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event, literal, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import SelectBase
+
+REPLICA_BIND_PREFIX = 'replica_'
+"""Prefix of the ``SQLALCHEMY_BINDS`` keys of the read replicas."""
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+"""HTTP methods whose requests may read from a replica."""
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """Choose the replica of a session, in round-robin among the healthy replicas.
+
+    A replica is checked with a ``SELECT 1`` when it is first used and then at most once every
+    ``check_interval`` seconds. A replica is also marked unhealthy when one of its connections
+    is lost.
+
+    :param db: The Flask-SQLAlchemy extension.
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param keys: The bind keys of the replicas.
+    :type keys: list
+    :param check_interval: The interval, in seconds, between the health checks of a replica.
+    :type check_interval: float
+    :param max_lag: The time, in seconds, during which the reads of a changed tag go to the primary.
+    :type max_lag: float
+    """
+
+    def __init__(self, db, app: Flask, keys: List[str], check_interval: float, max_lag: float = 0):
+        """Build the router."""
+        self.db = db
+        self.app = app
+        self.keys = list(keys)
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._counter = itertools.count()
+        self._health: Dict[str, Tuple[bool, float]] = dict()
+        self._pinned: Dict[Hashable, float] = dict()
+        self._pinned_all = 0.0
+        self._lock = threading.Lock()
+
+    def engine(self, key: str) -> Engine:
+        """Return the engine of a replica."""
+        engine = self.db.get_engine(self.app, bind=key)
+
+        if not event.contains(engine, 'handle_error', self._handle_error):
+            event.listen(engine, 'handle_error', self._handle_error)
+
+        return engine
+
+    def choose(self) -> Optional[Engine]:
+        """Return the engine of the next healthy replica or ``None`` when all replicas are unhealthy."""
+        for _ in self.keys:
+            key = self.keys[next(self._counter) % len(self.keys)]
+            engine = self.engine(key)
+
+            if self.is_healthy(key, engine):
+                return engine
+
+        return None
+
+    def is_healthy(self, key: str, engine: Engine) -> bool:
+        """Tell if a replica is healthy, checking it when the last check has expired."""
+        now = time.monotonic()
+
+        with self._lock:
+            healthy, checked_at = self._health.get(key, (True, None))
+
+            if checked_at is not None and now - checked_at < self.check_interval:
+                return healthy
+
+            # Reserve the check, so the other threads keep the previous state meanwhile.
+            self._health[key] = (healthy, now)
+
+        healthy = self._ping(key, engine)
+
+        with self._lock:
+            self._health[key] = (healthy, time.monotonic())
+
+        return healthy
+
+    def mark_unhealthy(self, key: str):
+        """Mark a replica as unhealthy until the next check."""
+        with self._lock:
+            self._health[key] = (False, time.monotonic())
+
+    def pin(self, tags: Optional[Iterable[Hashable]]):
+        """Send the reads of changed tags to the primary for ``max_lag`` seconds.
+
+        :param tags: The changed tags, see :mod:`lccs_ws.response_cache`, or ``None`` for all the tags.
+        """
+        now = time.monotonic()
+        until = now + self.max_lag
+
+        with self._lock:
+            if tags is None:
+                self._pinned_all = until
+                self._pinned.clear()
+                return
+
+            self._pinned = {tag: pinned for tag, pinned in self._pinned.items() if pinned > now}
+
+            for tag in tags:
+                self._pinned[tag] = until
+
+    def is_pinned(self, tags: Iterable[Hashable]) -> bool:
+        """Tell if the reads of any of the tags must go to the primary."""
+        now = time.monotonic()
+
+        with self._lock:
+            return self._pinned_all > now or any(self._pinned.get(tag, 0) > now for tag in tags)
+
+    def status(self) -> Dict[str, Optional[bool]]:
+        """Return the health of each replica, ``None`` when it was not checked yet."""
+        with self._lock:
+            return {key: self._health[key][0] if key in self._health else None for key in self.keys}
+
+    def _ping(self, key: str, engine: Engine) -> bool:
+        """Run a ``SELECT 1`` in a replica."""
+        try:
+            with engine.connect() as connection:
+                connection.execute(select([literal(1)])).scalar()
+        except SQLAlchemyError as e:
+            logger.warning(f'Replica {key} is unavailable: {e}')
+            return False
+
+        return True
+
+    def _handle_error(self, context):
+        """Mark the replica of a lost connection as unhealthy."""
+        if not context.is_disconnect:
+            return
+
+        for key in self.keys:
+            if self.db.get_engine(self.app, bind=key) is context.engine:
+                logger.warning(f'Connection to replica {key} lost')
+                self.mark_unhealthy(key)
+
+
+class RoutingSession(SignallingSession):
+    """Flask-SQLAlchemy session that sends the reads of safe requests to a replica.
+
+    Without replicas configured, the session behaves as :class:`flask_sqlalchemy.SignallingSession`.
+    """
+
+    def __init__(self, db, **options):
+        """Build the session."""
+        super().__init__(db, **options)
+        self.use_primary = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None):
+        """Return the engine of a statement."""
+        router = self.app.extensions.get('lccs_ws_replicas')
+
+        if router is None or self.use_primary:
+            return super().get_bind(mapper, clause)
+
+        if self._flushing or not isinstance(clause, SelectBase) or not _is_safe_request() or g.get('lccs_ws_primary'):
+            self.use_primary = True
+            return super().get_bind(mapper, clause)
+
+        if self._replica is None:
+            self._replica = router.choose()
+
+            if self._replica is None:
+                self.use_primary = True
+                return super().get_bind(mapper, clause)
+
+        return self._replica
+
+
+def _is_safe_request() -> bool:
+    """Tell if the current request only reads data."""
+    return has_request_context() and request.method in SAFE_METHODS
+
+
+def pin_to_primary(tags: Iterable[Hashable]):
+    """Send the reads of the tags changed by the current request to the primary, see :meth:`ReplicaRouter.pin`."""
+    router = current_app.extensions.get('lccs_ws_replicas')
+
+    if router is not None:
+        router.pin(tags)
+
+
+def use_primary_for(tags: Iterable[Hashable]):
+    """Send the reads of the current request to the primary when any of its tags changed recently."""
+    router = current_app.extensions.get('lccs_ws_replicas')
+
+    if router is not None and router.is_pinned(tags):
+        g.lccs_ws_primary = True
+
+
+def init_replicas(app: Flask, db):
+    """Route the reads to the replicas declared in ``SQLALCHEMY_BINDS``, if any.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param db: The Flask-SQLAlchemy extension.
+    """
+    binds = app.config.get('SQLALCHEMY_BINDS') or dict()
+    keys = sorted(key for key in binds if key.startswith(REPLICA_BIND_PREFIX))
+
+    if not keys:
+        return
+
+    app.extensions['lccs_ws_replicas'] = ReplicaRouter(db, app, keys, app.config['LCCS_REPLICA_CHECK_INTERVAL'],
+                                                       app.config.get('LCCS_REPLICA_MAX_LAG', 0))
+
+    db.session.session_factory.class_ = RoutingSession
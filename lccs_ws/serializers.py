@@ -0,0 +1,134 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Row serializers of the read endpoints of Land Cover Classification System Web Service.
+
+The marshmallow schemas of :mod:`lccs_ws.forms` validate the payloads of the write endpoints.
+The read endpoints only convert query rows to dictionaries, so they use the serializers of this
+module, which produce the same output as the ``dump`` of the equivalent schema without
+instantiating a schema and running the field machinery for each row.
+"""
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
+
+
+def _integer(value: Any) -> int:
+    """Serialize a value as ``marshmallow.fields.Integer``."""
+    return int(value)
+
+
+def _string(value: Any) -> str:
+    """Serialize a value as ``marshmallow.fields.String``."""
+    return value if type(value) is str else str(value)
+
+
+def _number(value: Any) -> float:
+    """Serialize a value as ``marshmallow.fields.Number``."""
+    return float(value)
+
+
+class RowSerializer:
+    """Serialize query rows, or model instances, to dictionaries.
+
+    The serializer implements the ``dump`` method of a marshmallow schema, so it can be used
+    wherever a schema is expected to dump data.
+
+    :param fields: The pairs of attribute name and converter. ``None`` values are not converted.
+    :param skip_none: Omit the attributes with ``None`` values.
+    :type skip_none: bool
+    """
+
+    def __init__(self, *fields: Tuple[str, Callable[[Any], Any]], skip_none: bool = False):
+        """Build the serializer."""
+        self.names = tuple(name for name, _ in fields)
+        self.converters = tuple(converter for _, converter in fields)
+        self.skip_none = skip_none
+
+        getter = attrgetter(*self.names)
+        self._getter = getter if len(self.names) > 1 else lambda row: (getter(row),)
+
+        item_getter = itemgetter(*self.names)
+        self._item_getter = item_getter if len(self.names) > 1 else lambda row: (item_getter(row),)
+
+    def _dump(self, row: Any, getter: Callable[[Any], tuple] = None) -> dict:
+        """Serialize a single row."""
+        values = (getter or self._getter)(row)
+
+        if self.skip_none:
+            return {
+                name: convert(value)
+                for name, convert, value in zip(self.names, self.converters, values)
+                if value is not None
+            }
+
+        return {
+            name: None if value is None else convert(value)
+            for name, convert, value in zip(self.names, self.converters, values)
+        }
+
+    def dump(self, obj: Union[Any, Iterable[Any]], many: bool = False) -> Union[dict, List[dict]]:
+        """Serialize a row or, with ``many``, a list of rows."""
+        if many:
+            dump = self._dump
+            return [dump(row) for row in obj]
+
+        return self._dump(obj)
+
+    def iter_dump(self, rows: Iterable[Any]) -> Iterator[dict]:
+        """Serialize the rows one by one, as they are iterated, e.g. the rows of a stream."""
+        dump = self._dump
+
+        for row in rows:
+            yield dump(row)
+
+    def dump_records(self, records: Iterable[Any]) -> List[dict]:
+        """Serialize rows whose values are accessed by key, such as the records of asyncpg."""
+        getter = self._item_getter
+        return [self._dump(record, getter) for record in records]
+
+
+classification_system_serializer = RowSerializer(
+    ('id', _integer),
+    ('identifier', _string),
+    ('title', _string),
+    ('name', _string),
+    ('authority_name', _string),
+    ('version', _string),
+    ('description', _string),
+    ('version_successor', _integer),
+    ('version_predecessor', _integer),
+)
+"""Serializer equivalent to :class:`lccs_ws.forms.ClassificationSystemSchema`."""
+
+class_serializer = RowSerializer(
+    ('id', _integer),
+    ('name', _string),
+    ('title', _string),
+    ('code', _string),
+    ('description', _string),
+    ('class_parent_id', _integer),
+    skip_none=True,
+)
+"""Serializer equivalent to :class:`lccs_ws.forms.ClassesSchema`, which omits ``None`` values."""
+
+class_mapping_serializer = RowSerializer(
+    ('source_class_id', _string),
+    ('target_class_id', _string),
+    ('description', _string),
+    ('degree_of_similarity', _number),
+)
+"""Serializer equivalent to :class:`lccs_ws.forms.ClassesMappingSchema`."""
@@ -0,0 +1,339 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Synthetic classification systems of Land Cover Classification System Web Service.
+
+The synthetic data sets are used to measure the service with realistic volumes, see the
+benchmark suite in ``benchmarks/`` and the ``lccs-ws generate`` command. A data set has
+``systems`` classification systems, each one with a class hierarchy and a style, and the mappings
+between the classes of every pair of systems.
+
+The rows are inserted in bulk, with ``COPY`` on PostgreSQL, and generated deterministically: the
+same arguments always produce the same data set.
+"""
+import csv
+import io
+import itertools
+import json
+import math
+from collections import Counter
+from typing import Dict, Iterator, List, NamedTuple, Sequence
+
+from lccs_db.models import (ClassMapping, LucClass, LucClassificationSystem,
+                            StyleFormats, Styles, db)
+
+from . import data
+
+SYNTHETIC_VERSION = '1'
+"""Version of the synthetic classification systems."""
+
+SYNTHETIC_AUTHORITY = 'LCCS-WS synthetic data'
+"""Authority name of the synthetic classification systems."""
+
+_COPY_BATCH_SIZE = 100000
+"""Number of rows of each ``COPY`` on PostgreSQL."""
+
+LANGUAGES = {
+    'en': dict(system='Synthetic classification system {system}', title='Class {number}',
+               description='Class {number} of level {level} of {system}.'),
+    'pt-br': dict(system='Sistema de classificação sintético {system}', title='Classe {number}',
+                  description='Classe {number} do nível {level} de {system}.'),
+    'es': dict(system='Sistema de clasificación sintético {system}', title='Clase {number}',
+               description='Clase {number} del nivel {level} de {system}.'),
+    'fr': dict(system='Système de classification synthétique {system}', title='Classe {number}',
+               description='Classe {number} du niveau {level} de {system}.'),
+}
+"""Templates of the translated titles and descriptions. The other languages use the English ones, tagged."""
+
+
+class SyntheticDataset(NamedTuple):
+    """Identifiers of a synthetic data set."""
+
+    systems_id: List[int]
+    style_format_id: int
+    classes: int
+    mappings: int
+
+    @property
+    def source_id(self) -> int:
+        """The id of the first classification system, the source of the mappings."""
+        return self.systems_id[0]
+
+    @property
+    def target_id(self) -> int:
+        """The id of the second classification system, a target of the mappings."""
+        return self.systems_id[1]
+
+
+def system_name(name: str, index: int) -> str:
+    """Return the name of a synthetic classification system, also the prefix of its class names."""
+    return f'{name}-{index}'
+
+
+def level_sizes(classes: int, depth: int, fanout: int = 4) -> List[int]:
+    """Return the number of classes of each level of a hierarchy.
+
+    Each level has about ``fanout`` times the classes of its parent level.
+
+    :param classes: The total number of classes.
+    :type classes: int
+    :param depth: The number of levels.
+    :type depth: int
+    :param fanout: The average number of children of a class.
+    :type fanout: int
+    """
+    depth = max(1, min(depth, classes))
+    weights = [fanout ** level for level in range(depth)]
+    sizes = [max(1, classes * weight // sum(weights)) for weight in weights]
+    sizes[-1] += classes - sum(sizes)
+
+    return sizes
+
+
+def translations(languages: Sequence[str], template: str, **values) -> Dict[str, str]:
+    """Return a translated text for each language.
+
+    :param languages: The language tags.
+    :type languages: list
+    :param template: The name of the template in :data:`LANGUAGES`.
+    :type template: string
+    :param values: The values of the template.
+    """
+    texts = dict()
+
+    for language in languages:
+        if language in LANGUAGES:
+            texts[language] = LANGUAGES[language][template].format(**values)
+        else:
+            texts[language] = f'[{language}] ' + LANGUAGES['en'][template].format(**values)
+
+    return texts
+
+
+def style_document(name: str, size: int) -> bytes:
+    """Return a Styled Layer Descriptor of about ``size`` bytes.
+
+    :param name: The name of the styled classification system.
+    :type name: string
+    :param size: The document size, in bytes.
+    :type size: int
+    """
+    header = (f'<?xml version="1.0" encoding="UTF-8"?>\n<StyledLayerDescriptor version="1.0.0">'
+              f'<NamedLayer><Name>{name}</Name><UserStyle><FeatureTypeStyle>').encode()
+    footer = b'</FeatureTypeStyle></UserStyle></NamedLayer></StyledLayerDescriptor>\n'
+
+    rules = []
+    length = len(header) + len(footer)
+    index = 0
+
+    while length < size:
+        rule = (f'<Rule><Name>class-{index}</Name><RasterSymbolizer><ColorMap>'
+                f'<ColorMapEntry color="#{index * 2654435761 % 0xFFFFFF:06x}" quantity="{index}"/>'
+                f'</ColorMap></RasterSymbolizer></Rule>').encode()
+        rules.append(rule)
+        length += len(rule)
+        index += 1
+
+    return header + b''.join(rules) + footer
+
+
+def _copy(table, rows: List[dict]):
+    """Write rows to a PostgreSQL table with ``COPY``, through the connection of the session."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for row in rows:
+        writer.writerow([
+            '' if row[column] is None else json.dumps(row[column]) if isinstance(row[column], dict) else row[column]
+            for column in columns
+        ])
+
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(f'COPY {table.fullname} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+    cursor.close()
+
+
+def _insert(table, rows: Iterator[dict]) -> int:
+    """Insert rows in batches and return the number of rows.
+
+    The batches are written with ``COPY`` on PostgreSQL, skipping the compilation of the statements,
+    and with ``executemany`` on the other databases.
+    """
+    copy = db.session.connection().dialect.name == 'postgresql'
+    size = _COPY_BATCH_SIZE if copy else data._INSERT_BATCH_SIZE
+    count = 0
+
+    while True:
+        batch = list(itertools.islice(rows, size))
+
+        if not batch:
+            return count
+
+        if copy:
+            _copy(table, batch)
+        else:
+            db.session.execute(table.insert(), batch)
+
+        count += len(batch)
+
+
+def _create_system(name: str, classes: int, depth: int, fanout: int, languages: Sequence[str]) -> tuple:
+    """Create a classification system and its class hierarchy, level by level.
+
+    :returns: The system id and the class ids, in the order of the class numbers.
+    """
+    system = LucClassificationSystem(name=name, authority_name=SYNTHETIC_AUTHORITY, version=SYNTHETIC_VERSION,
+                                     title_translations=translations(languages, 'system', system=name),
+                                     description_translations=translations(languages, 'system', system=name))
+    db.session.add(system)
+    db.session.flush()
+
+    parents: List[int] = [None]
+    ids: List[int] = []
+    last_id = 0
+
+    for level, size in enumerate(level_sizes(classes, depth, fanout)):
+        first = len(ids)
+
+        _insert(LucClass.__table__, (
+            dict(name=f'{name}-{number}',
+                 code=str(number),
+                 title_translations=translations(languages, 'title', number=number),
+                 description_translations=translations(languages, 'description', number=number, level=level,
+                                                       system=name),
+                 classification_system_id=system.id,
+                 class_parent_id=parents[(number - first) % len(parents)])
+            for number in range(first, first + size)
+        ))
+
+        # The ids of a sequence increase, so the new classes of the system are the ones after the last level.
+        level_ids = [
+            class_id for class_id, in db.session.query(LucClass.id)
+            .filter(LucClass.classification_system_id == system.id, LucClass.id > last_id)
+            .order_by(LucClass.id)
+        ]
+
+        ids.extend(level_ids)
+        parents = level_ids
+        last_id = level_ids[-1]
+
+    return system.id, ids
+
+
+def _mapping_pairs(sources: List[int], targets: List[int], mappings: int) -> Iterator[tuple]:
+    """Generate distinct pairs of source and target classes."""
+    per_source = min(len(targets), math.ceil(mappings / len(sources)))
+    count = 0
+
+    for index, source in enumerate(sources):
+        for offset in range(per_source):
+            if count == mappings:
+                return
+
+            yield source, targets[(index * 7 + offset) % len(targets)]
+            count += 1
+
+
+def generate(name: str = 'synthetic', systems: int = 2, classes: int = 10000, depth: int = 5, fanout: int = 4,
+             mappings: int = 100000, languages: Sequence[str] = ('en', 'pt-br'),
+             style_size: int = 4 * 1024 * 1024) -> SyntheticDataset:
+    """Create a synthetic data set in the database. Must be called in the application context.
+
+    The classification systems are named ``<name>-<index>``, with the version ``1``, and their
+    classes ``<name>-<index>-<number>``. The style format is named ``<name>``.
+
+    :param name: The prefix of the classification systems and the name of the style format.
+    :type name: string
+    :param systems: The number of classification systems.
+    :type systems: int
+    :param classes: The number of classes of each classification system.
+    :type classes: int
+    :param depth: The number of levels of the class hierarchies.
+    :type depth: int
+    :param fanout: The average number of children of a class.
+    :type fanout: int
+    :param mappings: The number of mappings of each pair of classification systems, from the first to the
+        second system of the pair. At most ``classes ** 2``.
+    :type mappings: int
+    :param languages: The languages of the titles and descriptions.
+    :type languages: list
+    :param style_size: The size, in bytes, of the style of each classification system.
+    :type style_size: int
+    """
+    with db.session.begin_nested():
+        created = [_create_system(system_name(name, index), classes, depth, fanout, languages)
+                   for index in range(systems)]
+
+        count = 0
+
+        for index, (_, sources) in enumerate(created):
+            for _, targets in created[index + 1:]:
+                count += _insert(ClassMapping.__table__, (
+                    dict(source_class_id=source, target_class_id=target, description=f'Synthetic mapping {number}',
+                         degree_of_similarity=round((number * 37 % 101) / 100, 2))
+                    for number, (source, target) in enumerate(_mapping_pairs(sources, targets, mappings))
+                ))
+
+        style_format = StyleFormats(name=name)
+        db.session.add(style_format)
+        db.session.flush()
+
+        for index, (system_id, _) in enumerate(created):
+            db.session.add(Styles(classification_system_id=system_id, style_format_id=style_format.id,
+                                  mime_type='text/xml', style=style_document(system_name(name, index), style_size)))
+
+    db.session.commit()
+
+    data._changed(('systems',), ('style_formats',))
+
+    if db.session.connection().dialect.name == 'postgresql':
+        # Refresh the planner statistics, which do not cover the rows copied in bulk yet.
+        for table in (LucClass.__table__, ClassMapping.__table__):
+            db.session.execute(f'ANALYZE {table.fullname}')
+
+        db.session.commit()
+
+    return SyntheticDataset([system_id for system_id, _ in created], style_format.id, classes, count)
+
+
+def remove(name: str = 'synthetic') -> Dict[str, int]:
+    """Remove a synthetic data set from the database. Must be called in the application context.
+
+    :param name: The name given to :func:`generate`.
+    :type name: string
+    :returns: The number of deleted rows of each table.
+    """
+    deleted = Counter()
+
+    systems = db.session.query(LucClassificationSystem.id, LucClassificationSystem.name) \
+        .filter(LucClassificationSystem.authority_name == SYNTHETIC_AUTHORITY,
+                LucClassificationSystem.name.like(f'{name}-%')) \
+        .all()
+
+    for system_id, system in systems:
+        # Skip the data sets of other names sharing the prefix, e.g. ``<name>-write-0``.
+        if system[len(name) + 1:].isdigit():
+            deleted.update(data.delete_classification_system(str(system_id)))
+
+    if db.session.query(StyleFormats.id).filter(StyleFormats.name == name).first():
+        data.delete_style_format(name)
+        deleted['style_formats'] += 1
+
+    return dict(deleted)
@@ -0,0 +1,293 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Tracing of Land Cover Classification System Web Service with OpenTelemetry.
+
+With the ``tracing`` extra installed and ``LCCS_TRACING`` enabled, each request is traced with
+`OpenTelemetry <https://opentelemetry.io>`_ spans:
+
+- a ``SERVER`` span for the route, e.g. ``GET /classification_systems/<system_id_or_identifier>``,
+  child of the W3C ``traceparent`` header of the request, if any;
+- a span for each function of :mod:`lccs_ws.data`, e.g. ``data.get_mapping``;
+- a span for each serialization of the rows, e.g. ``serialize.ClassesSchema``;
+- a span for the validation of the access token by :func:`lccs_ws.auth.oauth2`;
+- a ``CLIENT`` span for each SQL statement.
+
+The traces are sampled by ``LCCS_TRACING_SAMPLE_RATIO``, respecting the decision of the caller in
+``traceparent``, and exported according to ``LCCS_TRACING_EXPORTER``: ``console`` writes the spans
+as JSON to the standard output, ``file`` appends them, one per line, to ``LCCS_TRACING_FILE`` and
+``otlp`` sends them to an OpenTelemetry collector, configured by the ``OTEL_EXPORTER_OTLP_*``
+environment variables (requires ``opentelemetry-exporter-otlp-proto-http``).
+
+When tracing is disabled, the default, no hook is installed. The asynchronous reads of
+:mod:`lccs_ws.asgi` are served by the Flask application while tracing is enabled.
+"""
+import os
+from functools import wraps
+from types import ModuleType
+from typing import Optional
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .version import __version__
+
+try:
+    from opentelemetry import context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (BatchSpanProcessor,
+                                                ConsoleSpanExporter)
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover
+    trace = None
+
+tracer = None
+"""The tracer of the service, ``None`` when tracing is disabled."""
+
+STATEMENT_MAX_LENGTH = 2000
+"""Maximum length of the ``db.statement`` attribute."""
+
+
+def _span_json(span) -> str:
+    """Return a span as a line of JSON."""
+    return span.to_json(indent=None) + os.linesep
+
+
+def create_exporter(app: Flask):
+    """Return the span exporter of ``LCCS_TRACING_EXPORTER``.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    """
+    exporter = app.config['LCCS_TRACING_EXPORTER']
+
+    if exporter == 'console':
+        return ConsoleSpanExporter(formatter=_span_json)
+
+    if exporter == 'file':
+        return ConsoleSpanExporter(out=open(app.config['LCCS_TRACING_FILE'], 'a'), formatter=_span_json)
+
+    if exporter == 'otlp':
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import \
+            OTLPSpanExporter
+
+        return OTLPSpanExporter()
+
+    raise ValueError(f'Invalid LCCS_TRACING_EXPORTER "{exporter}". Use console, file or otlp.')
+
+
+def create_tracer_provider(app: Flask, exporter=None) -> 'TracerProvider':
+    """Create the tracer provider of the service.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param exporter: The span exporter. Defaults to the exporter of ``LCCS_TRACING_EXPORTER``.
+    """
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': 'lccs-ws', 'service.version': __version__}),
+        sampler=ParentBased(TraceIdRatioBased(app.config['LCCS_TRACING_SAMPLE_RATIO'])),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter or create_exporter(app)))
+
+    return provider
+
+
+def start_span(name: str, **attributes):
+    """Start a span which is not the current one, e.g. the validation of a token, or return ``None``."""
+    if tracer is None:
+        return None
+
+    return tracer.start_span(name, attributes=attributes)
+
+
+def end_span(current, error: Optional[BaseException] = None):
+    """End a span of :func:`start_span`, if any, recording the error that ended it."""
+    if current is None:
+        return
+
+    if error is not None:
+        current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR))
+
+    current.end()
+
+
+def traced(name: str, function):
+    """Return a function traced in a span named ``name``."""
+    if getattr(function, '__lccs_ws_traced__', False):
+        return function
+
+    @wraps(function)
+    def wrapped(*args, **kwargs):
+        if tracer is None:
+            return function(*args, **kwargs)
+
+        with tracer.start_as_current_span(name):
+            return function(*args, **kwargs)
+
+    wrapped.__lccs_ws_traced__ = True
+
+    return wrapped
+
+
+def instrument_module(module: ModuleType, prefix: str):
+    """Trace the public functions defined in a module, e.g. ``data.get_mapping``.
+
+    The callers must look the functions up in the module, e.g. ``data.get_mapping()``.
+    """
+    for name, value in list(vars(module).items()):
+        if callable(value) and not name.startswith('_') and getattr(value, '__module__', None) == module.__name__ \
+                and not isinstance(value, type):
+            setattr(module, name, traced(f'{prefix}.{name}', value))
+
+
+def instrument_serializers():
+    """Trace the ``dump`` of the row serializers and of the marshmallow schemas of the service.
+
+    The ``iter_dump`` of the row serializers, which serializes the streams row by row, is not traced:
+    a span per row would outnumber the rows of the response.
+    """
+    from . import forms, serializers
+
+    serializers.RowSerializer.dump = traced('serialize.rows', serializers.RowSerializer.dump)
+
+    for name, value in vars(forms).items():
+        if isinstance(value, type) and value.__module__ == forms.__name__ and hasattr(value, 'dump'):
+            value.dump = traced(f'serialize.{name}', value.dump)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context_, executemany):
+    if tracer is None or context_ is None:
+        return
+
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+
+    context_._lccs_ws_span = tracer.start_span(
+        f'db.{operation.lower() or "statement"}',
+        kind=SpanKind.CLIENT,
+        attributes={
+            'db.system': conn.dialect.name,
+            'db.operation': operation,
+            'db.statement': ' '.join(statement.split())[:STATEMENT_MAX_LENGTH],
+        }
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context_, executemany):
+    current = getattr(context_, '_lccs_ws_span', None)
+
+    if current is not None:
+        current.end()
+        context_._lccs_ws_span = None
+
+
+def _handle_error(exception_context):
+    current = getattr(exception_context.execution_context, '_lccs_ws_span', None)
+
+    if current is not None:
+        current.record_exception(exception_context.original_exception)
+        current.set_status(Status(StatusCode.ERROR))
+        current.end()
+        exception_context.execution_context._lccs_ws_span = None
+
+
+def _listen_statements():
+    """Trace the statements of all engines."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+
+def start_request_span():
+    """Start the span of the current request, child of its ``traceparent``."""
+    parent = propagate.extract(request.headers)
+    route = request.url_rule.rule if request.url_rule is not None else request.path
+
+    current = tracer.start_span(
+        f'{request.method} {route}',
+        context=parent,
+        kind=SpanKind.SERVER,
+        attributes={
+            'http.method': request.method,
+            'http.route': route,
+            'http.target': request.full_path.rstrip('?'),
+            'http.scheme': request.scheme,
+            'http.host': request.host,
+        }
+    )
+
+    g.lccs_ws_span = (current, context.attach(trace.set_span_in_context(current)))
+
+
+def end_request_span(error: Optional[BaseException] = None):
+    """End the span of the current request."""
+    current, token = g.pop('lccs_ws_span', (None, None))
+
+    if current is None:
+        return
+
+    end_span(current, error)
+    context.detach(token)
+
+
+def init_tracing(app: Flask, exporter=None):
+    """Trace the requests, if ``LCCS_TRACING`` is enabled and OpenTelemetry is installed.
+
+    :param app: The Flask application.
+    :type app: flask.Flask
+    :param exporter: The span exporter. Defaults to the exporter of ``LCCS_TRACING_EXPORTER``.
+    """
+    global tracer
+
+    if not app.config['LCCS_TRACING']:
+        return
+
+    if trace is None:
+        app.logger.warning('LCCS_TRACING is enabled but OpenTelemetry is not installed, see the tracing extra.')
+        return
+
+    from . import data
+
+    provider = create_tracer_provider(app, exporter)
+    tracer = provider.get_tracer('lccs_ws', __version__)
+    app.extensions['lccs_ws_tracer_provider'] = provider
+
+    instrument_module(data, 'data')
+    instrument_serializers()
+    _listen_statements()
+
+    app.before_request(start_request_span)
+
+    @app.after_request
+    def set_request_status(response):
+        current, _ = g.get('lccs_ws_span', (None, None))
+
+        if current is not None:
+            current.set_attribute('http.status_code', response.status_code)
+
+            if response.status_code >= 500:
+                current.set_status(Status(StatusCode.ERROR))
+
+        return response
+
+    @app.teardown_request
+    def end_request(error=None):
+        end_request_span(error=error)
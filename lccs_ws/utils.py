@@ -17,3 +17,55 @@
 #
 
 """Utility functions Land Cover Classification System Web Service."""
+import hashlib
+from functools import wraps
+from typing import Callable
+
+from flask import current_app, request
+
+
+def make_etag(version: str, full_path: str = None) -> str:
+    """Return a strong entity tag for the current request and a content version.
+
+    The request path and query string are part of the tag since they define
+    the links and the language of the response.
+
+    :param version: The version of the content used to build the response.
+    :type version: string
+    :param full_path: The request path with the query string. Defaults to the path of the current request.
+    :type full_path: string
+    """
+    value = f'{version}|{full_path or request.full_path}'
+
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def conditional(version: Callable[..., str]):
+    """Decorate a view to support conditional requests with ``ETag`` and ``If-None-Match``.
+
+    The content version is computed before the view runs. When the client already
+    has the current representation a ``304 Not Modified`` response is returned
+    without executing the view.
+
+    :param version: Function called with the view arguments that returns the content version.
+    """
+    def _conditional(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            etag = make_etag(version(**request.view_args))
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = current_app.make_response(func(*args, **kwargs))
+
+            if response.status_code == 200:
+                response.set_etag(etag)
+
+            return response
+
+        return wrapped
+
+    return _conditional
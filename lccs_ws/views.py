@@ -16,11 +16,12 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
 #
 """Views of Land Cover Classification System Web Service."""
-from bdc_auth_client.decorators import oauth2
-from flask import abort, current_app, jsonify, request, send_file
+from flask import (abort, current_app, json, jsonify, request, send_file,
+                   stream_with_context)
 from lccs_db.config import Config as Config_db
+from lccs_db.models import db
 from lccs_db.utils import language
-from werkzeug.urls import url_encode
+from werkzeug.urls import url_encode, url_quote
 
 from lccs_ws.forms import (ClassesMappingMetadataSchema, ClassesSchema,
                            ClassificationSystemMetadataSchema,
@@ -28,7 +29,20 @@ from lccs_ws.forms import (ClassesMappingMetadataSchema, ClassesSchema,
                            StyleFormatsMetadataSchema, StyleFormatsSchema)
 
 from . import data
+from .auth import auth_status, oauth2
 from .config import Config
+from .links import (CLASS_LINKS, CLASSES_ITEM_LINKS, CLASSES_LINKS,
+                    CLASSIFICATION_SYSTEM_LINKS,
+                    CLASSIFICATION_SYSTEMS_ITEM_LINKS,
+                    CLASSIFICATION_SYSTEMS_LINKS, LINKS_MODES,
+                    MAPPING_ITEM_LINKS, MAPPINGS_ITEM_LINKS, MAPPINGS_LINKS,
+                    ROOT_LINKS, STYLE_FORMAT_LINKS, STYLE_FORMATS_ITEM_LINKS,
+                    STYLE_FORMATS_LINKS, STYLES_LINKS,
+                    SYSTEM_STYLE_FORMATS_ITEM_LINKS,
+                    SYSTEM_STYLE_FORMATS_LINKS, Links)
+from .pool import pool_status
+from .response_cache import cached, responses
+from .utils import conditional
 
 BASE_URL = Config.LCCS_URL
 
@@ -37,6 +51,7 @@ BASE_URL = Config.LCCS_URL
 def before_request():
     """Handle for before request processing."""
     request.assets_kwargs = None
+    request.intern_kwargs = None
 
     if Config.BDC_LCCS_ARGS:
         assets_kwargs = {arg: request.args.get(arg) for arg in Config.BDC_LCCS_ARGS.split(",")}
@@ -51,34 +66,91 @@ def before_request():
         intern_kwargs = "&" + url_encode(intern_kwargs) if url_encode(intern_kwargs) else ""
         request.intern_kwargs = intern_kwargs
 
+    links_mode = request.args.get("links", "full")
+    if links_mode not in LINKS_MODES:
+        abort(400, f"Invalid links mode {links_mode}. Use one of: {', '.join(LINKS_MODES)}.")
+
+    request.links = Links(BASE_URL, request.assets_kwargs, request.intern_kwargs, mode=links_mode)
+
+
+def _pagination_args() -> dict:
+    """Parse the keyset pagination arguments ``limit``, ``cursor`` and ``count`` of the request."""
+    limit = request.args.get("limit")
+
+    if limit is not None:
+        if not limit.isdigit() or not 0 < int(limit) <= Config.LCCS_MAX_PAGE_SIZE:
+            abort(400, f"Invalid limit {limit}. It must be between 1 and {Config.LCCS_MAX_PAGE_SIZE}.")
+        limit = int(limit)
+
+    count = request.args.get("count", "false").lower() in ("true", "1")
+
+    return dict(limit=limit, cursor=request.args.get("cursor"), count=count)
+
+
+def _deleted(message: str, deleted: dict):
+    """Return the response of a delete operation.
+
+    The number of deleted rows of each table is sent in the ``X-Deleted-Rows`` header,
+    since a ``204 No Content`` response has no body.
+    """
+    header = ", ".join(f"{table}={count}" for table, count in deleted.items())
+
+    return {'message': message, 'deleted': deleted}, 204, {"X-Deleted-Rows": header}
+
+
+def _streaming() -> bool:
+    """Tell if the client asked for a streaming response with the ``stream`` argument."""
+    return request.args.get("stream", "false").lower() in ("true", "1")
+
+
+def _json_stream(items, buffer_size: int = 65536):
+    """Return a response that encodes a JSON array incrementally.
+
+    The items are encoded one by one and sent in chunks of about ``buffer_size`` characters.
+    """
+    def generate():
+        chunk = ["["]
+        size = 0
+
+        for index, item in enumerate(items):
+            encoded = json.dumps(item, separators=(",", ":"))
+            chunk.append(f",{encoded}" if index else encoded)
+            size += len(encoded)
+
+            if size >= buffer_size:
+                yield "".join(chunk)
+                chunk, size = [], 0
+
+        chunk.append("]")
+        yield "".join(chunk)
+
+    return current_app.response_class(stream_with_context(generate()), mimetype="application/json")
+
+
+def _paginated(response, page: data.Page):
+    """Add the ``Link`` header of the next page and the ``X-Total-Count`` header to a response."""
+    response = current_app.make_response(response)
+
+    if page.next_cursor is not None:
+        args = request.args.copy()
+        args["cursor"] = page.next_cursor
+        response.headers.add("Link", f'<{BASE_URL}{url_quote(request.path)}?{url_encode(args)}>; rel="next"')
+
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+
+    return response
+
 
 @current_app.route("/", methods=["GET"])
 @oauth2(required=False)
+@cached(lambda: [])
+@conditional(lambda: Config.BDC_LCCS_API_VERSION)
 def root(**kwargs):
     """URL Handler for Land User Cover Classification System through REST API."""
-    links = list()
     response = dict()
 
-    links += [
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "self",
-            "type": "application/json",
-            "title": "Link to this document"
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "classification_systems", "type": "application/json",
-            "title": "Information about Classification Systems",
-        },
-        {
-            "href": f"{BASE_URL}/style_formats{request.assets_kwargs}",
-            "rel": "style_formats", "type": "application/json",
-            "title": "Information about Style Formats"
-        }
-    ]
-
-    response["links"] = links
+    response["links"] = request.links.render_all(ROOT_LINKS)
     response["application_name"] = "Land Cover Classification System Service"
     response["version"] = Config.BDC_LCCS_API_VERSION
 
@@ -95,45 +167,20 @@ def root(**kwargs):
 @current_app.route("/classification_systems", methods=["GET"])
 @oauth2(required=False)
 @language()
+@cached(lambda: [('systems',)])
+@conditional(lambda: data.get_systems_version())
 def get_classification_systems(**kwargs):
     """Retrieve the list of available classification systems in the service."""
-    classification_systems_list = data.get_classification_systems()
+    return render_classification_systems(data.get_classification_systems())
+
+
+def render_classification_systems(classification_systems_list: list):
+    """Return the response of the classification systems list."""
+    shared_links = request.links.shared(CLASSIFICATION_SYSTEMS_LINKS)
 
     for class_system in classification_systems_list:
-        links = [
-            {
-                "href": f"{BASE_URL}/classification_systems/{class_system['id']}{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "classification_system",
-                "type": "application/json",
-                "title": "Link to Classification System",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{class_system['id']}/classes{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "classes",
-                "type": "application/json",
-                "title": "Link to Classification System Classes",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{class_system['id']}/style_formats{request.assets_kwargs}",
-                "rel": "style_formats",
-                "type": "application/json",
-                "title": "Link to Available Style Formats",
-            },
-            {
-                "href": f"{BASE_URL}/mappings/{class_system['id']}{request.assets_kwargs}",
-                "rel": "mappings",
-                "type": "application/json",
-                "title": "Link to Classification Mappings",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "self",
-                "type": "application/json",
-                "title": "Link to this document",
-            },
-        ]
-
-        class_system["links"] = links
+        request.links.attach(class_system, shared_links, *CLASSIFICATION_SYSTEMS_ITEM_LINKS,
+                             system_id=class_system['id'])
 
     return jsonify(classification_systems_list), 200
 
@@ -141,116 +188,73 @@ def get_classification_systems(**kwargs):
 @current_app.route("/classification_systems/<system_id_or_identifier>", methods=["GET"])
 @language()
 @oauth2(required=False)
+@cached(lambda system_id_or_identifier: data.system_tags(system_id_or_identifier))
+@conditional(lambda system_id_or_identifier: data.get_system_version(system_id_or_identifier))
 def get_classification_system(system_id_or_identifier, **kwargs):
     """Retrieve information about the classification system.
 
     :param system_id_or_identifier: The id or identifier of a classification system
     """
-    classification_system = data.get_classification_system(system_id_or_identifier)
+    return render_classification_system(data.get_classification_system(system_id_or_identifier))
 
+
+def render_classification_system(classification_system: dict):
+    """Return the response of a classification system."""
     if not classification_system:
         abort(404, "Classification System not found.")
 
-    links = [
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to this document",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems/{classification_system['id']}{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "self",
-            "type": "application/json",
-            "title": "The classification_system",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems/{classification_system['id']}/classes{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "classes",
-            "type": "application/json",
-            "title": "The classes related to this item",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems/{classification_system['id']}/style_formats{request.assets_kwargs}",
-            "rel": "styles_formats",
-            "type": "application/json",
-            "title": "The styles formats related to this item",
-        },
-        {
-            "href": f"{BASE_URL}/mappings/{classification_system['id']}{request.assets_kwargs}",
-            "rel": "mappings",
-            "type": "application/json",
-            "title": "The classification system mappings",
-        },
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "root",
-            "type": "application/json",
-            "title": "API landing page."
-        },
-    ]
-
-    classification_system["links"] = links
+    request.links.attach(classification_system, [], *CLASSIFICATION_SYSTEM_LINKS,
+                         system_id=classification_system['id'])
 
     return classification_system, 200
 
 
 @current_app.route("/classification_systems/<system_id_or_identifier>/classes", methods=["GET"])
 @oauth2(required=False)
+@cached(lambda system_id_or_identifier: data.system_tags(system_id_or_identifier))
+@conditional(lambda system_id_or_identifier: data.get_system_version(system_id_or_identifier))
 def classification_systems_classes(system_id_or_identifier, **kwargs):
     """Retrieve the classes of a classification system.
     
     :param system_id_or_identifier: The id or identifier of a classification system
     """
-    system_id, classes_list = data.get_classification_system_classes(system_id_or_identifier)
-
-    links = [
-        {
-            "href": f"{BASE_URL}/classification_systems/{system_id}/classes{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "self",
-            "type": "application/json",
-            "title": f"Classes of the classification system {system_id}{request.assets_kwargs}",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems/{system_id}{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to classification system",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "root",
-            "type": "application/json",
-            "title": "API landing page",
-        },
-    ]
+    if _streaming():
+        system_id, classes = data.iter_classification_system_classes(system_id_or_identifier,
+                                                                     cursor=request.args.get("cursor"))
+        shared_links = request.links.shared(CLASSES_LINKS, system_id=system_id)
+
+        return _json_stream(
+            request.links.attach(system_classes, shared_links, *CLASSES_ITEM_LINKS,
+                                 system_id=system_id, class_id=system_classes['id'])
+            for system_classes in classes
+        )
+
+    system_id, page = data.get_classification_system_classes(system_id_or_identifier, **_pagination_args())
+
+    return render_classification_system_classes(system_id, page)
+
+
+def render_classification_system_classes(system_id: int, page: data.Page):
+    """Return the response of a page of classes of a classification system."""
+    classes_list = page.items
 
     if not len(classes_list) > 0:
-        return jsonify(links)
+        return _paginated(jsonify(request.links.render_all(CLASSES_LINKS, system_id=system_id)), page)
+
+    shared_links = request.links.shared(CLASSES_LINKS, system_id=system_id)
 
     for system_classes in classes_list:
-        system_classes["links"] = links
-        system_classes["links"].append(
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}/classes/{system_classes['id']}{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "child",
-                "type": "application/json",
-                "title": "Classification System Class",
-            }
-        )
+        request.links.attach(system_classes, shared_links, *CLASSES_ITEM_LINKS,
+                             system_id=system_id, class_id=system_classes['id'])
 
-    return jsonify(classes_list), 200
+    return _paginated((jsonify(classes_list), 200), page)
 
 
 @current_app.route("/classification_systems/<system_id_or_identifier>/classes/<class_id_or_name>", methods=["GET"])
 @oauth2(required=False)
 @language()
+@cached(lambda system_id_or_identifier, **_: data.system_tags(system_id_or_identifier))
+@conditional(lambda system_id_or_identifier, **_: data.get_system_version(system_id_or_identifier))
 def classification_systems_class(system_id_or_identifier, class_id_or_name, **kwargs):
     """Retrieve class information from a classification system.
 
@@ -259,38 +263,15 @@ def classification_systems_class(system_id_or_identifier, class_id_or_name, **kw
     """
     system_id, class_info = data.get_classification_system_class(system_id_or_identifier, class_id_or_name)
 
+    return render_classification_system_class(system_id, class_info)
+
+
+def render_classification_system_class(system_id: int, class_info: dict):
+    """Return the response of a class of a classification system."""
     if not len(class_info) > 0:
         abort(404, f"Class not found.")
 
-    links = [
-        {
-            "href": f"{BASE_URL}/classification_systems/{system_id}/classes/{class_info['id']}{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "self",
-            "type": "application/json",
-            "title": "Link to this document",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems/{system_id}/classes{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to this document",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "classification_systems",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "root",
-            "type": "application/json",
-            "title": "API landing page",
-        },
-
-    ]
-
-    class_info["links"] = links
+    request.links.attach(class_info, [], *CLASS_LINKS, system_id=system_id, class_id=class_info['id'])
 
     return class_info, 200
 
@@ -298,6 +279,8 @@ def classification_systems_class(system_id_or_identifier, class_id_or_name, **kw
 @current_app.route("/mappings/<system_id_or_identifier>", methods=["GET"])
 @oauth2(required=False)
 @language()
+@cached(lambda system_id_or_identifier: data.system_tags(system_id_or_identifier))
+@conditional(lambda system_id_or_identifier: data.get_system_version(system_id_or_identifier))
 def get_mappings(system_id_or_identifier, **kwargs):
     """Retrieve available mappings for a classification system.
 
@@ -305,35 +288,18 @@ def get_mappings(system_id_or_identifier, **kwargs):
     """
     system_source, system_target = data.get_mappings(system_id_or_identifier)
 
-    if not len(system_target) > 0:
+    return render_mappings(system_source.id, [sys.id for sys in system_target])
+
+
+def render_mappings(system_id_source: int, systems_id_target: list):
+    """Return the response of the mappings available for a classification system."""
+    if not len(systems_id_target) > 0:
         abort(404, f"Mappings not found.")
 
-    links = list()
-
-    links += [
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "root",
-            "type": "application/json",
-            "title": "API landing page",
-        },
-    ]
-
-    for sys in system_target:
-        links.append(
-            {
-                "href": f"{BASE_URL}/mappings/{system_source.id}/{sys.id}{request.assets_kwargs}",
-                "rel": "child",
-                "type": "application/json",
-                "title": "Mapping",
-            }
-        )
+    links = request.links.render_all(MAPPINGS_LINKS)
+
+    for system_id_target in systems_id_target:
+        links += request.links.render_all(MAPPINGS_ITEM_LINKS, source_id=system_id_source, target_id=system_id_target)
 
     return jsonify(links)
 
@@ -341,72 +307,67 @@ def get_mappings(system_id_or_identifier, **kwargs):
 @current_app.route("/mappings/<system_id_or_identifier_source>/<system_id_or_identifier_target>", methods=["GET"])
 @oauth2(required=False)
 @language()
+@cached(lambda system_id_or_identifier_source, system_id_or_identifier_target:
+        data.system_tags(system_id_or_identifier_source, system_id_or_identifier_target))
+@conditional(lambda system_id_or_identifier_source, system_id_or_identifier_target:
+             data.get_system_version(system_id_or_identifier_source, system_id_or_identifier_target))
 def get_mapping(system_id_or_identifier_source, system_id_or_identifier_target, **kwargs):
     """Retrieve mapping.
 
     :param system_id_or_identifier_source: The id or identifier of source classification system
     :param system_id_or_identifier_target: The id or identifier of target classification system
     """
-    system_id_source, system_id_target, mappings = data.get_mapping(system_id_or_identifier_source,
-                                                                    system_id_or_identifier_target)
+    if _streaming():
+        system_id_source, system_id_target, mappings = data.iter_mapping(system_id_or_identifier_source,
+                                                                         system_id_or_identifier_target,
+                                                                         cursor=request.args.get("cursor"))
+
+        return _json_stream(
+            request.links.attach(mp, [], *MAPPING_ITEM_LINKS,
+                                 source_id=system_id_source, source_class_id=mp['source_class_id'],
+                                 target_id=system_id_target, target_class_id=mp['target_class_id'])
+            for mp in mappings
+        )
+
+    system_id_source, system_id_target, page = data.get_mapping(system_id_or_identifier_source,
+                                                                system_id_or_identifier_target,
+                                                                **_pagination_args())
+
+    return render_mapping(system_id_source, system_id_target, page)
+
+
+def render_mapping(system_id_source: int, system_id_target: int, page: data.Page):
+    """Return the response of a page of mappings between two classification systems."""
+    mappings = page.items
 
     for mp in mappings:
-        links = [
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id_source}/classes/{mp['source_class_id']}{request.assets_kwargs}",
-                "rel": "item",
-                "type": "application/json",
-                "title": "Link to source class",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id_target}/classes/{mp['target_class_id']}{request.assets_kwargs}",
-                "rel": "item",
-                "type": "application/json",
-                "title": "Link to target class",
-            },
-        ]
-        if mp["degree_of_similarity"] is not None:
-            mp["degree_of_similarity"] = float(mp["degree_of_similarity"])
-        mp["links"] = links
-
-    return jsonify(mappings)
+        request.links.attach(mp, [], *MAPPING_ITEM_LINKS,
+                             source_id=system_id_source, source_class_id=mp['source_class_id'],
+                             target_id=system_id_target, target_class_id=mp['target_class_id'])
+
+    return _paginated(jsonify(mappings), page)
 
 
 @current_app.route("/style_formats", methods=["GET"])
 @oauth2(required=True)
+@cached(lambda: [('style_formats',)])
+@conditional(lambda: data.get_style_formats_version())
 def get_styles_formats(**kwargs):
     """Retrieve available style formats in service."""
     styles_formats = data.get_style_formats()
 
+    shared_links = request.links.shared(STYLE_FORMATS_LINKS)
+
     for st_f in styles_formats:
-        links = [
-            {
-                "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "parent",
-                "type": "application/json",
-                "title": "Link to classification systems",
-            },
-            {
-                "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "root",
-                "type": "application/json",
-                "title": "API landing page",
-            },
-            {
-                "href": f"{BASE_URL}/style_formats/{st_f['id']}{request.assets_kwargs}",
-                "rel": "items",
-                "type": "application/json",
-                "title": f"Link to style format {st_f['id']}"
-            }
-        ]
-
-        st_f["links"] = links
+        request.links.attach(st_f, shared_links, *STYLE_FORMATS_ITEM_LINKS, style_format_id=st_f['id'])
 
     return jsonify(styles_formats)
 
 
 @current_app.route("/style_formats/<style_format_id_or_name>", methods=["GET"])
 @oauth2(required=True)
+@cached(lambda style_format_id_or_name: data.style_format_tags(style_format_id_or_name))
+@conditional(lambda **_: data.get_style_formats_version())
 def get_style_format(style_format_id_or_name, **kwargs):
     """Retrieve information of a style formats.
 
@@ -417,40 +378,15 @@ def get_style_format(style_format_id_or_name, **kwargs):
     if not len(styles_format) > 0:
         abort(404, f"Style Format not found.")
 
-    links = [
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "classification_systems",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "root",
-            "type": "application/json",
-            "title": "API landing page",
-        },
-        {
-            "href": f"{BASE_URL}/style_formats/{styles_format['id']}{request.assets_kwargs}",
-            "rel": "style_format",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-        {
-            "href": f"{BASE_URL}/style_formats/{request.assets_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-    ]
-
-    styles_format["links"] = links
+    request.links.attach(styles_format, [], *STYLE_FORMAT_LINKS, style_format_id=styles_format['id'])
 
     return styles_format
 
 
 @current_app.route("/classification_systems/<system_id_or_identifier>/style_formats", methods=["GET"])
 @oauth2(required=True)
+@cached(lambda system_id_or_identifier: data.system_tags(system_id_or_identifier) + [('style_formats',)])
+@conditional(lambda system_id_or_identifier: data.get_system_version(system_id_or_identifier))
 def get_style_formats_classification_system(system_id_or_identifier, **kwargs):
     """Retrieve available style formats for a classification system.
 
@@ -461,44 +397,11 @@ def get_style_formats_classification_system(system_id_or_identifier, **kwargs):
     if not len(style_formats_id) > 0:
         abort(404, f"Style Formats not found.")
 
-    links = list()
-
-    links += [
-        {
-            "href": f"{BASE_URL}/classification_systems/{system_id}/style_formats{request.assets_kwargs}",
-            "rel": "self",
-            "type": "application/json",
-            "title": f"Available style formats for {system_id}{request.assets_kwargs}",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems/{system_id}{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to classification system",
-        },
-        {
-            "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "parent",
-            "type": "application/json",
-            "title": "Link to classification systems",
-        },
-        {
-            "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-            "rel": "root",
-            "type": "application/json",
-            "title": "API landing page",
-        },
-    ]
+    links = request.links.render_all(SYSTEM_STYLE_FORMATS_LINKS, system_id=system_id)
 
     for style_id in style_formats_id:
-        links.append(
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}/styles/{style_id[0]}{request.assets_kwargs}",
-                "rel": "style",
-                "type": "application/json",
-                "title": "Link to style",
-            }
-        )
+        links += request.links.render_all(SYSTEM_STYLE_FORMATS_ITEM_LINKS,
+                                          system_id=system_id, style_format_id=style_id[0])
 
     return jsonify(links)
 
@@ -506,6 +409,10 @@ def get_style_formats_classification_system(system_id_or_identifier, **kwargs):
 @current_app.route("/classification_systems/<system_id_or_identifier>/styles/<style_format_id_or_name>",
                    methods=["GET"])
 @oauth2(required=True)
+@cached(lambda system_id_or_identifier, style_format_id_or_name:
+        data.system_tags(system_id_or_identifier) + data.style_format_tags(style_format_id_or_name))
+@conditional(lambda system_id_or_identifier, **_: data.get_system_version(system_id_or_identifier,
+                                                                          style_formats=True))
 def style_file(system_id_or_identifier, style_format_id_or_name, **kwargs):
     """Retrieve available styles.
 
@@ -523,6 +430,8 @@ def style_file(system_id_or_identifier, style_format_id_or_name, **kwargs):
 
 
 @current_app.route("/classification_systems/search/<system_name>/<system_version>", methods=["GET"])
+@cached(lambda **_: [('systems',)])
+@conditional(lambda **_: data.get_systems_version())
 def classification_system_search(system_name, system_version):
     """Return identifier of a classification system.
 
@@ -535,6 +444,8 @@ def classification_system_search(system_name, system_version):
 
 
 @current_app.route("/style_formats/search/<style_format_name>", methods=["GET"])
+@cached(lambda **_: [('style_formats',)])
+@conditional(lambda **_: data.get_style_formats_version())
 def style_format_search(style_format_name):
     """Return identifier of a style format.
 
@@ -567,9 +478,9 @@ def edit_classification_system(system_id_or_identifier, **kwargs):
         return classification_system, 201
 
     if request.method == "DELETE":
-        data.delete_classification_system(system_id_or_identifier)
+        deleted = data.delete_classification_system(system_id_or_identifier)
 
-        return {'message': f'{system_id_or_identifier} deleted'}, 204
+        return _deleted(f'{system_id_or_identifier} deleted', deleted)
 
     if request.method == "PUT":
         args = request.get_json()
@@ -593,9 +504,9 @@ def create_delete_classes(system_id_or_identifier, **kwargs):
     :param system_id_or_identifier: The id or identifier of a classification system
     """
     if request.method == "DELETE":
-        data.delete_classes(system_id_or_identifier)
+        deleted = data.delete_classes(system_id_or_identifier)
 
-        return {'message': f'Classes of {system_id_or_identifier} deleted'}, 204
+        return _deleted(f'Classes of {system_id_or_identifier} deleted', deleted)
 
     if request.method == "POST":
         args = request.get_json()
@@ -663,9 +574,9 @@ def edit_mapping(system_id_or_identifier_source, system_id_or_identifier_target,
         return jsonify(mappings), 201
 
     if request.method == "DELETE":
-        data.delete_mappings(system_id_or_identifier_source, system_id_or_identifier_target)
+        deleted = data.delete_mappings(system_id_or_identifier_source, system_id_or_identifier_target)
 
-        return {'message': 'Mapping delete!'}, 204
+        return _deleted('Mapping delete!', deleted)
 
     if request.method == "PUT":
         args = request.get_json()
@@ -707,39 +618,8 @@ def edit_styles(system_id_or_identifier, style_format_id_or_name, **kwargs):
                                                 system_id_or_identifier=system_id_or_identifier,
                                                 file=file)
 
-        links = list()
-        links += [
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}/styles/{format_id}{request.assets_kwargs}",
-                "rel": "style",
-                "type": "application/json",
-                "title": "style",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}/style_formats{request.assets_kwargs}",
-                "rel": "self",
-                "type": "application/json",
-                "title": f"Styles of the classification system {system_id}{request.assets_kwargs}",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "parent",
-                "type": "application/json",
-                "title": "Link to classification system",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "parent",
-                "type": "application/json",
-                "title": "Link to classification systems",
-            },
-            {
-                "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "root",
-                "type": "application/json",
-                "title": "API landing page",
-            },
-        ]
+        links = request.links.render_all(STYLES_LINKS, system_id=system_id, style_format_id=format_id)
+
         return jsonify(links)
 
     if request.method == "PUT":
@@ -752,45 +632,14 @@ def edit_styles(system_id_or_identifier, style_format_id_or_name, **kwargs):
                                                       system_id_or_identifier=system_id_or_identifier,
                                                       file=file)
 
-        links = list()
-        links += [
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}/styles/{style_format_id}{request.assets_kwargs}",
-                "rel": "style",
-                "type": "application/json",
-                "title": "style",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}/style_formats{request.assets_kwargs}",
-                "rel": "self",
-                "type": "application/json",
-                "title": f"Styles of the classification system {system_id}{request.assets_kwargs}",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems/{system_id}{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "parent",
-                "type": "application/json",
-                "title": "Link to classification system",
-            },
-            {
-                "href": f"{BASE_URL}/classification_systems{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "parent",
-                "type": "application/json",
-                "title": "Link to classification systems",
-            },
-            {
-                "href": f"{BASE_URL}/{request.assets_kwargs}{request.intern_kwargs}",
-                "rel": "root",
-                "type": "application/json",
-                "title": "API landing page",
-            },
-        ]
+        links = request.links.render_all(STYLES_LINKS, system_id=system_id, style_format_id=style_format_id)
+
         return jsonify(links)
 
     if request.method == "DELETE":
-        data.delete_file(style_format_id_or_name, system_id_or_identifier)
+        deleted = data.delete_file(style_format_id_or_name, system_id_or_identifier)
 
-        return {'message': 'deleted!'}, 204
+        return _deleted('deleted!', deleted)
 
 
 @current_app.route("/style_formats", defaults={'style_format_id_or_name': None}, methods=["POST"])
@@ -829,3 +678,31 @@ def edit_style_formats(style_format_id_or_name, **kwargs):
         style_format = data.update_style_format(style_format_id_or_name, **args)
 
         return style_format, 200
+
+
+@current_app.route("/status/pool", methods=["GET"])
+@oauth2(roles=['admin'])
+def get_pool_status(**kwargs):
+    """Retrieve the state and the statistics of the database connection pools."""
+    return jsonify(pool_status(current_app._get_current_object(), db))
+
+
+@current_app.route("/status/auth", methods=["GET"])
+@oauth2(roles=['admin'])
+def get_auth_status(**kwargs):
+    """Retrieve the statistics of the cache of validated access tokens of the current process."""
+    status = auth_status(current_app._get_current_object())
+
+    if status is None:
+        abort(404, "Token cache disabled.")
+
+    return jsonify(status)
+
+
+@current_app.route("/status/cache", methods=["GET"])
+@oauth2(roles=['admin'])
+def get_cache_status(**kwargs):
+    """Retrieve the statistics of the response cache and of the invalidation bus of the current process."""
+    bus = current_app.extensions.get('lccs_ws_invalidation_bus')
+
+    return jsonify(responses=responses.statistics(), invalidation=bus.statistics() if bus is not None else None)
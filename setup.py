@@ -34,6 +34,7 @@ tests_require = [
     'isort>4.3',
     'check-manifest>=0.40',
     'requests-mock>=1.7.0',
+    'pytest-benchmark>=3.2',
 ]
 
 docs_require = [
@@ -43,7 +44,11 @@ docs_require = [
 ]
 
 extras_require = {
+    'asgi': ['asyncpg>=0.22', 'asgiref>=3.2', 'uvicorn>=0.13'],
     'docs': docs_require,
+    'metrics': ['prometheus-client>=0.9'],
+    'orjson': ['orjson>=3.6'],
+    'tracing': ['opentelemetry-api>=1.0', 'opentelemetry-sdk>=1.0'],
     'tests': tests_require,
 }
 
@@ -0,0 +1,91 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+from functools import wraps
+
+import pytest
+from flask import abort
+
+from lccs_ws import auth, create_app
+from lccs_ws.instrumentation import count_queries
+
+
+class OAuth2Stub:
+    """Replacement of the token validation of ``bdc_auth_client``, see :func:`lccs_ws.auth.oauth2`.
+
+    The options of each validated request are recorded in ``validated``. The requests to the routes
+    which require ``roles`` are refused with ``403 Forbidden`` when ``authorized`` is unset.
+    """
+
+    def __init__(self):
+        self.validated = []
+        self.authorized = True
+
+    def __call__(self, **options):
+        def _oauth2(func):
+            @wraps(func)
+            def wrapped(*args, **kwargs):
+                self.validated.append(options)
+
+                if options.get('roles') and not self.authorized:
+                    abort(403)
+
+                return func(*args, **kwargs)
+            return wrapped
+        return _oauth2
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Return the application shared by the test modules.
+
+    The routes of :mod:`lccs_ws.views` are registered on the application created when the module
+    is first imported, so the modules which request the endpoints must use the same application.
+    """
+    return create_app()
+
+
+@pytest.fixture
+def query_counter():
+    """Return a context manager which counts the database statements executed in a block.
+
+    Example::
+
+        def test_classes(client, query_counter):
+            with query_counter() as counter:
+                client.get('/classification_systems/1/classes')
+
+            assert counter.count <= 3
+    """
+    return count_queries
+
+
+@pytest.fixture
+def client_oauth2(monkeypatch):
+    """Validate the access tokens with an :class:`OAuth2Stub`, which accepts any token by default.
+
+    Example::
+
+        def test_requires_admin(client_oauth2, client):
+            client_oauth2.authorized = False
+
+            assert client.post('/classification_systems', headers={'x-api-key': 'token'}).status_code == 403
+    """
+    stub = OAuth2Stub()
+    monkeypatch.setattr(auth, '_client_oauth2', stub)
+
+    return stub
@@ -14,7 +14,6 @@ import pytest
 from jsonschema import validate
 from pkg_resources import resource_filename
 
-from lccs_ws import create_app as _create_app
 from lccs_ws.schemas import (class_response, classes_response,
                              classification_system_response,
                              classification_system_type,
@@ -23,7 +22,6 @@ from lccs_ws.schemas import (class_response, classes_response,
 
 url = os.environ.get('LCCS_SERVER_URL', 'http://localhost:5000')
 match_url = re.compile(url)
-lccs_app=_create_app()
 
 @pytest.fixture
 def requests_mock(requests_mock):
@@ -45,9 +43,9 @@ def mocks():
 
 
 @pytest.fixture(scope="class")
-def client():
-    with lccs_app.test_client() as app:
-        yield app
+def client(app):
+    with app.test_client() as client:
+        yield client
 
 
 @pytest.fixture(scope='class')
@@ -113,6 +111,32 @@ class TestLCCSWS:
         self._assert_json(response, expected_code=200)
         validate(instance=response.json, schema=classes_response)
 
+    def test_classes_not_modified(self, client, mock_oauth2_cache):
+        headers = self._configure_authentication_test(mock_oauth2_cache, roles=[])
+
+        response = client.get('/classification_systems/1/classes', headers=headers)
+
+        self._assert_json(response, expected_code=200)
+        assert response.headers.get('ETag')
+
+        headers['If-None-Match'] = response.headers['ETag']
+
+        not_modified = client.get('/classification_systems/1/classes', headers=headers)
+
+        assert not_modified.status_code == 304
+        assert not_modified.data == b''
+
+    def test_classes_queries(self, client, mock_oauth2_cache, query_counter):
+        headers = self._configure_authentication_test(mock_oauth2_cache, roles=[])
+
+        with query_counter() as counter:
+            response = client.get('/classification_systems/1/classes', headers=headers)
+
+        self._assert_json(response, expected_code=200)
+        assert counter.count <= 3
+        assert not counter.repeated()
+        assert f'count={counter.count}' in response.headers['Server-Timing']
+
     def test_class(self, client, mock_oauth2_cache):
         headers = self._configure_authentication_test(mock_oauth2_cache, roles=[])
 
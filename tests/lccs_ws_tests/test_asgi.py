@@ -0,0 +1,236 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import asyncio
+import json
+
+import pytest
+from werkzeug.exceptions import NotFound
+
+pytest.importorskip('asgiref')
+
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+
+from lccs_ws import asgi as asgi_module  # noqa: E402
+from lccs_ws.asgi import ASGIApplication, create_asgi_app  # noqa: E402
+from lccs_ws.data import Page, SystemKey  # noqa: E402
+from lccs_ws.instrumentation import record_statement  # noqa: E402
+
+SYSTEM = dict(id=1, name='land-cover', version='1', authority_name='INPE', title='Land Cover')
+
+
+class StubDatabase:
+    """Asynchronous data access with a single classification system, see :class:`lccs_ws.async_data.AsyncDatabase`.
+
+    Each call records a statement, as :meth:`lccs_ws.async_data.AsyncDatabase.fetch` does.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.error = None
+
+    def _execute(self, statement, *systems):
+        self.statements.append(statement)
+        record_statement(statement, list(systems), 0.001)
+
+        if self.error is not None:
+            raise self.error
+
+        if any(system not in ('1', 'land-cover') for system in systems):
+            raise NotFound()
+
+    async def get_systems_version(self):
+        self._execute('systems_version')
+        return 'v1'
+
+    async def get_system_version(self, *systems):
+        self._execute('system_version', *systems)
+        return 'v1'
+
+    async def get_classification_systems(self, locale=None):
+        self._execute('classification_systems')
+        return [dict(SYSTEM)]
+
+    async def get_classification_system(self, system, locale=None):
+        self._execute('classification_system', system)
+        return dict(SYSTEM)
+
+    async def get_classification_system_classes(self, system, limit=None, cursor=None, count=False, locale=None):
+        self._execute('classes', system)
+        return 1, Page([dict(id=1, name='forest')], None, 1 if count else None)
+
+    async def get_mappings(self, system):
+        self._execute('mappings', system)
+        return SystemKey(1, 'land-cover-1', 'land-cover', '1'), [2]
+
+
+@pytest.fixture
+def database():
+    return StubDatabase()
+
+
+def _get(asgi, path, query='', headers=()):
+    """Send a ``GET`` request to an ASGI application and return the status, the headers and the body."""
+    scope = dict(type='http', method='GET', path=path, root_path='', scheme='http', server=('localhost', 80),
+                 query_string=query.encode(), headers=[(name.encode(), value.encode()) for name, value in headers])
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi(scope, receive, send))
+
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, body
+
+
+class TestStatistics:
+    def test_server_timing(self, app, database):
+        status, headers, body = _get(ASGIApplication(app, database), '/classification_systems')
+
+        assert status == 200
+        assert json.loads(body)[0]['name'] == 'land-cover'
+        assert database.statements == ['systems_version', 'classification_systems']
+        assert 'count=2' in headers['server-timing']
+
+    def test_error(self, app, database):
+        status, headers, _ = _get(ASGIApplication(app, database), '/classification_systems/unknown')
+
+        assert status == 404
+        assert 'count=1' in headers['server-timing']
+
+
+def _scope(path, method='GET', query='', headers=()):
+    return dict(type='http', method=method, path=path, query_string=query.encode(),
+                headers=[(name.encode(), value.encode()) for name, value in headers])
+
+
+class TestMatch:
+    @pytest.mark.parametrize('path, endpoint', [
+        ('/classification_systems', 'get_classification_systems'),
+        ('/classification_systems/1', 'get_classification_system'),
+        ('/classification_systems/1/classes', 'classification_systems_classes'),
+        ('/classification_systems/1/classes/forest', 'classification_systems_class'),
+        ('/mappings/1', 'get_mappings'),
+        ('/mappings/1/2', 'get_mapping'),
+    ])
+    def test_served_asynchronously(self, app, database, path, endpoint):
+        assert ASGIApplication(app, database)._match(_scope(path))[0] == endpoint
+
+    @pytest.mark.parametrize('scope', [
+        _scope('/classification_systems', method='POST'),
+        _scope('/classification_systems', headers=[('x-api-key', 'token')]),
+        _scope('/classification_systems', headers=[('authorization', 'Bearer token')]),
+        _scope('/classification_systems', query='access_token=token'),
+        _scope('/classification_systems', query='profile=pstats'),
+        _scope('/classification_systems/1/classes', query='stream=true'),
+        _scope('/classification_systems/1/classes', query='stream=1'),
+        _scope('/style_formats'),
+        _scope('/unknown'),
+    ], ids=['post', 'api_key', 'authorization', 'access_token', 'profile', 'stream', 'stream_1', 'other_route',
+            'not_found'])
+    def test_served_by_flask(self, app, database, scope):
+        assert ASGIApplication(app, database)._match(scope) is None
+
+    def test_stream_false(self, app, database):
+        scope = _scope('/classification_systems/1/classes', query='stream=false')
+
+        assert ASGIApplication(app, database)._match(scope)[0] == 'classification_systems_classes'
+
+    def test_tracing(self, app, database, monkeypatch):
+        monkeypatch.setitem(app.config, 'LCCS_TRACING', True)
+
+        assert ASGIApplication(app, database)._match(_scope('/classification_systems')) is None
+
+
+class TestRespond:
+    def test_not_modified(self, app, database):
+        asgi = ASGIApplication(app, database)
+        _, headers, _ = _get(asgi, '/classification_systems/1/classes')
+        database.statements.clear()
+
+        status, not_modified, body = _get(asgi, '/classification_systems/1/classes',
+                                          headers=[('if-none-match', headers['etag'])])
+
+        assert (status, body) == (304, b'')
+        assert not_modified['etag'] == headers['etag']
+        assert database.statements == ['system_version']
+
+    def test_other_query_not_modified(self, app, database):
+        asgi = ASGIApplication(app, database)
+        _, headers, _ = _get(asgi, '/classification_systems/1/classes')
+
+        status, _, _ = _get(asgi, '/classification_systems/1/classes', query='count=true',
+                            headers=[('if-none-match', headers['etag'])])
+
+        assert status == 200
+
+    def test_pagination(self, app, database):
+        status, headers, body = _get(ASGIApplication(app, database), '/classification_systems/1/classes',
+                                     query='count=true')
+
+        assert status == 200
+        assert headers['x-total-count'] == '1'
+        assert [item['name'] for item in json.loads(body)] == ['forest']
+
+    def test_mappings(self, app, database):
+        status, _, body = _get(ASGIApplication(app, database), '/mappings/land-cover')
+
+        assert status == 200
+        assert any(link['href'].endswith('/mappings/1/2') for link in json.loads(body))
+
+    def test_not_found(self, app, database):
+        status, headers, body = _get(ASGIApplication(app, database), '/classification_systems/unknown/classes')
+
+        assert status == 404
+        assert headers['content-type'] == 'application/json'
+        assert json.loads(body)['code'] == 404
+
+    def test_invalid_limit(self, app, database):
+        status, _, body = _get(ASGIApplication(app, database), '/classification_systems/1/classes', query='limit=0')
+
+        assert status == 400
+        assert json.loads(body)['code'] == 400
+        assert database.statements == []
+
+    def test_error(self, app, database):
+        database.error = RuntimeError('Connection lost')
+
+        status, _, body = _get(ASGIApplication(app, database), '/classification_systems')
+
+        assert status == 500
+        assert json.loads(body)['code'] == 500
+
+
+class TestCreateASGIApp:
+    def test_postgres(self, app):
+        assert isinstance(create_asgi_app(app), ASGIApplication)
+
+    def test_other_database(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, 'SQLALCHEMY_DATABASE_URI', 'sqlite://')
+
+        assert isinstance(create_asgi_app(app), WsgiToAsgi)
+
+    def test_without_asyncpg(self, app, monkeypatch):
+        monkeypatch.setattr(asgi_module, 'AsyncDatabase', None)
+
+        assert isinstance(create_asgi_app(app), WsgiToAsgi)
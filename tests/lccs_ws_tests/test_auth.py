@@ -0,0 +1,161 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import os
+import sqlite3
+import stat
+import time
+
+import pytest
+from flask import Flask
+
+from lccs_ws import auth
+from lccs_ws.auth import TokenCache
+
+TOKEN_INFO = dict(sub=dict(roles=['admin']))
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'tokens.sqlite3')
+
+
+class TestTokenCache:
+    def test_shared_between_instances(self, cache_path):
+        TokenCache(cache_path, ttl=60, max_size=10)['SomeToken'] = TOKEN_INFO
+
+        cache = TokenCache(cache_path, ttl=60, max_size=10)
+
+        assert cache.get('SomeToken') == TOKEN_INFO
+        assert cache.get('OtherToken') is None
+        assert cache.statistics() == dict(hits=1, misses=1, hit_ratio=0.5, size=1)
+
+    def test_tokens_are_hashed(self, cache_path):
+        TokenCache(cache_path, ttl=60, max_size=10)['SomeToken'] = TOKEN_INFO
+
+        with open(cache_path, 'rb') as f:
+            assert b'SomeToken' not in f.read()
+
+    def test_expiration(self, cache_path):
+        cache = TokenCache(cache_path, ttl=60, max_size=10)
+        cache['Expired'] = dict(TOKEN_INFO, exp=time.time() - 1)
+        cache['Valid'] = TOKEN_INFO
+
+        assert 'Expired' not in cache
+        assert 'Valid' in cache
+        assert len(cache) == 1
+
+    def test_max_size(self, cache_path):
+        cache = TokenCache(cache_path, ttl=60, max_size=2)
+
+        for index in range(3):
+            cache[f'Token{index}'] = dict(TOKEN_INFO, exp=time.time() + 10 + index)
+
+        cache.prune()
+
+        assert 'Token0' not in cache
+        assert len(cache) == 2
+
+
+    def test_created_private(self, cache_path):
+        TokenCache(cache_path, ttl=60, max_size=10)['SomeToken'] = TOKEN_INFO
+
+        assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+    def test_existing_file_open_to_others(self, cache_path):
+        # A file planted by another user, granting a role to a token of its choice.
+        connection = sqlite3.connect(cache_path)
+        connection.execute('CREATE TABLE tokens (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+        connection.execute('INSERT INTO tokens VALUES (?, ?, ?)',
+                           (TokenCache._key('Planted'), '{"sub": {"roles": ["admin"]}}', time.time() + 60))
+        connection.commit()
+        connection.close()
+        os.chmod(cache_path, 0o666)
+
+        with pytest.raises(PermissionError):
+            TokenCache(cache_path, ttl=60, max_size=10).get('Planted')
+
+    def test_symlink(self, cache_path, tmp_path):
+        target = tmp_path / 'target.sqlite3'
+        target.touch(mode=0o600)
+        os.symlink(target, cache_path)
+
+        with pytest.raises(PermissionError):
+            TokenCache(cache_path, ttl=60, max_size=10).get('SomeToken')
+
+
+def test_init_auth_instance_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth.bdc_auth_client.decorators, 'token_cache', None)
+
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.config.update(LCCS_AUTH_CACHE=True, LCCS_AUTH_CACHE_PATH=None, LCCS_AUTH_CACHE_TTL=60,
+                      LCCS_AUTH_CACHE_MAX_SIZE=10)
+
+    auth.init_auth(app)
+
+    assert app.extensions['lccs_ws_token_cache'].path == str(tmp_path / 'instance' / auth.DEFAULT_CACHE_NAME)
+    assert stat.S_IMODE(os.stat(tmp_path / 'instance').st_mode) == 0o700
+
+
+class TestOAuth2:
+    @pytest.fixture
+    def client(self, client_oauth2):
+        app = Flask(__name__)
+        app.add_url_rule('/optional', 'optional', auth.oauth2(required=False)(lambda **kwargs: 'optional'))
+        app.add_url_rule('/required', 'required', auth.oauth2(roles=['admin'])(lambda **kwargs: 'required'))
+
+        with app.test_client() as client:
+            yield client, client_oauth2.validated
+
+    def test_optional_without_token(self, client):
+        client, validated = client
+
+        assert client.get('/optional').data == b'optional'
+        assert validated == []
+
+    def test_optional_with_token(self, client):
+        client, validated = client
+
+        client.get('/optional', headers={'x-api-key': 'SomeToken'})
+        client.get('/optional?access_token=SomeToken')
+
+        assert len(validated) == 2
+
+    def test_required(self, client):
+        client, validated = client
+
+        client.get('/required')
+
+        assert validated == [dict(roles=['admin'], required=True, throw_exception=True)]
+
+    def test_unauthorized(self, client, client_oauth2):
+        client, _ = client
+        client_oauth2.authorized = False
+
+        assert client.get('/required').status_code == 403
+        assert client.get('/optional', headers={'x-api-key': 'SomeToken'}).status_code == 200
+
+
+def test_views_replaced_client(app, client_oauth2):
+    """The views of the application, declared before the authorization client is replaced, use the replacement."""
+    client_oauth2.authorized = False
+
+    with app.test_client() as client:
+        response = client.post('/classification_systems', headers={'x-api-key': 'SomeToken'}, json=dict())
+
+    assert response.status_code == 403
+    assert client_oauth2.validated
@@ -0,0 +1,133 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+from unittest.mock import patch
+
+from lccs_ws.cache import LRUCache, TaggedCache
+
+
+class TestLRUCache:
+    def test_lru_eviction(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+
+        cache.set('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_ttl_expiration(self):
+        cache = LRUCache(maxsize=2, ttl=10)
+
+        with patch('lccs_ws.cache.time.monotonic', return_value=100):
+            cache.set('a', 1)
+
+        with patch('lccs_ws.cache.time.monotonic', return_value=105):
+            assert cache.get('a') == 1
+
+        with patch('lccs_ws.cache.time.monotonic', return_value=111):
+            assert cache.get('a') is None
+            assert len(cache) == 0
+
+    def test_discard(self):
+        cache = LRUCache(maxsize=10, ttl=60)
+
+        cache.set(('system', 'id', 1), 1)
+        cache.set(('system', 'name', 'PRODES-1.0'), 1)
+        cache.set(('system', 'id', 2), 2)
+
+        assert cache.discard(lambda key, value: value == 1) == 2
+        assert len(cache) == 1
+
+    def test_disabled(self):
+        cache = LRUCache(maxsize=0, ttl=60)
+
+        cache.set('a', 1)
+
+        assert cache.get('a') is None
+
+
+class TestTaggedCache:
+    def test_size_eviction(self):
+        cache = TaggedCache(max_bytes=40, ttl=60)
+
+        cache.set('a', b'a' * 10, 10)
+        cache.set('b', b'b' * 10, 10)
+        cache.set('c', b'c' * 10, 10)
+        assert cache.get('a') is not None
+
+        cache.set('d', b'd' * 10, 10)
+        cache.set('e', b'e' * 10, 10)
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.size == 40
+
+    def test_large_entry(self):
+        cache = TaggedCache(max_bytes=40, ttl=60)
+
+        cache.set('a', b'a' * 11, 11)
+
+        assert cache.get('a') is None
+
+    def test_invalidate(self):
+        cache = TaggedCache(max_bytes=100, ttl=60)
+
+        cache.set('classes-1', b'1', 1, tags=[('system', 1)])
+        cache.set('mapping-1-2', b'2', 1, tags=[('system', 1), ('system', 2)])
+        cache.set('classes-2', b'3', 1, tags=[('system', 2)])
+        cache.set('systems', b'4', 1, tags=[('systems',)])
+
+        assert cache.invalidate(('system', 1)) == 2
+        assert cache.get('classes-2') is not None
+        assert cache.get('systems') is not None
+        assert cache.invalidate(('system', 1)) == 0
+        assert cache.invalidate(('system', 2), ('systems',)) == 2
+        assert cache.size == 0
+
+    def test_ttl_expiration(self):
+        cache = TaggedCache(max_bytes=100, ttl=10)
+
+        with patch('lccs_ws.cache.time.monotonic', return_value=100):
+            cache.set('a', b'a', 1, tags=[('system', 1)])
+
+        with patch('lccs_ws.cache.time.monotonic', return_value=111):
+            assert cache.get('a') is None
+            assert cache.size == 0
+            assert cache.invalidate(('system', 1)) == 0
+
+    def test_generation(self):
+        cache = TaggedCache(max_bytes=100, ttl=60)
+
+        generation = cache.generation()
+        cache.invalidate(('system', 1))
+
+        cache.set('classes-1', b'1', 1, tags=[('system', 1)], generation=generation)
+        cache.set('classes-2', b'2', 1, tags=[('system', 2)], generation=generation)
+        assert cache.get('classes-1') is None
+        assert cache.get('classes-2') is not None
+
+        generation = cache.generation()
+        cache.clear()
+
+        cache.set('classes-2', b'2', 1, tags=[('system', 2)], generation=generation)
+        assert cache.get('classes-2') is None
@@ -0,0 +1,56 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from lccs_ws.encoder import (JSONEncoder, ORJSONEncoder, get_json_encoder,
+                             orjson)
+
+PAYLOAD = {
+    'degree_of_similarity': Decimal('0.25'),
+    'updated_at': datetime(2022, 1, 2, 3, 4, 5),
+    'classes': [{'id': 1, 'name': 'Forest', 'title': 'Floresta'}],
+    1: None,
+}
+
+
+class TestJSONEncoder:
+    def test_decimal(self):
+        assert json.dumps(Decimal('0.5'), cls=JSONEncoder) == '0.5'
+
+    @pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+    def test_orjson_matches_stdlib(self):
+        for indent in (None, 2):
+            encoded = json.dumps(PAYLOAD, cls=ORJSONEncoder, sort_keys=True, indent=indent)
+
+            assert json.loads(encoded) == json.loads(json.dumps(PAYLOAD, cls=JSONEncoder, indent=indent))
+            assert encoded.index('"1"') < encoded.index('"classes"')
+
+    @pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+    def test_orjson_fallback(self):
+        assert json.dumps(2 ** 70, cls=ORJSONEncoder) == str(2 ** 70)
+        assert json.dumps([1], cls=ORJSONEncoder, indent=4) == '[\n    1\n]'
+
+    def test_get_json_encoder(self):
+        assert get_json_encoder('json') is JSONEncoder
+
+        with pytest.raises(ValueError):
+            get_json_encoder('ujson')
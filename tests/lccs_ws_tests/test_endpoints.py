@@ -0,0 +1,427 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Tests of the endpoints on the database of ``SQLALCHEMY_DATABASE_URI``.
+
+Each test creates its own classification systems, with unique names, and removes them at the end.
+"""
+import re
+import uuid
+from urllib.parse import urlsplit
+
+import pytest
+from lccs_db.models import ClassMapping, LucClass
+
+from lccs_ws import data
+from lccs_ws.config import Config
+from lccs_ws.forms import ClassesMappingSchema
+
+HEADERS = {'x-api-key': 'SomeToken'}
+
+
+def _class(name: str, *children: dict) -> dict:
+    """Return the payload of a class and its children."""
+    return dict(name=name, code=name, title={'en': name}, description={'en': f'{name} description'},
+                children=list(children))
+
+
+@pytest.fixture
+def client(app, client_oauth2):
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def systems(client):
+    """Create three empty classification systems and return their ids."""
+    name = f'test-{uuid.uuid4().hex[:8]}'
+    systems = []
+
+    for version in ('1', '2', '3'):
+        response = client.post('/classification_systems', headers=HEADERS, json=dict(
+            name=name, authority_name='INPE', version=version, title={'en': name}, description={'en': name}
+        ))
+        assert response.status_code == 201
+        systems.append(response.json['id'])
+
+    yield systems
+
+    for system_id in systems:
+        client.delete(f'/classification_systems/{system_id}', headers=HEADERS)
+
+
+def _classes(client, system_id: int) -> dict:
+    """Return the classes of a classification system by name."""
+    response = client.get(f'/classification_systems/{system_id}/classes')
+
+    # A system without classes is answered with its links only.
+    return {item['name']: item for item in response.json if 'name' in item}
+
+
+@pytest.fixture
+def classes(client, systems):
+    """Create the classes ``a0`` to ``a4`` in the first system and ``b0`` to ``b4`` in the second, return their ids."""
+    ids = []
+
+    for system_id, prefix in zip(systems, 'ab'):
+        response = client.post(f'/classification_systems/{system_id}/classes', headers=HEADERS,
+                               json=dict(classes=[_class(f'{prefix}{index}') for index in range(5)]))
+        ids.append(sorted(item['id'] for item in response.json))
+
+    return ids
+
+
+@pytest.fixture
+def mappings(client, systems, classes):
+    """Map each class of the first system to the class of the same position of the second, return the id pairs."""
+    pairs = list(zip(*classes))
+
+    response = client.post(f'/mappings/{systems[0]}/{systems[1]}', headers=HEADERS,
+                           json=[dict(source_class=source, target_class=target) for source, target in pairs])
+    assert response.status_code == 201
+
+    return pairs
+
+
+def _pages(client, path: str, **args) -> list:
+    """Return the items of each page of a listing, following the ``Link`` headers with ``rel="next"``."""
+    pages = []
+    query = args
+
+    while query is not None:
+        response = client.get(path, query_string=query)
+        assert response.status_code == 200
+        pages.append(response.json)
+
+        link = re.match(r'<([^>]+)>; rel="next"', response.headers.get('Link', ''))
+        query = urlsplit(link.group(1)).query if link else None
+
+    return pages
+
+
+class TestInsertClasses:
+    def test_nested(self, client, systems):
+        payload = [_class('water', _class('river', _class('stream', _class('spring')))), _class('forest')]
+
+        response = client.post(f'/classification_systems/{systems[0]}/classes', headers=HEADERS,
+                               json=dict(classes=payload))
+
+        assert response.status_code == 201
+        assert sorted(item['name'] for item in response.json) == ['forest', 'river', 'spring', 'stream', 'water']
+
+        classes = _classes(client, systems[0])
+
+        assert 'class_parent_id' not in classes['water'] and 'class_parent_id' not in classes['forest']
+        assert classes['river']['class_parent_id'] == classes['water']['id']
+        assert classes['stream']['class_parent_id'] == classes['river']['id']
+        assert classes['spring']['class_parent_id'] == classes['stream']['id']
+
+    def test_duplicated_names(self, client, systems):
+        payload = [_class('water', _class('river')), _class('forest', _class('river'))]
+
+        response = client.post(f'/classification_systems/{systems[0]}/classes', headers=HEADERS,
+                               json=dict(classes=payload))
+
+        assert response.status_code == 409
+        assert 'river' in response.json['description']
+        assert _classes(client, systems[0]) == {}
+
+    def test_registered_names(self, client, systems):
+        client.post(f'/classification_systems/{systems[0]}/classes', headers=HEADERS,
+                    json=dict(classes=[_class('water')]))
+
+        response = client.post(f'/classification_systems/{systems[0]}/classes', headers=HEADERS,
+                               json=dict(classes=[_class('forest', _class('water'))]))
+
+        assert response.status_code == 409
+        assert 'water' in response.json['description']
+        assert list(_classes(client, systems[0])) == ['water']
+
+    def test_same_names_in_other_system(self, client, systems):
+        for system_id in systems[:2]:
+            response = client.post(f'/classification_systems/{system_id}/classes', headers=HEADERS,
+                                   json=dict(classes=[_class('water')]))
+
+            assert response.status_code == 201
+
+    def test_batches(self, client, systems, query_counter, monkeypatch):
+        monkeypatch.setattr(data, '_INSERT_BATCH_SIZE', 2)
+        payload = [_class('water', _class('river'), _class('lake')), _class('forest', _class('savanna')),
+                   _class('urban', _class('road'))]
+
+        with query_counter() as counter:
+            response = client.post(f'/classification_systems/{systems[0]}/classes', headers=HEADERS,
+                                   json=dict(classes=payload))
+
+        inserts = [statement for statement in counter.statements if statement.lstrip().upper().startswith('INSERT')]
+        classes = _classes(client, systems[0])
+
+        assert response.status_code == 201
+        assert len(response.json) == 7
+        assert len(inserts) == 4
+        assert {name: classes[name]['class_parent_id'] for name in ('river', 'lake', 'savanna', 'road')} == \
+            dict(river=classes['water']['id'], lake=classes['water']['id'], savanna=classes['forest']['id'],
+                 road=classes['urban']['id'])
+
+
+class TestInsertMappings:
+    def test_unresolved_classes(self, client, systems, classes):
+        sources, targets = classes
+        payload = [dict(source_class=sources[0], target_class=targets[0]),
+                   dict(source_class=sources[1], target_class=999999998),
+                   dict(source_class=999999999, target_class=targets[2]),
+                   dict(source_class=targets[3], target_class=sources[3])]
+
+        response = client.post(f'/mappings/{systems[0]}/{systems[1]}', headers=HEADERS, json=payload)
+
+        assert response.status_code == 400
+        assert response.json['description'] == (
+            f'Classes not found: target class 999999998, source class 999999999, '
+            f'source class {targets[3]}, target class {sources[3]}.'
+        )
+        assert client.get(f'/mappings/{systems[0]}/{systems[1]}').json == []
+
+    def test_batches(self, client, systems, classes, query_counter, monkeypatch):
+        monkeypatch.setattr(data, '_INSERT_BATCH_SIZE', 2)
+        sources, targets = classes
+        payload = [dict(source_class=source, target_class=target, description=f'{source}-{target}',
+                        degree_of_similarity=0.5) for source, target in zip(sources, targets)]
+
+        with query_counter() as counter:
+            response = client.post(f'/mappings/{systems[0]}/{systems[1]}', headers=HEADERS, json=payload)
+
+        inserts = [statement for statement in counter.statements if statement.lstrip().upper().startswith('INSERT')]
+
+        assert response.status_code == 201
+        assert len(inserts) == 3
+        assert [(int(item['source_class_id']), int(item['target_class_id'])) for item in response.json] == \
+            list(zip(sources, targets))
+
+
+class TestPagination:
+    def test_classes(self, client, systems, classes):
+        pages = _pages(client, f'/classification_systems/{systems[0]}/classes', limit=2)
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [item['id'] for page in pages for item in page] == classes[0]
+
+    def test_mappings(self, client, systems, mappings):
+        pages = _pages(client, f'/mappings/{systems[0]}/{systems[1]}', limit=2)
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [(int(item['source_class_id']), int(item['target_class_id'])) for page in pages for item in page] == \
+            mappings
+
+    def test_last_page_has_no_link(self, client, systems, classes):
+        response = client.get(f'/classification_systems/{systems[0]}/classes', query_string=dict(limit=5))
+
+        assert len(response.json) == 5
+        assert 'Link' not in response.headers
+
+    def test_total_count(self, client, systems, mappings):
+        classes = client.get(f'/classification_systems/{systems[0]}/classes?limit=2&count=true')
+        mapping = client.get(f'/mappings/{systems[0]}/{systems[1]}?limit=2&count=true')
+
+        assert classes.headers['X-Total-Count'] == mapping.headers['X-Total-Count'] == '5'
+        assert 'X-Total-Count' not in client.get(f'/classification_systems/{systems[0]}/classes?limit=2').headers
+
+    @pytest.mark.parametrize('cursor', ['abc', '1:2', ''])
+    def test_invalid_class_cursor(self, client, systems, classes, cursor):
+        response = client.get(f'/classification_systems/{systems[0]}/classes', query_string=dict(cursor=cursor))
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('cursor', ['1', '1:a', '1:2:3'])
+    def test_invalid_mapping_cursor(self, client, systems, mappings, cursor):
+        response = client.get(f'/mappings/{systems[0]}/{systems[1]}', query_string=dict(cursor=cursor))
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('limit', [0, -1, 'a', Config.LCCS_MAX_PAGE_SIZE + 1])
+    def test_invalid_limit(self, client, systems, limit):
+        response = client.get(f'/classification_systems/{systems[0]}/classes', query_string=dict(limit=limit))
+
+        assert response.status_code == 400
+
+    def test_max_limit(self, client, systems, classes):
+        response = client.get(f'/classification_systems/{systems[0]}/classes',
+                              query_string=dict(limit=Config.LCCS_MAX_PAGE_SIZE))
+
+        assert response.status_code == 200
+        assert len(response.json) == 5
+
+
+class TestStream:
+    def test_classes(self, client, systems, classes):
+        path = f'/classification_systems/{systems[0]}/classes'
+
+        stream = client.get(path, query_string=dict(stream='true'))
+
+        assert stream.is_streamed
+        assert stream.json == client.get(path).json
+        assert [item['id'] for item in stream.json] == classes[0]
+
+    def test_mappings(self, client, systems, mappings):
+        path = f'/mappings/{systems[0]}/{systems[1]}'
+
+        stream = client.get(path, query_string=dict(stream='1'))
+
+        assert stream.is_streamed
+        assert stream.json == client.get(path).json
+        assert len(stream.json) == len(mappings)
+
+    def test_empty_system(self, client, systems):
+        classes = client.get(f'/classification_systems/{systems[0]}/classes', query_string=dict(stream='true'))
+        mapping = client.get(f'/mappings/{systems[0]}/{systems[1]}', query_string=dict(stream='true'))
+
+        assert (classes.status_code, classes.json) == (200, [])
+        assert (mapping.status_code, mapping.json) == (200, [])
+        assert _classes(client, systems[0]) == {}
+
+    def test_class_cursor(self, client, systems, classes):
+        path = f'/classification_systems/{systems[0]}/classes'
+
+        stream = client.get(path, query_string=dict(stream='true', cursor=classes[0][1]))
+
+        assert [item['id'] for item in stream.json] == classes[0][2:]
+        assert stream.json == client.get(path, query_string=dict(cursor=classes[0][1])).json
+
+    def test_mapping_cursor(self, client, systems, mappings):
+        source, target = mappings[2]
+
+        stream = client.get(f'/mappings/{systems[0]}/{systems[1]}',
+                            query_string=dict(stream='true', cursor=f'{source}:{target}'))
+
+        assert [(int(item['source_class_id']), int(item['target_class_id'])) for item in stream.json] == mappings[3:]
+
+    def test_invalid_cursor(self, client, systems, mappings):
+        classes = client.get(f'/classification_systems/{systems[0]}/classes',
+                             query_string=dict(stream='true', cursor='abc'))
+        mapping = client.get(f'/mappings/{systems[0]}/{systems[1]}', query_string=dict(stream='true', cursor='1'))
+
+        assert classes.status_code == mapping.status_code == 400
+
+
+def _deleted_rows(response) -> dict:
+    """Return the ``X-Deleted-Rows`` header of a response as a dictionary."""
+    return {table: int(count) for table, count in
+            (item.split('=') for item in response.headers['X-Deleted-Rows'].split(', '))}
+
+
+class TestDelete:
+    @pytest.fixture
+    def peers(self, client, systems, classes, mappings):
+        """Map two classes of the third system to the first one, besides the mappings of the first to the second."""
+        response = client.post(f'/classification_systems/{systems[2]}/classes', headers=HEADERS,
+                               json=dict(classes=[_class('c0'), _class('c1')]))
+        sources = sorted(item['id'] for item in response.json)
+
+        response = client.post(f'/mappings/{systems[2]}/{systems[0]}', headers=HEADERS,
+                               json=[dict(source_class=source, target_class=target)
+                                     for source, target in zip(sources, classes[0])])
+        assert response.status_code == 201
+
+    def test_delete_classes(self, client, systems, peers):
+        peer_mappings = client.get(f'/mappings/{systems[2]}')
+        assert peer_mappings.status_code == 200
+
+        response = client.delete(f'/classification_systems/{systems[0]}/classes', headers=HEADERS)
+
+        assert response.status_code == 204
+        assert _deleted_rows(response) == dict(class_mappings=7, classes=5)
+        assert _classes(client, systems[0]) == {}
+        assert client.get(f'/mappings/{systems[0]}/{systems[1]}').json == []
+        assert client.get(f'/mappings/{systems[2]}/{systems[0]}').json == []
+        assert client.get(f'/mappings/{systems[2]}').status_code == 404
+        assert len(_classes(client, systems[1])) == 5
+
+    def test_delete_classification_system(self, client, systems, peers):
+        client.get(f'/mappings/{systems[2]}')
+
+        response = client.delete(f'/classification_systems/{systems[0]}', headers=HEADERS)
+
+        assert response.status_code == 204
+        assert _deleted_rows(response) == dict(class_mappings=7, styles=0, classes=5, classification_systems=1)
+        assert client.get(f'/classification_systems/{systems[0]}').status_code == 404
+        assert client.get(f'/mappings/{systems[2]}').status_code == 404
+        assert systems[0] not in [system['id'] for system in client.get('/classification_systems').json]
+
+    def test_delete_empty_system(self, client, systems):
+        response = client.delete(f'/classification_systems/{systems[0]}', headers=HEADERS)
+
+        assert _deleted_rows(response) == dict(class_mappings=0, styles=0, classes=0, classification_systems=1)
+
+
+class TestReadMappings:
+    @pytest.fixture
+    def targets(self, client, systems, classes, mappings):
+        """Map two classes of the first system to the third one, besides the mappings of the first to the second."""
+        response = client.post(f'/classification_systems/{systems[2]}/classes', headers=HEADERS,
+                               json=dict(classes=[_class('c0'), _class('c1')]))
+        targets = sorted(item['id'] for item in response.json)
+
+        response = client.post(f'/mappings/{systems[0]}/{systems[2]}', headers=HEADERS,
+                               json=[dict(source_class=source, target_class=target, description=f'{source}-{target}',
+                                          degree_of_similarity=0.5) for source, target in zip(classes[0], targets)])
+        assert response.status_code == 201
+
+        return list(zip(classes[0], targets))
+
+    def test_distinct_targets(self, app, client, systems, targets, query_counter):
+        response = client.get(f'/mappings/{systems[0]}')
+
+        assert response.status_code == 200
+        assert [link['href'].split('?')[0] for link in response.json if link['rel'] == 'child'] == \
+            [f'{Config.LCCS_URL}/mappings/{systems[0]}/{target}' for target in sorted(systems[1:])]
+
+        with app.app_context(), query_counter() as counter:
+            _, rows = data.get_mappings(str(systems[0]))
+
+        mapping_statements = [statement for statement in counter.statements if 'class_mappings' in statement]
+
+        assert [row.id for row in rows] == sorted(systems[1:])
+        assert len(mapping_statements) == 1
+        assert ' IN (' not in mapping_statements[0].upper()
+
+    def test_no_targets(self, client, systems):
+        assert client.get(f'/mappings/{systems[0]}').status_code == 404
+
+    def test_mapping(self, app, client, systems, targets):
+        response = client.get(f'/mappings/{systems[0]}/{systems[2]}')
+
+        with app.app_context():
+            expected = ClassesMappingSchema().dump(
+                ClassMapping.query.join(LucClass, ClassMapping.source_class_id == LucClass.id)
+                .filter(LucClass.classification_system_id == systems[0],
+                        ClassMapping.target_class_id.in_([target for _, target in targets]))
+                .order_by(ClassMapping.source_class_id, ClassMapping.target_class_id), many=True)
+
+        assert response.status_code == 200
+        assert [{key: value for key, value in item.items() if key != 'links'} for item in response.json] == expected
+        assert [(int(item['source_class_id']), int(item['target_class_id'])) for item in response.json] == targets
+        assert [item['description'] for item in response.json] == [f'{source}-{target}' for source, target in targets]
+
+        for item in response.json:
+            assert [link['href'].split('?')[0] for link in item['links']] == [
+                f'{Config.LCCS_URL}/classification_systems/{systems[0]}/classes/{item["source_class_id"]}',
+                f'{Config.LCCS_URL}/classification_systems/{systems[2]}/classes/{item["target_class_id"]}',
+            ]
+
+    def test_other_target(self, client, systems, mappings, targets):
+        response = client.get(f'/mappings/{systems[0]}/{systems[1]}')
+
+        assert [(int(item['source_class_id']), int(item['target_class_id'])) for item in response.json] == mappings
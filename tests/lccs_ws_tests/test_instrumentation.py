@@ -0,0 +1,223 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import json
+import logging
+import re
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from lccs_ws import instrumentation
+from lccs_ws.cache import LRUCache
+from lccs_ws.config import Config
+from lccs_ws.instrumentation import (CollectorRegistry, RateLimiter,
+                                     SlowQueryLog, count_queries,
+                                     init_instrumentation, parameters_shape,
+                                     parse_query_budgets, request_statistics)
+
+
+@pytest.fixture
+def app():
+    engine = create_engine('sqlite://')
+    cache = LRUCache(maxsize=10, ttl=60)
+
+    app = Flask(__name__)
+    app.config.update(LCCS_METRICS=True, LCCS_SERVER_TIMING=True, LCCS_QUERY_BUDGET=2,
+                      LCCS_QUERY_BUDGETS=dict(loop=20), LCCS_QUERY_REPEAT_THRESHOLD=5,
+                      LCCS_SLOW_QUERY_THRESHOLD=0, LCCS_SLOW_QUERY_EXPLAIN=False, LCCS_SLOW_QUERY_RATE=2,
+                      LCCS_SLOW_QUERY_INTERVAL=300)
+    init_instrumentation(app)
+
+    if 'lccs_ws_metrics' in app.extensions:
+        app.extensions['lccs_ws_metrics'].track_cache('test', cache)
+
+    @app.route('/items/<int:queries>')
+    def items(queries):
+        with engine.connect() as connection:
+            for index in range(queries):
+                connection.execute(text(f'SELECT {index}'))
+
+        cache.get('missing')
+
+        return {'queries': request_statistics().queries}
+
+    @app.route('/loop')
+    def loop():
+        with engine.connect() as connection:
+            for _ in range(5):
+                connection.execute(text('SELECT 1'))
+
+        return {}
+
+    return app
+
+
+def test_server_timing(app):
+    response = app.test_client().get('/items/2')
+
+    assert response.json == {'queries': 2}
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert ';count=2, app;dur=' in response.headers['Server-Timing']
+
+
+def test_query_budget(app, caplog):
+    client = app.test_client()
+
+    with caplog.at_level(logging.WARNING):
+        client.get('/items/2')
+        assert not caplog.records
+
+        client.get('/items/3')
+        assert 'executed 3 database statements, over the budget of 2' in caplog.text
+
+
+def test_repeated_statements(app, caplog):
+    with caplog.at_level(logging.WARNING), count_queries() as counter:
+        app.test_client().get('/loop')
+
+    assert 'same statement 5 times, possible N+1 queries: SELECT 1' in caplog.text
+    assert 'over the budget' not in caplog.text
+    assert counter.count == 5
+    assert counter.repeated() == {'SELECT 1': 5}
+
+
+def test_parse_query_budgets():
+    assert parse_query_budgets('get_mapping=4  create_classes=500') == dict(get_mapping=4, create_classes=500)
+
+    with pytest.raises(ValueError):
+        parse_query_budgets('get_mapping')
+
+
+def _query_items(engine, count: int):
+    with engine.connect() as connection:
+        connection.execute(text('SELECT :a + :b'), a=count, b=1.5)
+
+
+def test_slow_query_log(app, caplog):
+    engine = create_engine('sqlite://')
+    app.config['LCCS_SLOW_QUERY_THRESHOLD'] = 1e-6
+    init_instrumentation(app)
+
+    with caplog.at_level(logging.WARNING, logger='lccs_ws.slow_queries'):
+        for count in range(3):
+            _query_items(engine, count)
+
+        # The same statement is logged once per interval.
+        records = [json.loads(record.message) for record in caplog.records if record.name == 'lccs_ws.slow_queries']
+        assert len(records) == 1
+
+    assert records[0]['statement'] == 'SELECT ? + ?'
+    assert records[0]['parameters'] == dict(count=2, types=dict(int=1, float=1))
+    # Only the functions of the service are reported as callers.
+    assert records[0]['callers'] == []
+
+    app.config['LCCS_SLOW_QUERY_THRESHOLD'] = 0
+    init_instrumentation(app)
+
+
+class TestPlan:
+    @pytest.fixture
+    def connection(self):
+        if not Config.SQLALCHEMY_DATABASE_URI.startswith('postgres'):
+            pytest.skip('The plans are captured on PostgreSQL only.')
+
+        engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            connection.execute(text('CREATE TEMPORARY TABLE plan_items (id serial PRIMARY KEY, name text)'))
+
+            yield connection
+
+            transaction.rollback()
+
+        engine.dispose()
+
+    def test_select(self, connection):
+        statement = 'WITH items AS (SELECT 1 AS id) SELECT id FROM items'
+
+        plan = SlowQueryLog(0, explain=True).plan(connection, statement, {})
+
+        assert plan[0]['Plan']['Actual Rows'] == 1
+
+    @pytest.mark.parametrize('statement', [
+        "SELECT pg_notify('lccs_ws_plan', 'item')",
+        "SELECT nextval('plan_items_id_seq')",
+        "WITH created AS (INSERT INTO plan_items (name) VALUES ('item') RETURNING id) SELECT id FROM created",
+        "WITH deleted AS (DELETE FROM plan_items RETURNING id) SELECT count(*) FROM deleted",
+        "UPDATE plan_items SET name = 'item'",
+    ])
+    def test_side_effects(self, connection, statement):
+        assert SlowQueryLog(0, explain=True).plan(connection, statement, {}) is None
+
+    def test_rolled_back(self, connection, monkeypatch):
+        monkeypatch.setattr(instrumentation, '_SIDE_EFFECTS', re.compile('^$'))
+        statement = ("WITH created AS (INSERT INTO plan_items (name) VALUES ('item') RETURNING id) "
+                     "SELECT id FROM created")
+
+        assert SlowQueryLog(0, explain=True).plan(connection, statement, {}) is not None
+        assert connection.execute(text('SELECT count(*) FROM plan_items')).scalar() == 0
+
+    def test_error(self, connection):
+        with pytest.raises(Exception):
+            SlowQueryLog(0, explain=True).plan(connection, 'SELECT 1 / 0', {})
+
+        # The transaction of the statement is still usable.
+        assert connection.execute(text('SELECT count(*) FROM plan_items')).scalar() == 0
+
+
+def test_parameters_shape():
+    assert parameters_shape([dict(a=1, b='x'), dict(a=2, b='y')]) == dict(rows=2, count=2, types=dict(int=1, str=1))
+    assert parameters_shape((1, 2, 3)) == dict(count=3, types=dict(int=3))
+    assert parameters_shape(None) == dict(count=0, types=dict())
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=2, period=3600)
+
+    assert [limiter.allow() for _ in range(4)] == [True, True, False, False]
+    assert limiter.suppressed == 2
+
+
+def _sample(metrics: str, name: str) -> float:
+    for line in metrics.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[-1])
+
+    return 0.0
+
+
+@pytest.mark.skipif(CollectorRegistry is None, reason='prometheus_client is not installed')
+def test_metrics(app):
+    client = app.test_client()
+    before = client.get('/metrics').get_data(as_text=True)
+
+    assert client.get('/items/2').json == {'queries': 2}
+
+    response = client.get('/metrics')
+    metrics = response.get_data(as_text=True)
+
+    assert response.content_type.startswith('text/plain')
+
+    for name, increment in (('lccs_ws_requests_total{endpoint="items",method="GET",status="200"}', 1),
+                            ('lccs_ws_db_queries_sum{endpoint="items"}', 2),
+                            ('lccs_ws_request_duration_seconds_count{endpoint="items"}', 1),
+                            ('lccs_ws_response_size_bytes_count{endpoint="items"}', 1),
+                            ('lccs_ws_cache_requests_total{cache="test",result="miss"}', 1)):
+        assert _sample(metrics, name) - _sample(before, name) == increment, name
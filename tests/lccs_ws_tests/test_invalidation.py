@@ -0,0 +1,132 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from lccs_ws import invalidation, response_cache
+from lccs_ws.cache import TaggedCache
+from lccs_ws.invalidation import (InvalidationBus, MemoryBus, MemoryHub,
+                                  PostgresBus, apply)
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    cache = TaggedCache(max_bytes=1024, ttl=60)
+    monkeypatch.setattr(response_cache, 'responses', cache)
+    monkeypatch.setattr(invalidation, 'responses', cache)
+    monkeypatch.setattr(invalidation, 'invalidate', cache.invalidate)
+
+    return cache
+
+
+def test_bus_without_send():
+    class Bus(InvalidationBus):
+        pass
+
+    with pytest.raises(TypeError):
+        Bus()
+
+
+class TestMemoryBus:
+    def test_publish(self):
+        hub = MemoryHub()
+        workers = [MemoryBus(hub) for _ in range(3)]
+        received = []
+
+        for index, bus in enumerate(workers):
+            bus.subscribe(lambda tags, index=index: received.append((index, tags)))
+
+        workers[0].publish([('system', 1), ('systems',)])
+
+        assert received == [(1, [('system', 1), ('systems',)]), (2, [('system', 1), ('systems',)])]
+        assert (workers[0].published, workers[1].received) == (1, 1)
+
+    def test_close(self):
+        hub = MemoryHub()
+        publisher, subscriber = MemoryBus(hub), MemoryBus(hub)
+        received = []
+        subscriber.subscribe(received.append)
+
+        subscriber.close()
+        publisher.publish([('system', 1)])
+
+        assert received == []
+
+    def test_large_change(self):
+        hub = MemoryHub()
+        publisher, subscriber = MemoryBus(hub), MemoryBus(hub)
+        received = []
+        subscriber.subscribe(received.append)
+
+        publisher.publish([('system', system_id) for system_id in range(5000)])
+
+        assert received == [None]
+
+    def test_handler_error(self):
+        hub = MemoryHub()
+        publisher, subscriber = MemoryBus(hub), MemoryBus(hub)
+        received = []
+        subscriber.subscribe(lambda tags: 1 / 0)
+        subscriber.subscribe(received.append)
+
+        publisher.publish([('systems',)])
+
+        assert received == [[('systems',)]]
+
+
+def test_apply(responses):
+    responses.set('classes-1', b'1', 1, tags=[('system', 1)])
+    responses.set('classes-2', b'2', 1, tags=[('system', 2)])
+
+    apply([('system', 1)])
+
+    assert responses.get('classes-1') is None
+    assert responses.get('classes-2') is not None
+
+    apply(None)
+
+    assert len(responses) == 0
+
+
+@pytest.mark.skipif(not os.getenv('SQLALCHEMY_DATABASE_URI', '').startswith('postgres'),
+                    reason='Requires a PostgreSQL database in SQLALCHEMY_DATABASE_URI.')
+def test_postgres_bus():
+    engine = create_engine(os.environ['SQLALCHEMY_DATABASE_URI'])
+    publisher = PostgresBus(engine, channel='lccs_ws_test', poll_interval=0.1)
+    subscriber = PostgresBus(engine, channel='lccs_ws_test', poll_interval=0.1)
+    received = []
+    subscriber.subscribe(received.append)
+
+    subscriber.ensure_started()
+
+    try:
+        assert subscriber.wait_listening(5)
+
+        publisher.publish([('system', 1)])
+
+        for _ in range(50):
+            if received:
+                break
+            time.sleep(0.1)
+    finally:
+        subscriber.close()
+
+    assert received == [[('system', 1)]]
@@ -0,0 +1,65 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+from lccs_ws.links import CLASSES_ITEM_LINKS, CLASSES_LINKS, ROOT_LINKS, Links
+
+
+class TestLinks:
+    def _attach_classes(self, links, size):
+        shared = links.shared(CLASSES_LINKS, system_id=1)
+
+        return [
+            links.attach(dict(id=class_id), shared, *CLASSES_ITEM_LINKS, system_id=1, class_id=class_id)
+            for class_id in range(size)
+        ]
+
+    def test_items_have_own_links(self):
+        classes = self._attach_classes(Links('http://localhost:5000'), 100)
+
+        for class_info in classes:
+            assert len(class_info['links']) == len(CLASSES_LINKS) + 1
+
+            child = class_info['links'][-1]
+            assert child['rel'] == 'child'
+            assert child['href'] == f'http://localhost:5000/classification_systems/1/classes/{class_info["id"]}'
+
+        assert classes[0]['links'] is not classes[1]['links']
+
+    def test_query_string(self):
+        links = Links('http://localhost:5000/', '?access_token=abc', '&language=en')
+
+        self_link, _, style_formats = links.render_all(ROOT_LINKS)
+
+        assert self_link['href'] == 'http://localhost:5000/?access_token=abc&language=en'
+        assert style_formats['href'] == 'http://localhost:5000/style_formats?access_token=abc'
+
+        links = Links('http://localhost:5000', '', '&language=en')
+
+        assert links.render_all(ROOT_LINKS)[0]['href'] == 'http://localhost:5000/?language=en'
+
+    def test_compact_mode(self):
+        classes = self._attach_classes(Links('http://localhost:5000', mode='compact'), 10)
+
+        for class_info in classes:
+            assert class_info['links'] == [
+                {'href': f'http://localhost:5000/classification_systems/1/classes/{class_info["id"]}', 'rel': 'child'}
+            ]
+
+    def test_none_mode(self):
+        classes = self._attach_classes(Links('http://localhost:5000', mode='none'), 10)
+
+        assert all('links' not in class_info for class_info in classes)
@@ -0,0 +1,54 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import pytest
+from sqlalchemy import create_engine
+
+from lccs_ws.pool import MonitoredQueuePool, PoolTimeoutError, engine_options
+
+SETTINGS = dict(
+    LCCS_POOL_SIZE=1,
+    LCCS_POOL_MAX_OVERFLOW=0,
+    LCCS_POOL_TIMEOUT=30,
+    LCCS_POOL_PRE_PING=False,
+    LCCS_POOL_RECYCLE=-1,
+    LCCS_POOL_SHED=True,
+    LCCS_POOL_SHED_WAIT=0.1,
+)
+
+
+class TestMonitoredQueuePool:
+    def test_engine_options(self):
+        options = engine_options(SETTINGS)
+
+        assert options['poolclass'] is MonitoredQueuePool
+        assert options['pool_timeout'] == 0.1
+        assert engine_options(dict(SETTINGS, LCCS_POOL_SHED=False))['pool_timeout'] == 30
+
+    def test_saturation(self, tmp_path):
+        engine = create_engine(f'sqlite:///{tmp_path / "pool.db"}', **engine_options(SETTINGS))
+
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+
+            status = engine.pool.to_dict()
+
+        assert status['checked_out'] == 1
+        assert status['requests'] == 2
+        assert status['timeouts'] == 1
+        assert status['wait_max'] >= 0.1
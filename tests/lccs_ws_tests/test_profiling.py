@@ -0,0 +1,88 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import os
+import pstats
+
+import pytest
+from flask import Flask
+
+from lccs_ws.profiling import PROFILE_HEADER, init_profiling
+
+
+def _classes():
+    return sorted(str(index) for index in range(1000))[0]
+
+
+@pytest.fixture
+def app(client_oauth2, tmp_path):
+    client_oauth2.authorized = False
+
+    app = Flask(__name__)
+    app.config.update(LCCS_PROFILING=True, LCCS_PROFILING_DIR=str(tmp_path), LCCS_PROFILING_TOP=10)
+    init_profiling(app)
+    app.add_url_rule('/classes', 'classes', _classes)
+
+    return app
+
+
+class TestProfiling:
+    def test_without_profile(self, app):
+        with app.test_client() as client:
+            response = client.get('/classes')
+
+        assert response.data == b'0'
+        assert PROFILE_HEADER not in response.headers
+
+    def test_requires_admin(self, app):
+        with app.test_client() as client:
+            assert client.get('/classes?profile=text').status_code == 403
+
+    def test_invalid_mode(self, app, client_oauth2):
+        client_oauth2.authorized = True
+
+        with app.test_client() as client:
+            assert client.get('/classes?profile=flamegraph').status_code == 400
+
+    def test_text(self, app, client_oauth2):
+        client_oauth2.authorized = True
+
+        with app.test_client() as client:
+            response = client.get('/classes?profile=text')
+
+        assert response.mimetype == 'text/plain'
+        assert b'_classes' in response.data
+
+    def test_pstats(self, app, client_oauth2):
+        client_oauth2.authorized = True
+
+        with app.test_client() as client:
+            response = client.get('/classes?profile=pstats')
+
+        assert response.data == b'0'
+
+        path = os.path.join(app.config['LCCS_PROFILING_DIR'], response.headers[PROFILE_HEADER])
+        functions = [function for _, _, function in pstats.Stats(path).stats]
+
+        assert '_classes' in functions
+
+    def test_disabled(self):
+        app = Flask(__name__)
+        app.config.update(LCCS_PROFILING=False)
+        init_profiling(app)
+
+        assert not app.before_request_funcs
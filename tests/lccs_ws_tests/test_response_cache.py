@@ -0,0 +1,124 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import pytest
+from flask import Flask, jsonify, request
+
+from lccs_ws import response_cache
+from lccs_ws.cache import TaggedCache
+from lccs_ws.response_cache import (CACHE_HEADER, cached, init_response_cache,
+                                    invalidate)
+from lccs_ws.utils import conditional
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(response_cache, 'responses', TaggedCache(max_bytes=1024 * 1024, ttl=60))
+
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/systems/<system_id>/classes')
+    @cached(lambda system_id: [('system', int(system_id))])
+    @conditional(lambda system_id: 'v1')
+    def classes(system_id):
+        calls.append(system_id)
+        return jsonify([dict(id=len(calls), system=system_id, language=request.args.get('language'))])
+
+    @app.route('/systems/<system_id>/edited')
+    @cached(lambda system_id: [('system', int(system_id))])
+    def edited(system_id):
+        calls.append(system_id)
+        # A write of another request commits while this response is rendered.
+        invalidate(('system', int(system_id)))
+        return jsonify([])
+
+    app.extensions['calls'] = calls
+
+    return app
+
+
+class TestResponseCache:
+    def test_hit(self, app):
+        with app.test_client() as client:
+            first = client.get('/systems/1/classes')
+            second = client.get('/systems/1/classes')
+
+        assert first.headers[CACHE_HEADER] == 'miss'
+        assert second.headers[CACHE_HEADER] == 'hit'
+        assert second.data == first.data
+        assert second.mimetype == 'application/json'
+        assert app.extensions['calls'] == ['1']
+
+    def test_key(self, app):
+        with app.test_client() as client:
+            client.get('/systems/1/classes?language=en')
+            client.get('/systems/1/classes?language=pt-br')
+            client.get('/systems/2/classes?language=en')
+            response = client.get('/systems/1/classes?language=en')
+
+        assert response.json[0]['language'] == 'en'
+        assert app.extensions['calls'] == ['1', '1', '2']
+
+    def test_not_modified(self, app):
+        with app.test_client() as client:
+            etag = client.get('/systems/1/classes').headers['ETag']
+            response = client.get('/systems/1/classes', headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.headers[CACHE_HEADER] == 'hit'
+
+    def test_invalidate(self, app):
+        with app.test_client() as client:
+            client.get('/systems/1/classes')
+            client.get('/systems/2/classes')
+
+            assert invalidate(('system', 1)) == 1
+
+            client.get('/systems/1/classes')
+            client.get('/systems/2/classes')
+
+        assert app.extensions['calls'] == ['1', '2', '1']
+
+    def test_access_token(self, app):
+        with app.test_client() as client:
+            client.get('/systems/1/classes?access_token=secret')
+            response = client.get('/systems/1/classes?access_token=secret')
+
+        assert CACHE_HEADER not in response.headers
+        assert len(response_cache.responses) == 0
+
+    def test_invalidated_while_rendering(self, app):
+        with app.test_client() as client:
+            client.get('/systems/1/edited')
+            response = client.get('/systems/1/edited')
+
+        assert response.headers[CACHE_HEADER] == 'miss'
+        assert app.extensions['calls'] == ['1', '1']
+        assert len(response_cache.responses) == 0
+
+
+def test_init_response_cache(monkeypatch):
+    cache = TaggedCache(max_bytes=1024, ttl=60)
+    cache.set('a', b'a', 1)
+    monkeypatch.setattr(response_cache, 'responses', cache)
+
+    app = Flask(__name__)
+    app.config.update(LCCS_RESPONSE_CACHE_SIZE=0, LCCS_RESPONSE_CACHE_TTL=5)
+    init_response_cache(app)
+
+    assert (cache.max_bytes, cache.ttl, len(cache)) == (0, 5, 0)
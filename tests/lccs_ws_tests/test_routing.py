@@ -0,0 +1,145 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from lccs_ws import invalidation, response_cache
+from lccs_ws.cache import TaggedCache
+from lccs_ws.invalidation import MemoryBus, MemoryHub, init_invalidation
+from lccs_ws.response_cache import CACHE_HEADER, cached
+from lccs_ws.routing import init_replicas, pin_to_primary
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """Build an application with a primary and a replica SQLite databases, with different contents."""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "primary.db"}',
+        SQLALCHEMY_BINDS={'replica_0': f'sqlite:///{tmp_path / "replica.db"}'},
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        LCCS_REPLICA_CHECK_INTERVAL=30,
+        LCCS_REPLICA_MAX_LAG=60,
+    )
+
+    db = SQLAlchemy(app)
+
+    class Item(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(32))
+
+    with app.app_context():
+        for bind in (None, 'replica_0'):
+            engine = db.get_engine(app, bind=bind)
+            Item.__table__.create(engine)
+            engine.execute(Item.__table__.insert().values(name=bind or 'primary'))
+
+        init_replicas(app, db)
+
+    return app, db, Item
+
+
+def _names(db, Item):
+    return [item.name for item in db.session.query(Item).order_by(Item.id)]
+
+
+class TestReplicaRouting:
+    def test_get_reads_from_replica(self, replicated):
+        app, db, Item = replicated
+
+        with app.test_request_context('/', method='GET'):
+            assert _names(db, Item) == ['replica_0']
+
+    def test_writes_go_to_primary(self, replicated):
+        app, db, Item = replicated
+
+        with app.test_request_context('/', method='POST'):
+            assert _names(db, Item) == ['primary']
+
+        with app.test_request_context('/', method='GET'):
+            db.session.add(Item(name='created'))
+            db.session.commit()
+
+            assert _names(db, Item) == ['primary', 'created']
+
+    def test_out_of_request_uses_primary(self, replicated):
+        app, db, Item = replicated
+
+        with app.app_context():
+            assert _names(db, Item) == ['primary']
+
+    def test_unhealthy_replica(self, replicated):
+        app, db, Item = replicated
+        router = app.extensions['lccs_ws_replicas']
+        router.mark_unhealthy('replica_0')
+
+        with app.test_request_context('/', method='GET'):
+            assert _names(db, Item) == ['primary']
+
+        assert router.status() == {'replica_0': False}
+
+
+class TestRecentChanges:
+    def test_pinned_tags_read_from_primary(self, replicated, monkeypatch):
+        app, db, Item = replicated
+        monkeypatch.setattr(response_cache, 'responses', TaggedCache(max_bytes=1024, ttl=60))
+
+        @app.route('/systems/<int:system_id>')
+        @cached(lambda system_id: [('system', system_id)])
+        def system(system_id):
+            return dict(names=_names(db, Item))
+
+        with app.test_request_context('/', method='POST'):
+            pin_to_primary([('system', 1)])
+
+        with app.test_client() as client:
+            changed, other = client.get('/systems/1'), client.get('/systems/2')
+
+        assert (changed.json['names'], changed.headers[CACHE_HEADER]) == (['primary'], 'miss')
+        assert other.json['names'] == ['replica_0']
+
+    def test_expired(self, replicated):
+        app, _, _ = replicated
+        router = app.extensions['lccs_ws_replicas']
+        router.max_lag = 0
+
+        router.pin([('system', 1)])
+
+        assert not router.is_pinned([('system', 1)])
+
+    def test_clear(self, replicated):
+        app, _, _ = replicated
+        router = app.extensions['lccs_ws_replicas']
+
+        router.pin(None)
+
+        assert router.is_pinned([('system', 2)])
+
+    def test_notification(self, replicated, monkeypatch):
+        app, db, _ = replicated
+        monkeypatch.setattr(invalidation, 'bus', None)
+        router = app.extensions['lccs_ws_replicas']
+        hub = MemoryHub()
+        publisher, subscriber = MemoryBus(hub), MemoryBus(hub)
+        init_invalidation(app, db, invalidation_bus=subscriber)
+
+        publisher.publish([('system', 1)])
+
+        assert router.is_pinned([('system', 1)])
+        assert not router.is_pinned([('system', 2)])
@@ -0,0 +1,94 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import json
+from collections import namedtuple
+from decimal import Decimal
+
+from jsonschema import validate
+
+from lccs_ws.forms import (ClassesMappingSchema, ClassesSchema,
+                           ClassificationSystemSchema)
+from lccs_ws.schemas import class_response, classification_system_type
+from lccs_ws.serializers import (class_mapping_serializer, class_serializer,
+                                 classification_system_serializer)
+
+SystemRow = namedtuple('SystemRow', ['id', 'identifier', 'title', 'name', 'authority_name', 'version',
+                                     'description', 'version_successor', 'version_predecessor'])
+ClassRow = namedtuple('ClassRow', ['id', 'name', 'title', 'code', 'description', 'class_parent_id'])
+MappingRow = namedtuple('MappingRow', ['source_class_id', 'target_class_id', 'description', 'degree_of_similarity'])
+
+
+def _encode(value):
+    return json.dumps(value, sort_keys=True)
+
+
+class TestSerializers:
+    def test_classification_system(self):
+        rows = [
+            SystemRow(1, 'PRODES-1.0', 'PRODES', 'PRODES', 'INPE', '1.0', 'Deforestation', None, None),
+            SystemRow(2, 'PRODES-2.0', 'PRODES', 'PRODES', 'INPE', '2.0', None, None, 1),
+        ]
+
+        output = classification_system_serializer.dump(rows, many=True)
+
+        assert _encode(output) == _encode(ClassificationSystemSchema().dump(rows, many=True))
+        validate(instance=output[0], schema=classification_system_type)
+
+    def test_classes(self):
+        rows = [
+            ClassRow(1, 'Forest', 'Forest', '1', 'Forest areas', None),
+            ClassRow(2, 'Primary', 'Primary Forest', 11, None, 1),
+        ]
+
+        output = class_serializer.dump(rows, many=True)
+
+        assert _encode(output) == _encode(ClassesSchema().dump(rows, many=True))
+        assert 'class_parent_id' not in output[0]
+        assert output[1]['code'] == '11'
+
+        for item in output:
+            validate(instance=item, schema=class_response)
+
+    def test_mappings(self):
+        rows = [
+            MappingRow(1, 11, 'Same class', Decimal('0.75')),
+            MappingRow(2, 12, None, None),
+        ]
+
+        output = class_mapping_serializer.dump(rows, many=True)
+
+        assert _encode(output) == _encode(ClassesMappingSchema().dump(rows, many=True))
+        assert output[0] == dict(source_class_id='1', target_class_id='11', description='Same class',
+                                 degree_of_similarity=0.75)
+
+    def test_iter_dump(self):
+        rows = [ClassRow(1, 'Forest', 'Forest', '1', 'Forest areas', None), ClassRow(2, 'Primary', None, 11, None, 1)]
+        read = []
+
+        def fetch():
+            for row in rows:
+                read.append(row)
+                yield row
+
+        output = class_serializer.iter_dump(fetch())
+
+        # The rows are read as the output is iterated.
+        assert read == []
+        assert next(output) == class_serializer.dump(rows[0])
+        assert read == rows[:1]
+        assert list(output) == [class_serializer.dump(rows[1])]
@@ -0,0 +1,43 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+from lccs_ws.synthetic import (_mapping_pairs, level_sizes, style_document,
+                               translations)
+
+
+class TestSynthetic:
+    def test_level_sizes(self):
+        assert level_sizes(21, depth=3, fanout=4) == [1, 4, 16]
+        assert sum(level_sizes(10000, depth=5, fanout=3)) == 10000
+        assert level_sizes(2, depth=5) == [1, 1]
+
+    def test_translations(self):
+        texts = translations(['en', 'pt-br', 'de'], 'title', number=3)
+
+        assert texts == {'en': 'Class 3', 'pt-br': 'Classe 3', 'de': '[de] Class 3'}
+
+    def test_mapping_pairs(self):
+        pairs = list(_mapping_pairs(list(range(10)), list(range(100, 110)), 95))
+
+        assert len(pairs) == 95
+        assert len(set(pairs)) == 95
+
+    def test_style_document(self):
+        style = style_document('synthetic-0', 10000)
+
+        assert 10000 <= len(style) < 10200
+        assert style.startswith(b'<?xml')
@@ -0,0 +1,132 @@
+#
+# This file is part of LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+import types
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from lccs_ws import auth, tracing
+from lccs_ws.serializers import class_serializer
+
+pytest.importorskip('opentelemetry.sdk')
+
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import \
+    InMemorySpanExporter  # noqa: E402
+
+TRACEPARENT = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+
+def _lookup(engine):
+    with engine.connect() as connection:
+        return connection.execute(text('SELECT 1')).scalar()
+
+
+@pytest.fixture
+def app(monkeypatch, client_oauth2):
+    engine = create_engine('sqlite://')
+    module = types.ModuleType('lccs_ws_tests.fake_data')
+    module.lookup = _lookup
+    monkeypatch.setattr(_lookup, '__module__', module.__name__)
+    tracing.instrument_module(module, 'data')
+
+    exporter = InMemorySpanExporter()
+    app = Flask(__name__)
+    app.config.update(LCCS_TRACING=True, LCCS_TRACING_SAMPLE_RATIO=1.0)
+    tracing.init_tracing(app, exporter)
+
+    @app.route('/items')
+    @auth.oauth2(roles=['admin'])
+    def items(**kwargs):
+        return {'value': module.lookup(engine)}
+
+    yield app, exporter
+
+    tracing.tracer = None
+
+
+def _spans(app, exporter):
+    app.extensions['lccs_ws_tracer_provider'].force_flush()
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestTracing:
+    def test_spans(self, app):
+        app, exporter = app
+
+        with app.test_client() as client:
+            assert client.get('/items', headers={'x-api-key': 'SomeToken'}).json == {'value': 1}
+
+        spans = _spans(app, exporter)
+        route, data, statement = spans['GET /items'], spans['data.lookup'], spans['db.select']
+
+        assert set(spans) == {'GET /items', 'oauth2', 'data.lookup', 'db.select'}
+        assert route.attributes['http.status_code'] == 200
+        assert spans['oauth2'].parent.span_id == route.context.span_id
+        assert data.parent.span_id == route.context.span_id
+        assert statement.parent.span_id == data.context.span_id
+        assert statement.attributes['db.statement'] == 'SELECT 1'
+
+    def test_trace_context(self, app):
+        app, exporter = app
+
+        with app.test_client() as client:
+            client.get('/items', headers={'traceparent': TRACEPARENT})
+
+        route = _spans(app, exporter)['GET /items']
+
+        assert f'{route.context.trace_id:032x}' == TRACEPARENT.split('-')[1]
+        assert f'{route.parent.span_id:016x}' == TRACEPARENT.split('-')[2]
+
+    def test_sampling(self, app):
+        app, exporter = app
+
+        with app.test_client() as client:
+            client.get('/items', headers={'traceparent': TRACEPARENT[:-2] + '00'})
+
+        assert _spans(app, exporter) == {}
+
+    def test_stream(self, app):
+        app, exporter = app
+        rows = [types.SimpleNamespace(id=index, name=f'class-{index}', title=None, code=None, description=None,
+                                      class_parent_id=None) for index in range(5)]
+
+        @app.route('/stream')
+        def stream():
+            return {'items': list(class_serializer.iter_dump(rows))}
+
+        @app.route('/page')
+        def page():
+            return {'items': class_serializer.dump(rows, many=True)}
+
+        client = app.test_client()
+
+        client.get('/stream')
+        assert set(_spans(app, exporter)) == {'GET /stream'}
+
+        exporter.clear()
+        client.get('/page')
+        assert set(_spans(app, exporter)) == {'GET /page', 'serialize.rows'}
+
+    def test_disabled(self):
+        app = Flask(__name__)
+        app.config.update(LCCS_TRACING=False)
+        tracing.init_tracing(app)
+
+        assert tracing.tracer is None
+        assert not app.before_request_funcs